@@ -0,0 +1,57 @@
+"""add hot filter indexes
+
+Revision ID: 073d6bd0c3a3
+Revises: aba70ac35a83
+Create Date: 2026-10-17 10:03:27.540117
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY inside
+an autocommit block so the tables stay writable during the build.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '073d6bd0c3a3'
+down_revision: Union[str, Sequence[str], None] = 'aba70ac35a83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_duty_assignments_guard_active', 'duty_assignments', ['guard_contact_number', 'is_active'], {}),
+    ('ix_duty_assignments_active_client', 'duty_assignments', ['client_contact_number'], {
+        'postgresql_where': sa.text('is_active'),
+        'sqlite_where': sa.text('is_active = 1'),
+    }),
+    ('ix_salary_records_guard_month_year', 'salary_records', ['guard_contact_number', 'month', 'year'], {}),
+    ('ix_inventory_records_guard_status', 'inventory_records', ['guard_contact_number', 'status'], {}),
+]
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, columns, kw in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kw)
+    else:
+        for name, table, columns, kw in INDEXES:
+            op.create_index(name, table, columns, **kw)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,55 @@
+"""add keyset pagination indexes
+
+Revision ID: 4c7e2b9a0f18
+Revises: e83b1f5a9d06
+Create Date: 2026-10-17 19:11:42.870315
+
+Composite (sort key, id) indexes serving the cursor-paginated list
+endpoints. Ordering by id alone uses the primary key.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e2b9a0f18'
+down_revision: Union[str, Sequence[str], None] = 'e83b1f5a9d06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_guards_name_id', 'guards', ['name', 'id']),
+    ('ix_clients_name_id', 'clients', ['name', 'id']),
+    ('ix_duty_assignments_start_date_id', 'duty_assignments', ['start_date', 'id']),
+    ('ix_salary_records_year_month_id', 'salary_records', ['year', 'month', 'id']),
+    ('ix_inventory_records_issue_date_id', 'inventory_records', ['issue_date', 'id']),
+]
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
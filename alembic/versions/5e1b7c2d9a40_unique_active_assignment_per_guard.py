@@ -0,0 +1,73 @@
+"""unique active assignment per guard
+
+Revision ID: 5e1b7c2d9a40
+Revises: 073d6bd0c3a3
+Create Date: 2026-10-17 11:12:08.214365
+
+Existing duplicates are closed first, keeping the newest active assignment
+of each guard, and the assignment figures of the global dashboard_counters
+row are recounted in the same migration so they match the closed rows.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1b7c2d9a40'
+down_revision: Union[str, Sequence[str], None] = '073d6bd0c3a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX_NAME = 'uq_duty_assignments_active_guard'
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.text("""
+        UPDATE duty_assignments
+        SET is_active = false, end_date = COALESCE(end_date, CURRENT_TIMESTAMP)
+        WHERE is_active = true AND EXISTS (
+            SELECT 1 FROM duty_assignments newer
+            WHERE newer.guard_contact_number = duty_assignments.guard_contact_number
+              AND newer.is_active = true
+              AND newer.id > duty_assignments.id
+        )
+    """))
+    # The same counts aba70ac35a83 seeded the row with
+    op.execute(sa.text("""
+        UPDATE dashboard_counters SET
+            assignments_active = (SELECT count(*) FROM duty_assignments WHERE is_active = :yes),
+            assignments_on_duty = (SELECT count(*) FROM duty_assignments WHERE is_active = :yes AND duty_status = 'ON_DUTY'),
+            assignments_off_duty = (SELECT count(*) FROM duty_assignments WHERE is_active = :yes AND duty_status = 'OFF_DUTY'),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE period = 'all'
+    """).bindparams(yes=True))
+
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(
+                INDEX_NAME, 'duty_assignments', ['guard_contact_number'],
+                unique=True, postgresql_where=sa.text('is_active'),
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+    else:
+        op.create_index(
+            INDEX_NAME, 'duty_assignments', ['guard_contact_number'],
+            unique=True, sqlite_where=sa.text('is_active = 1'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(INDEX_NAME, table_name='duty_assignments', postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(INDEX_NAME, table_name='duty_assignments')
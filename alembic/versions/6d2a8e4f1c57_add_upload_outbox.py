@@ -0,0 +1,52 @@
+"""add upload outbox
+
+Revision ID: 6d2a8e4f1c57
+Revises: 9b3e5f71a2c8
+Create Date: 2026-10-17 16:22:09.514730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d2a8e4f1c57'
+down_revision: Union[str, Sequence[str], None] = '9b3e5f71a2c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('guard_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(), nullable=False),
+    sa.Column('folder', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('data', sa.LargeBinary(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'UPLOADING', 'DONE', 'FAILED', 'SUPERSEDED', name='uploadstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('url', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['guard_id'], ['guards.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_outbox_id'), 'upload_outbox', ['id'], unique=False)
+    op.create_index(op.f('ix_upload_outbox_guard_id'), 'upload_outbox', ['guard_id'], unique=False)
+    op.create_index('ix_upload_outbox_status_next_attempt_at', 'upload_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_upload_outbox_status_next_attempt_at', table_name='upload_outbox')
+    op.drop_index(op.f('ix_upload_outbox_guard_id'), table_name='upload_outbox')
+    op.drop_index(op.f('ix_upload_outbox_id'), table_name='upload_outbox')
+    op.drop_table('upload_outbox')
+    sa.Enum(name='uploadstatus').drop(op.get_bind(), checkfirst=True)
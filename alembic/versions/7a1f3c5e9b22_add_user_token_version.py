@@ -0,0 +1,28 @@
+"""add user token version
+
+Revision ID: 7a1f3c5e9b22
+Revises: 4c7e2b9a0f18
+Create Date: 2026-10-17 21:04:17.512903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1f3c5e9b22'
+down_revision: Union[str, Sequence[str], None] = '4c7e2b9a0f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
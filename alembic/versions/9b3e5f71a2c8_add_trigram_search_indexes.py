@@ -0,0 +1,52 @@
+"""add trigram search indexes
+
+Revision ID: 9b3e5f71a2c8
+Revises: c41f0d8e6b27
+Create Date: 2026-10-17 14:05:33.618402
+
+GIN gin_trgm_ops indexes let PostgreSQL answer ILIKE '%term%' on guard and
+client names and contact numbers without a sequential scan. Other databases
+are skipped; SQLite uses the in-process index in utils/search.py instead.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e5f71a2c8'
+down_revision: Union[str, Sequence[str], None] = 'c41f0d8e6b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_guards_name_trgm', 'guards', 'name'),
+    ('ix_guards_contact_number_trgm', 'guards', 'contact_number'),
+    ('ix_clients_name_trgm', 'clients', 'name'),
+    ('ix_clients_contact_number_trgm', 'clients', 'contact_number'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name, table, [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
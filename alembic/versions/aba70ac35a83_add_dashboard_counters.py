@@ -0,0 +1,107 @@
+"""add dashboard counters
+
+Revision ID: aba70ac35a83
+Revises: 2a4c9f976fc9
+Create Date: 2026-10-17 09:12:40.118204
+
+The counters are seeded from the existing rows in the same upgrade;
+`python -m utils.counters` rebuilds them later if they ever drift.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aba70ac35a83'
+down_revision: Union[str, Sequence[str], None] = '2a4c9f976fc9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dashboard_counters',
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('guards_active', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('guards_inactive', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('guards_on_leave', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('clients_total', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('assignments_active', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('assignments_on_duty', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('assignments_off_duty', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('inventory_issued', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('inventory_returned', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('inventory_lost', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('salary_records', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('salary_paid', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('salary_pending', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('inventory_issued_in_period', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('period')
+    )
+    seed_counters()
+
+
+def seed_counters() -> None:
+    """Fill dashboard_counters from the current rows, as utils.counters.rebuild_counters does."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        salary_period = "to_char(make_date(year, month, 1), 'YYYY-MM')"
+        issue_period = "to_char(issue_date, 'YYYY-MM')"
+    else:
+        salary_period = "printf('%04d-%02d', year, month)"
+        issue_period = "strftime('%Y-%m', issue_date)"
+    yes = {"yes": True}
+
+    # NULL statuses count as the column defaults (active guard, issued item)
+    op.execute(sa.text("""
+        INSERT INTO dashboard_counters (
+            period, guards_active, guards_inactive, guards_on_leave, clients_total,
+            assignments_active, assignments_on_duty, assignments_off_duty,
+            inventory_issued, inventory_returned, inventory_lost, updated_at
+        )
+        SELECT
+            'all',
+            (SELECT count(*) FROM guards WHERE status = 'ACTIVE' OR status IS NULL),
+            (SELECT count(*) FROM guards WHERE status = 'INACTIVE'),
+            (SELECT count(*) FROM guards WHERE status = 'ON_LEAVE'),
+            (SELECT count(*) FROM clients),
+            (SELECT count(*) FROM duty_assignments WHERE is_active = :yes),
+            (SELECT count(*) FROM duty_assignments WHERE is_active = :yes AND duty_status = 'ON_DUTY'),
+            (SELECT count(*) FROM duty_assignments WHERE is_active = :yes AND duty_status = 'OFF_DUTY'),
+            (SELECT count(*) FROM inventory_records WHERE status = 'ISSUED' OR status IS NULL),
+            (SELECT count(*) FROM inventory_records WHERE status = 'RETURNED'),
+            (SELECT count(*) FROM inventory_records WHERE status = 'LOST'),
+            CURRENT_TIMESTAMP
+    """).bindparams(**yes))
+
+    # One row per month with salaries or issued items
+    op.execute(sa.text(f"""
+        INSERT INTO dashboard_counters (
+            period, salary_records, salary_paid, salary_pending, inventory_issued_in_period, updated_at
+        )
+        SELECT period, sum(records), sum(paid), sum(pending), sum(issued), CURRENT_TIMESTAMP
+        FROM (
+            SELECT
+                {salary_period} AS period,
+                count(*) AS records,
+                coalesce(sum(CASE WHEN is_paid = :yes THEN final_salary ELSE 0 END), 0) AS paid,
+                coalesce(sum(CASE WHEN is_paid = :yes THEN 0 ELSE final_salary END), 0) AS pending,
+                0 AS issued
+            FROM salary_records
+            GROUP BY year, month
+            UNION ALL
+            SELECT {issue_period}, 0, 0, 0, count(*)
+            FROM inventory_records
+            WHERE issue_date IS NOT NULL
+            GROUP BY {issue_period}
+        ) AS periods
+        GROUP BY period
+    """).bindparams(**yes))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('dashboard_counters')
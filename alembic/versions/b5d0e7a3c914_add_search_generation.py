@@ -0,0 +1,28 @@
+"""add search generation
+
+Revision ID: b5d0e7a3c914
+Revises: 7a1f3c5e9b22
+Create Date: 2026-10-17 23:41:09.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d0e7a3c914'
+down_revision: Union[str, Sequence[str], None] = '7a1f3c5e9b22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('dashboard_counters', sa.Column('search_generation', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('dashboard_counters', 'search_generation')
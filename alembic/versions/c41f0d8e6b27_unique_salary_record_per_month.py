@@ -0,0 +1,69 @@
+"""unique salary record per month
+
+Revision ID: c41f0d8e6b27
+Revises: 5e1b7c2d9a40
+Create Date: 2026-10-17 12:40:51.907213
+
+Replaces ix_salary_records_guard_month_year with a unique index so the
+payroll run can skip existing records with ON CONFLICT DO NOTHING. Salary
+rows are never merged automatically: if duplicates exist the upgrade stops
+and lists them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f0d8e6b27'
+down_revision: Union[str, Sequence[str], None] = '5e1b7c2d9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ['guard_contact_number', 'month', 'year']
+OLD_INDEX = 'ix_salary_records_guard_month_year'
+NEW_INDEX = 'uq_salary_records_guard_month_year'
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    duplicates = op.get_bind().execute(sa.text("""
+        SELECT guard_contact_number, month, year, COUNT(*)
+        FROM salary_records
+        GROUP BY guard_contact_number, month, year
+        HAVING COUNT(*) > 1
+    """)).all()
+    if duplicates:
+        raise RuntimeError(
+            "Duplicate salary records must be resolved before upgrading: "
+            + ", ".join(f"{g} {m}/{y} ({n} rows)" for g, m, y, n in duplicates)
+        )
+
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(NEW_INDEX, 'salary_records', COLUMNS, unique=True,
+                            postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(OLD_INDEX, table_name='salary_records',
+                          postgresql_concurrently=True, if_exists=True)
+    else:
+        op.create_index(NEW_INDEX, 'salary_records', COLUMNS, unique=True)
+        op.drop_index(OLD_INDEX, table_name='salary_records')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(OLD_INDEX, 'salary_records', COLUMNS,
+                            postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(NEW_INDEX, table_name='salary_records',
+                          postgresql_concurrently=True, if_exists=True)
+    else:
+        op.create_index(OLD_INDEX, 'salary_records', COLUMNS)
+        op.drop_index(NEW_INDEX, table_name='salary_records')
@@ -0,0 +1,58 @@
+"""add image assets and derivative columns
+
+Revision ID: e83b1f5a9d06
+Revises: 6d2a8e4f1c57
+Create Date: 2026-10-17 17:48:51.203946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83b1f5a9d06'
+down_revision: Union[str, Sequence[str], None] = '6d2a8e4f1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DERIVATIVE_COLUMNS = [
+    'image_thumbnail_url',
+    'image_preview_url',
+    'cnic_front_thumbnail_url',
+    'cnic_front_preview_url',
+    'cnic_back_thumbnail_url',
+    'cnic_back_preview_url',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('image_assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('backend', sa.String(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('thumbnail_url', sa.String(), nullable=True),
+    sa.Column('preview_url', sa.String(), nullable=True),
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('size_bytes', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_image_assets_id'), 'image_assets', ['id'], unique=False)
+    op.create_index('uq_image_assets_sha256_backend', 'image_assets', ['sha256', 'backend'], unique=True)
+    for column in DERIVATIVE_COLUMNS:
+        op.add_column('guards', sa.Column(column, sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in reversed(DERIVATIVE_COLUMNS):
+        op.drop_column('guards', column)
+    op.drop_index('uq_image_assets_sha256_backend', table_name='image_assets')
+    op.drop_index(op.f('ix_image_assets_id'), table_name='image_assets')
+    op.drop_table('image_assets')
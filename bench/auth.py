@@ -0,0 +1,63 @@
+"""Per-request cost of authenticating a bearer token: a naive dependency
+(decode the JWT, then SELECT the user) against get_current_user with warm
+caches, on a throwaway SQLite file.
+
+    python -m bench.auth [requests] [users]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models.auth import User
+from utils import auth
+from utils.auth import get_current_user, auth_stats
+from utils.util import create_access_token, SECRET_KEY, ALGORITHM
+
+requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+user_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "auth_bench.db")
+    bench_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(User.__table__.create)
+        await conn.execute(User.__table__.insert(), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x", "is_active": True}
+            for i in range(1, user_count + 1)
+        ])
+    # load_user reads this module global
+    auth.SessionLocal = SessionLocal = async_sessionmaker(bind=bench_engine)
+    tokens = [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=create_access_token({"sub": str(i), "ver": 0}, timedelta(minutes=5))
+        )
+        for i in range(1, user_count + 1)
+    ]
+
+    async def naive(credentials):
+        claims = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        async with SessionLocal() as db:
+            return await db.get(User, int(claims["sub"]))
+
+    for label, dependency in (("decode + query", naive), ("get_current_user", get_current_user)):
+        for credentials in tokens:
+            await dependency(credentials)  # warm up
+        start = time.perf_counter()
+        for i in range(requests):
+            await dependency(tokens[i % user_count])
+        per_request = (time.perf_counter() - start) / requests * 1e6
+        print(f"{label:>16}: {per_request:8.1f} us per request")
+    print(auth_stats())
+    await bench_engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
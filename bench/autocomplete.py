@@ -0,0 +1,54 @@
+"""Autocomplete prefix index: build time, memory, lookup latency and re-indexing.
+
+    python -m bench.autocomplete [entities] [lookups]
+"""
+import random
+import sys
+import time
+from models.guard import Guard
+from models.client import Client
+from utils.autocomplete import PrefixIndex
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+rng = random.Random(0)
+letters = "abcdefghijklmnopqrstuvwxyz"
+
+
+def word():
+    return "".join(rng.choice(letters) for _ in range(rng.randint(3, 9))).title()
+
+
+def main():
+    objects = []
+    for i in range(count):
+        obj = Guard() if i % 5 else Client()
+        obj.id, obj.name, obj.contact_number = i, f"{word()} {word()}", f"+92 3{i:09d}"
+        if isinstance(obj, Client):
+            obj.company_name = f"{word()} Security"
+        objects.append(obj)
+
+    start = time.perf_counter()
+    index = PrefixIndex.from_objects(objects)
+    print(f"{count} entities, {len(index.keys)} keys built in {time.perf_counter() - start:.2f}s, "
+          f"~{index.memory_bytes() / 2 ** 20:.1f} MiB")
+
+    queries = [rng.choice(objects).name[:rng.randint(1, 5)] for _ in range(lookups)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query, 10)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"lookup p50 {timings[len(timings) // 2] * 1e6:.1f} us  "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us")
+
+    start = time.perf_counter()
+    for obj in objects[:1000]:
+        obj.name = f"{word()} {word()}"
+        index.add(obj)
+    print(f"re-index {1000} entities: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""GET /guard/ with all fields against fields=id,name,status on a throwaway
+SQLite file: query time, serialization time and body size.
+
+    python -m bench.fieldsets [guards]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models.guard import Guard
+from utils.pydantic_model import GuardResponse
+from utils.fieldsets import parse_fields, column_options, list_response
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+rounds = 10
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "fieldsets_bench.db")
+    bench_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Guard.__table__.create)
+        await conn.execute(Guard.__table__.insert(), [
+            {
+                "name": f"Guard {i}",
+                "contact_number": f"03{i:09d}",
+                "address": f"House {i}, Street {i % 90}, Block {i % 12}, Lahore",
+                "image_url": f"https://res.cloudinary.com/demo/image/upload/guards/{i:032x}.jpg",
+                "cnic_front_url": f"https://res.cloudinary.com/demo/image/upload/guards/cnic_front/{i:032x}.jpg",
+                "cnic_back_url": f"https://res.cloudinary.com/demo/image/upload/guards/cnic_back/{i:032x}.jpg",
+            }
+            for i in range(count)
+        ])
+
+    fields = parse_fields("id,name,status", GuardResponse)
+    async with async_sessionmaker(bind=bench_engine)() as db:
+        for label, sparse in (("all fields", False), ("id,name,status", True)):
+            query_times, serialize_times = [], []
+            for _ in range(rounds):
+                db.expunge_all()
+                query = select(Guard)
+                if sparse:
+                    query = query.options(*column_options(Guard, GuardResponse, fields))
+                start = time.perf_counter()
+                guards = (await db.scalars(query)).all()
+                query_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                body = list_response(GuardResponse, fields if sparse else None, guards).body
+                serialize_times.append(time.perf_counter() - start)
+            median = lambda samples: sorted(samples)[rounds // 2] * 1000
+            print(f"{label:>15}: query+hydrate {median(query_times):6.1f} ms  "
+                  f"serialize {median(serialize_times):6.1f} ms  body {len(body) / 1024:7.0f} KiB")
+    await bench_engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""Image derivatives of synthetic photos, rendered inline and through the
+process pool, and the bytes a list view would download.
+
+    python -m bench.images [images] [width] [height]
+"""
+import asyncio
+import io
+import sys
+import time
+from PIL import Image
+from utils.images import ImagePipeline, make_derivatives
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+width = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+height = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+
+
+def photo(seed: int) -> bytes:
+    # Noise compresses like a real photo does, unlike a flat colour
+    noise = Image.effect_noise((width // 4, height // 4), 40 + seed % 20).convert("RGB")
+    out = io.BytesIO()
+    noise.resize((width, height)).save(out, "JPEG", quality=92)
+    return out.getvalue()
+
+
+async def main():
+    photos = [photo(i) for i in range(count)]
+    start = time.perf_counter()
+    inline = [make_derivatives(data) for data in photos]
+    inline_seconds = time.perf_counter() - start
+
+    pipeline = ImagePipeline()
+    await pipeline.derivatives(photos[0])  # start the workers
+    start = time.perf_counter()
+    await asyncio.gather(*(pipeline.derivatives(data) for data in photos))
+    pool_seconds = time.perf_counter() - start
+    pipeline.shutdown()
+
+    average = lambda sizes: sum(sizes) / len(sizes) / 1024
+    print(f"{count} photos of {width}x{height}")
+    print(f"inline: {count / inline_seconds:.1f} images/s; process pool ({pipeline.workers} workers): "
+          f"{count / pool_seconds:.1f} images/s")
+    print(f"original {average([len(d) for d in photos]):.0f} KiB, "
+          f"preview {average([len(d['preview']) for d in inline]):.0f} KiB, "
+          f"thumbnail {average([len(d['thumbnail']) for d in inline]):.1f} KiB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
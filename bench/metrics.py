@@ -0,0 +1,74 @@
+"""Per-request overhead of MetricsMiddleware in front of an empty ASGI app,
+per-query overhead of the engine timing hooks on SQLite, and the cost of
+rendering /metrics with a realistic number of series.
+
+    python -m bench.metrics [requests] [queries]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from config.database import instrument
+from utils.metrics import MetricsMiddleware, requests_total, request_duration
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+routes = [SimpleNamespace(path=f"/route{i}/{{item_id}}") for i in range(40)]
+
+
+async def empty_app(scope, receive, send):
+    scope["route"] = routes[hash(scope["path"]) % len(routes)]
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request"}
+
+
+async def send(message):
+    pass
+
+
+async def per_request_us(app) -> float:
+    scopes = [{"type": "http", "method": "GET", "path": f"/item/{i % 400}", "headers": []} for i in range(count)]
+    start = time.perf_counter()
+    for scope in scopes:
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+async def per_query_us(instrumented: bool) -> float:
+    bench_engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/metrics_bench.db")
+    if instrumented:
+        instrument(bench_engine.sync_engine)
+    async with bench_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        start = time.perf_counter()
+        for _ in range(query_count):
+            await conn.execute(text("SELECT 1"))
+        elapsed = time.perf_counter() - start
+    await bench_engine.dispose()
+    return elapsed / query_count * 1e6
+
+
+async def main():
+    baseline = await per_request_us(empty_app)
+    instrumented = await per_request_us(MetricsMiddleware(empty_app))
+    print(f"middleware: +{instrumented - baseline:.2f} us per request ({count} requests, {len(routes)} routes)")
+    # aiosqlite hops threads per query, which is noisy: best of alternating rounds
+    plain = timed = float("inf")
+    for _ in range(5):
+        plain = min(plain, await per_query_us(False))
+        timed = min(timed, await per_query_us(True))
+    print(f"engine hooks: +{timed - plain:.2f} us per query ({plain:.1f} -> {timed:.1f} us for SELECT 1)")
+    start = time.perf_counter()
+    body = "\n".join(line for metric in (requests_total, request_duration) for line in metric.render())
+    print(f"render: {(time.perf_counter() - start) * 1000:.2f} ms for {body.count(chr(10)) + 1} lines")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""Page `page` of GET /guard/ by offset and by cursor, for id and name
+order, on a throwaway SQLite file.
+
+    python -m bench.pagination [guards] [page] [page_size]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models.guard import Guard
+from utils.pagination import paginate, NEXT_CURSOR_HEADER
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+page = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+page_size = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+rounds = 20
+rng = random.Random(0)
+letters = "abcdefghijklmnopqrstuvwxyz"
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "pagination_bench.db")
+    bench_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Guard.__table__.create)
+        await conn.execute(Guard.__table__.insert(), [
+            {"name": "".join(rng.choice(letters) for _ in range(10)), "contact_number": f"03{i:09d}"}
+            for i in range(count)
+        ])
+
+    orders = {"id": [(Guard.id, False)], "name": [(Guard.name, False), (Guard.id, False)]}
+    async with async_sessionmaker(bind=bench_engine)() as db:
+        print(f"{count} guards, page {page} of {page_size} rows")
+        for order, keys in orders.items():
+            # The cursor of the previous page, as a client walking the pages would hold it
+            response = Response()
+            await paginate(db, select(Guard), response, keys, order, page_size, skip=(page - 2) * page_size)
+            cursor = response.headers[NEXT_CURSOR_HEADER]
+
+            timings = {"offset": [], "cursor": []}
+            for _ in range(rounds):
+                for mode in timings:
+                    start = time.perf_counter()
+                    if mode == "offset":
+                        rows = await paginate(db, select(Guard), Response(), keys, order, page_size,
+                                              skip=(page - 1) * page_size)
+                    else:
+                        rows = await paginate(db, select(Guard), Response(), keys, order, page_size,
+                                              cursor=cursor)
+                    timings[mode].append(time.perf_counter() - start)
+                assert len(rows) == page_size
+            summary = "  ".join(
+                f"{mode} median {sorted(samples)[rounds // 2] * 1000:6.1f} ms"
+                for mode, samples in timings.items()
+            )
+            print(f"order by {order:>4}: {summary}")
+    await bench_engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
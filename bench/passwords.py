@@ -0,0 +1,60 @@
+"""Login storm: a burst of concurrent logins while another task plays a
+non-auth endpoint, waking every 10 ms, and how late it wakes. With bcrypt
+run inline every login stalls it; through the pool it stays flat.
+
+    python -m bench.passwords [logins] [rounds]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from utils.util import hash_password, verify_password
+from utils.passwords import PasswordHasher, BCRYPT_ROUNDS
+
+logins = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+rounds = int(sys.argv[2]) if len(sys.argv) > 2 else BCRYPT_ROUNDS
+hashed_password = hash_password("correct horse battery staple", rounds)
+
+
+async def other_endpoint(done: asyncio.Event) -> list:
+    delays = []
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        delays.append((time.perf_counter() - start - 0.01) * 1000)
+    return delays
+
+
+async def storm(login) -> tuple:
+    done = asyncio.Event()
+    probe = asyncio.create_task(other_endpoint(done))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    return elapsed, await probe
+
+
+async def inline_login():
+    verify_password("correct horse battery staple", hashed_password)
+
+
+async def main():
+    hasher = PasswordHasher(rounds=rounds, max_queue=logins)
+
+    async def pooled_login():
+        await hasher.verify("correct horse battery staple", hashed_password)
+
+    print(f"{logins} concurrent logins at cost {rounds}, {hasher.workers} password threads")
+    for label, login in (("inline", inline_login), ("thread pool", pooled_login)):
+        elapsed, delays = await storm(login)
+        delays.sort()
+        print(f"{label:>11}: logins done in {elapsed:5.2f} s; other endpoint latency "
+              f"p50 {statistics.median(delays):6.1f} ms  p99 {delays[int(len(delays) * 0.99)]:6.1f} ms  "
+              f"max {delays[-1]:6.1f} ms")
+    print(hasher.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""Vectorized payroll simulation on synthetic guards.
+
+    python -m bench.payroll_simulation [guards] [months]
+
+Also cross-checks the first thousand guards against utils.payroll's
+per-guard calculate_salary, which the API uses for single records.
+"""
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+from utils.payroll import calculate_salary
+from utils.payroll_simulation import PayrollArrays, simulate_payroll, simulation_summary
+
+
+def synthetic_guards(count: int, seed: int = 0) -> PayrollArrays:
+    rng = np.random.default_rng(seed)
+    uniform_cost = rng.choice([0.0, 2000.0, 4000.0], size=count)
+    return PayrollArrays(
+        contact_numbers=[f"sim-{i}" for i in range(count)],
+        current_salary=rng.uniform(15000, 60000, size=count).round(),
+        uniform_cost=uniform_cost,
+        uniform_deducted_amount=(uniform_cost * rng.uniform(0, 1, size=count)).round(),
+        monthly_deduction=rng.choice([0.0, 300.0, 500.0, 1000.0], size=count),
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    guards = synthetic_guards(count)
+
+    start = time.perf_counter()
+    result = simulate_payroll(guards, months=months, salary_increase_pct=8, monthly_deduction=300)
+    elapsed = time.perf_counter() - start
+    print(f"simulated {count} guards x {months} months in {elapsed * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    simulation_summary(guards, result, 1, datetime.utcnow().year, include_guards=False)
+    print(f"summarized totals in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for i in range(min(count, 1000)):
+        guard = SimpleNamespace(
+            current_salary=guards.current_salary[i] * 1.08,
+            uniform_cost=guards.uniform_cost[i],
+            uniform_deducted_amount=guards.uniform_deducted_amount[i],
+            monthly_deduction=300.0,
+        )
+        for month in range(months):
+            uniform_deduction, final_salary = calculate_salary(guard)
+            guard.uniform_deducted_amount += uniform_deduction
+            assert final_salary == result["final_salary"][month, i], (i, month)
+            assert uniform_deduction == result["uniform_deduction"][month, i], (i, month)
+    print("matches calculate_salary on the first", min(count, 1000), "guards")
+
+
+if __name__ == "__main__":
+    main()
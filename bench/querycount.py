@@ -0,0 +1,43 @@
+"""Cost of the per-request query check for a typical request and for an
+N+1 loop of `queries` statements plus IN lists of varying length, which
+must all collapse to one shape.
+
+    python -m bench.querycount [requests] [queries]
+"""
+import sys
+import time
+from config.database import QueryStats
+from utils.querycount import check_queries
+
+requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+loop_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+
+def stats_for(statements: list) -> QueryStats:
+    stats = QueryStats()
+    for statement in statements:
+        stats.count += 1
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+    return stats
+
+
+def main():
+    typical = stats_for([
+        "SELECT users.id, users.email FROM users WHERE users.id = ?",
+        "SELECT guards.id, guards.name FROM guards ORDER BY guards.id LIMIT ? OFFSET ?",
+        "SELECT count(*) AS count_1 FROM guards",
+    ])
+    loop = stats_for(
+        ["SELECT guards.id, guards.name FROM guards WHERE guards.id = ?"] * loop_queries
+        + [f"SELECT clients.name FROM clients WHERE clients.id IN ({', '.join('?' * (i % 7 + 1))})" for i in range(10)]
+    )
+    for label, stats in (("typical request", typical), (f"{loop.count}-query loop", loop)):
+        start = time.perf_counter()
+        for _ in range(requests):
+            check_queries("GET", "/guard/", stats)
+        per_request = (time.perf_counter() - start) / requests * 1e6
+        print(f"{label:>16}: {per_request:.2f} us per request  {check_queries('GET', '/guard/', stats)[0]}")
+
+
+if __name__ == "__main__":
+    main()
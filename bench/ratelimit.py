@@ -0,0 +1,67 @@
+"""Per-request overhead of RateLimitMiddleware in front of an empty ASGI
+app, for anonymous writes keyed by address, authenticated writes keyed by
+user and unthrottled reads, plus key churn forcing LRU evictions.
+
+    python -m bench.ratelimit [requests] [clients]
+"""
+import asyncio
+import sys
+import time
+from datetime import timedelta
+from utils.util import create_access_token
+from utils.ratelimit import RateLimiter, RateLimitMiddleware, MemoryRateLimitBackend, RATE_LIMIT_MAX_KEYS
+
+requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+clients = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+
+async def empty_app(scope, receive, send):
+    pass
+
+
+async def receive():
+    return {"type": "http.request"}
+
+
+async def send(message):
+    pass
+
+
+tokens = [create_access_token({"sub": str(i), "ver": 0}, timedelta(minutes=5)) for i in range(clients)]
+
+
+def scope(i: int, method: str = "POST", authenticated: bool = False) -> dict:
+    client = i % clients
+    headers = [(b"authorization", f"Bearer {tokens[client]}".encode())] if authenticated else []
+    return {"type": "http", "method": method, "path": "/guard/", "headers": headers,
+            "client": (f"10.0.{client // 256}.{client % 256}", 50000)}
+
+
+async def per_request_us(app, scopes) -> float:
+    start = time.perf_counter()
+    for s in scopes:
+        await app(s, receive, send)
+    return (time.perf_counter() - start) / len(scopes) * 1e6
+
+
+async def main():
+    # Limits high enough that nothing is rejected: this measures bookkeeping, not 429s
+    limits = {"auth": (1e9, 1e9), "write": (1e9, 1e9)}
+    cases = [
+        ("anonymous write", [scope(i) for i in range(requests)], RATE_LIMIT_MAX_KEYS),
+        ("authenticated write", [scope(i, authenticated=True) for i in range(requests)], RATE_LIMIT_MAX_KEYS),
+        ("read (not limited)", [scope(i, method="GET") for i in range(requests)], RATE_LIMIT_MAX_KEYS),
+        ("key churn, evicting", [scope(i) for i in range(requests)], clients // 2),
+    ]
+    baseline = await per_request_us(empty_app, cases[0][1])
+    print(f"{requests} requests from {clients} clients; empty app alone {baseline:.2f} us per request")
+    for label, scopes, max_keys in cases:
+        limiter = RateLimiter(MemoryRateLimitBackend(max_keys=max_keys), limits)
+        app = RateLimitMiddleware(empty_app, limiter)
+        await per_request_us(app, scopes[:clients])  # warm the token cache
+        overhead = await per_request_us(app, scopes) - baseline
+        print(f"{label:>20}: +{overhead:5.2f} us per request  {limiter.backend.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
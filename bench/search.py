@@ -0,0 +1,84 @@
+"""Guard name search: the old unranked ILIKE scan, a ranked ILIKE scan and
+the ranked n-gram path, on a throwaway SQLite file.
+
+    python -m bench.search [guards] [queries]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models.guard import Guard
+from models.client import Client
+from models.dashboardcounter import DashboardCounter
+from utils.search import search_indexes, relevance, text_match
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+rng = random.Random(0)
+letters = "abcdefghijklmnopqrstuvwxyz"
+first_names = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 8))).title() for _ in range(2000)]
+last_names = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))).title() for _ in range(5000)]
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+
+async def timed(db, query):
+    start = time.perf_counter()
+    (await db.execute(query)).all()
+    return time.perf_counter() - start
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "search_bench.db")
+    bench_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Guard.__table__.create)
+        await conn.run_sync(Client.__table__.create)
+        await conn.run_sync(DashboardCounter.__table__.create)
+        await conn.execute(Guard.__table__.insert(), [
+            {"name": f"{rng.choice(first_names)} {rng.choice(last_names)}", "contact_number": f"03{i:09d}"}
+            for i in range(count)
+        ])
+
+    # Mix of common (first name) and selective (last name) terms of 3-6 characters
+    terms = [
+        (rng.choice(first_names) if i % 2 else rng.choice(last_names))[:rng.randint(3, 6)]
+        for i in range(queries)
+    ]
+    timings = {"ilike, unranked (old)": [], "ilike, ranked": [], "n-gram, ranked": []}
+
+    async with async_sessionmaker(bind=bench_engine)() as db:
+        start = time.perf_counter()
+        await search_indexes.ensure_loaded(db)
+        print(f"{count} guards, n-gram index built in {time.perf_counter() - start:.1f}s")
+
+        for term in terms:
+            ranked = (relevance(db, term, Guard.name).desc(), Guard.id)
+            timings["ilike, unranked (old)"].append(await timed(db, select(Guard.id).where(
+                Guard.name.ilike(f"%{term}%")
+            ).limit(50)))
+            timings["ilike, ranked"].append(await timed(db, select(Guard.id).where(
+                Guard.name.ilike(f"%{term}%")
+            ).order_by(*ranked).limit(50)))
+            start = time.perf_counter()
+            condition = await text_match(db, term, Guard.name)
+            elapsed = time.perf_counter() - start
+            timings["n-gram, ranked"].append(elapsed + await timed(db, select(Guard.id).where(
+                condition
+            ).order_by(*ranked).limit(50)))
+
+    for label, samples in timings.items():
+        print(f"{label:>22}: p50 {percentile(samples, 0.5):7.1f} ms  p95 {percentile(samples, 0.95):7.1f} ms")
+    await bench_engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
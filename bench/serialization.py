@@ -0,0 +1,147 @@
+"""Serialization cost per 1k rows of each list response model, by path:
+
+- fastapi: response_model validation, dump to dicts and json.dumps (the old default)
+- orjson: the same validation with orjson encoding (ORJSONResponse)
+- orm: to_json on hydrated ORM objects
+- rows: to_json on plain result rows, without ORM hydration
+
+"load" is the query itself, as entities and as rows, on a throwaway SQLite file.
+
+    python -m bench.serialization [rows]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models.base import Base
+from models.guard import Guard
+from models.client import Client
+from models.dutyassignment import DutyAssignment
+from models.salaryrecord import SalaryRecord
+from models.inventoryrecord import InventoryRecord
+from utils import pydantic_model as schemas
+from utils.serialization import to_json, type_adapter
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+rounds = 10
+now = datetime(2025, 1, 1)
+
+
+def guard(i):
+    return {
+        "name": f"Guard {i}", "contact_number": f"03{i:09d}", "address": f"House {i}, Street {i % 90}, Lahore",
+        "cnic": f"35202-{i:07d}-1", "current_salary": 30000.0 + i,
+        "image_url": f"https://res.cloudinary.com/demo/image/upload/guards/{i:032x}.jpg",
+        "cnic_front_url": f"https://res.cloudinary.com/demo/image/upload/guards/cnic_front/{i:032x}.jpg",
+        "cnic_back_url": f"https://res.cloudinary.com/demo/image/upload/guards/cnic_back/{i:032x}.jpg",
+    }
+
+fixtures = {
+    Guard: guard,
+    Client: lambda i: {
+        "name": f"Client {i}", "contact_person": f"Manager {i}", "contact_number": f"04{i:09d}",
+        "address": f"Plaza {i}, Gulberg, Lahore", "company_name": f"Company {i}", "contract_rate": 35000.0,
+    },
+    DutyAssignment: lambda i: {
+        "guard_contact_number": f"03{i:09d}", "client_contact_number": f"04{i:09d}", "name": f"Guard {i}",
+        "company_name": f"Company {i}", "start_date": now + timedelta(days=i % 365), "shift_type": "day",
+    },
+    SalaryRecord: lambda i: {
+        "guard_contact_number": f"03{i:09d}", "month": i % 12 + 1, "year": 2020 + i // 12, "deductions": 500.0,
+        "uniform_deduction": 1000.0, "bonus": 0.0, "final_salary": 28500.0, "notes": "Paid in cash",
+    },
+    InventoryRecord: lambda i: {
+        "guard_contact_number": f"03{i:09d}", "item_name": "Uniform", "item_type": "uniform",
+        "issue_date": now + timedelta(days=i % 365), "cost": 4000.0,
+    },
+}
+cases = [
+    (Guard, schemas.GuardResponse),
+    (Client, schemas.ClientResponse),
+    (DutyAssignment, schemas.DutyAssignmentResponse),
+    (SalaryRecord, schemas.SalaryRecordResponse),
+    (InventoryRecord, schemas.InventoryRecordResponse),
+]
+
+
+def median_ms(func) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[rounds // 2] * 1000 * 1000 / count
+
+
+async def median_async_ms(func) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[rounds // 2] * 1000 * 1000 / count
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "serialization_bench.db")
+    bench_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for entity, fixture in fixtures.items():
+            await conn.execute(entity.__table__.insert(), [fixture(i) for i in range(count)])
+
+    print(f"ms per 1k rows ({count} rows, median of {rounds})")
+    print(f"{'model':>24} {'load orm':>9} {'load rows':>9} {'fastapi':>8} {'orjson':>8} {'orm':>8} {'rows':>8}")
+    async with async_sessionmaker(bind=bench_engine)() as db:
+        for entity, model in cases:
+            tp = List[model]
+            nested = entity is InventoryRecord
+            entity_query = select(entity).options(joinedload(entity.guard)) if nested else select(entity)
+            columns = [getattr(entity, name) for name in model.model_fields if name in entity.__table__.c]
+
+            async def load_entities():
+                db.expunge_all()
+                return (await db.scalars(entity_query)).all()
+
+            async def load_rows():
+                return (await db.execute(select(*columns))).all()
+
+            objects = await load_entities()
+            rows = None if nested else await load_rows()
+            field = type_adapter(tp)
+
+            def fastapi_path():
+                value = field.validate_python(objects, from_attributes=True)
+                return json.dumps(field.dump_python(value, mode="json")).encode()
+
+            def orjson_path():
+                return orjson.dumps(field.dump_python(field.validate_python(objects, from_attributes=True)))
+
+            assert json.loads(fastapi_path()) == json.loads(to_json(tp, objects))
+            if rows is not None:
+                assert json.loads(to_json(tp, rows)) == json.loads(to_json(tp, objects))
+            results = [
+                await median_async_ms(load_entities),
+                await median_async_ms(load_rows) if rows is not None else None,
+                median_ms(fastapi_path),
+                median_ms(orjson_path),
+                median_ms(lambda: to_json(tp, objects)),
+                median_ms(lambda: to_json(tp, rows)) if rows is not None else None,
+            ]
+            print(f"{model.__name__:>24} " + " ".join(
+                f"{'-':>9}" if r is None else f"{r:9.2f}" for r in results[:2]
+            ) + " " + " ".join(f"{'-':>8}" if r is None else f"{r:8.2f}" for r in results[2:]))
+    await bench_engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
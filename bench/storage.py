@@ -0,0 +1,128 @@
+"""Guard image storage, each mode on a throwaway directory.
+
+    python -m bench.storage create [delay_seconds] [concurrent_requests]
+
+POST /guard/ latency, then the upload outbox draining against a fake
+uploader that sleeps `delay` per image.
+
+    python -m bench.storage local [files] [file_kib]
+
+Local backend upload throughput, then /media full and range GET throughput.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+workdir = tempfile.mkdtemp()
+# Read at import by config.database, utils.util, utils.storage and utils.ratelimit
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{workdir}/storage_bench.db",
+    "SECRET_KEY": "storage-bench-secret-key-long-enough-for-hs256",
+    "ALGORITHM": "HS256",
+    "STORAGE_BACKEND": "fake",
+    "RATE_LIMIT_BACKEND": "none",
+})
+
+import httpx
+import models  # noqa: F401  registers every table on Base.metadata
+from main import app
+from config.database import engine, SessionLocal
+from models.base import Base
+from utils.storage import storage, FakeStorage, LocalStorage
+from utils.upload_outbox import upload_worker, outbox_counts
+
+
+@asynccontextmanager
+async def logged_in_client():
+    """An in-process client of the app, with the tables created and a user logged in."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        credentials = {"email": "bench@example.com", "password": "bench password"}
+        (await client.post("/auth/register", json={"username": "bench", **credentials})).raise_for_status()
+        token = (await client.post("/auth/login", json=credentials)).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        yield client
+
+
+async def bench_create(delay: float, requests: int):
+    async def create(client, i):
+        files = {
+            name: (f"{name}.jpg", b"\xff\xd8fake", "image/jpeg")
+            for name in ("image", "cnic_front_image", "cnic_back_image")
+        }
+        start = time.perf_counter()
+        response = await client.post("/guard/", data={"name": f"Guard {i}", "contact_number": f"bench-{i}"}, files=files)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    storage.backend = FakeStorage(delay=delay)
+    async with logged_in_client() as client:
+        single = await create(client, 0)
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(create(client, i) for i in range(1, requests + 1)))
+        wall = time.perf_counter() - start
+
+    # Creates only queue the images; time the upload worker draining them
+    start = time.perf_counter()
+    upload_worker.start(SessionLocal)
+    while True:
+        async with SessionLocal() as db:
+            counts = await outbox_counts(db)
+        if set(counts) <= {"done", "failed"}:
+            break
+        await asyncio.sleep(0.05)
+    drain = time.perf_counter() - start
+    await upload_worker.stop()
+
+    print(f"uploader delay {delay:.2f}s per image, 3 images per guard")
+    print(f"single create: {single:.3f}s (uploading inline would take {3 * delay:.2f}s sequentially)")
+    print(f"{requests} concurrent creates: wall {wall:.3f}s, max latency {max(latencies):.3f}s")
+    print(f"outbox drained {counts} in {drain:.2f}s with {upload_worker.concurrency} upload workers")
+
+
+async def bench_local(files: int, file_kib: int):
+    storage.backend = LocalStorage(root=os.path.join(workdir, "media"))
+    payload = os.urandom(file_kib * 1024)
+    total_mib = files * file_kib / 1024
+
+    start = time.perf_counter()
+    urls = []
+    for i in range(0, files, 64):
+        urls += await asyncio.gather(*(
+            storage.upload_bytes(payload, "guards", "bench.jpg") for _ in range(min(64, files - i))
+        ))
+    elapsed = time.perf_counter() - start
+    print(f"upload: {files} x {file_kib} KiB in {elapsed:.2f}s, "
+          f"{files / elapsed:.0f} files/s, {total_mib / elapsed:.0f} MiB/s")
+
+    # In-process ASGI client: measures the route and FileResponse, not the network
+    async with logged_in_client() as client:
+        for label, headers, expected, size in (
+            ("full GET", {}, 200, len(payload)),
+            ("range GET (first 64 KiB)", {"Range": "bytes=0-65535"}, 206, min(65536, len(payload))),
+        ):
+            start = time.perf_counter()
+            for i in range(0, files, 32):
+                responses = await asyncio.gather(*(client.get(url, headers=headers) for url in urls[i:i + 32]))
+                for response in responses:
+                    assert response.status_code == expected and len(response.content) == size, response.status_code
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {files / elapsed:.0f} req/s, {files * size / 2 ** 20 / elapsed:.0f} MiB/s")
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "create"
+    if mode == "local":
+        asyncio.run(bench_local(
+            int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 256
+        ))
+    else:
+        asyncio.run(bench_create(
+            float(sys.argv[2]) if len(sys.argv) > 2 else 0.5,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 10
+        ))
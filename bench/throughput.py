@@ -0,0 +1,105 @@
+"""Request throughput of the async data path against the blocking one it replaced.
+
+    python -m bench.throughput [requests] [concurrency] [latency_ms]
+
+Serves `requests` guard-list queries, `concurrency` at a time, from a
+throwaway SQLite file. Every request also sleeps `latency_ms` inside the
+driver, standing in for the network round trip to PostgreSQL. "blocking"
+runs the query on a sync Session inside the coroutine, as the handlers
+did before the move to AsyncSession, so each wait stalls the event loop;
+"async" awaits it on an AsyncSession and overlaps the waits.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, event, select, func
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models.guard import Guard
+
+requests = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+guards = 2000
+page_size = 50
+
+
+def add_latency(engine):
+    @event.listens_for(engine, "connect")
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("latency", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+# Run ahead of each page query on the same connection
+round_trip = select(func.latency(latency_ms))
+
+
+def page_query(offset: int):
+    return (
+        select(Guard.id, Guard.name, Guard.contact_number)
+        .order_by(Guard.id)
+        .offset(offset)
+        .limit(page_size)
+    )
+
+
+async def run(label: str, handle) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def request(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            rows = await handle(i * page_size % guards)
+            latencies.append(time.perf_counter() - start)
+            assert len(rows) == page_size
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{label:>8}: {requests / elapsed:7.0f} req/s  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.1f} ms"
+    )
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "throughput_bench.db")
+    sync_engine = create_engine(f"sqlite:///{path}", pool_size=concurrency)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=concurrency)
+    add_latency(sync_engine)
+    add_latency(async_engine.sync_engine)
+
+    Guard.__table__.create(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(Guard.__table__.insert(), [
+            {"name": f"Guard {i}", "contact_number": f"03{i:09d}"} for i in range(guards)
+        ])
+
+    async def blocking(offset: int):
+        with Session(sync_engine) as db:
+            db.execute(round_trip)
+            return db.execute(page_query(offset)).all()
+
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine)
+
+    async def non_blocking(offset: int):
+        async with AsyncSessionLocal() as db:
+            await db.execute(round_trip)
+            return (await db.execute(page_query(offset))).all()
+
+    print(f"{requests} requests, {concurrency} concurrent, {latency_ms:g} ms round trip per request")
+    await run("blocking", blocking)
+    await run("async", non_blocking)
+
+    await async_engine.dispose()
+    sync_engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,173 @@
 from dotenv import load_dotenv
+from collections import deque
+from contextvars import ContextVar
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 load_dotenv()  # Load from .env file
 
-DATABASE_URL = os.getenv("DATABASE_URL")    
+DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set.")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def to_async_url(url: str):
+    """Point a sync DATABASE_URL at the matching async driver.
+
+    postgresql:// (psycopg2) becomes postgresql+asyncpg:// and sqlite://
+    becomes sqlite+aiosqlite://. asyncpg doesn't understand libpq's
+    sslmode/channel_binding query args, so sslmode is passed on as ssl.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in ("postgresql", "postgres"):
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode and "ssl" not in query:
+            query["ssl"] = sslmode
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+class PoolMetrics:
+    """Checkout wait times, shared by every pool the engine creates."""
+
+    def __init__(self, window: int = 1024):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.recent_waits = deque(maxlen=window)
+
+    def record(self, waited: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.timeouts += timed_out
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.recent_waits.append(waited)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent_waits)
+
+        def percentile(q):
+            return recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+
+        return {
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.timeouts,
+            "checkout_wait_seconds_total": self.wait_seconds_total,
+            "checkout_wait_seconds_max": self.wait_seconds_max,
+            "checkout_wait_seconds_p50": percentile(0.50),
+            "checkout_wait_seconds_p95": percentile(0.95),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times how long each checkout waits."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+class QueryStats:
+    """Number of queries and seconds spent in them, for one request or overall.
+
+    Per request, `statements` also counts each SQL text run, which is what
+    utils.querycount looks at to spot N+1 loops.
+    """
+
+    __slots__ = ("count", "seconds", "max_seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.statements = {}
+
+
+query_metrics = QueryStats()
+# Stats of the request being handled; set by utils.metrics.MetricsMiddleware.
+# Queries made outside a request (background workers) only count towards query_metrics.
+request_queries: ContextVar = ContextVar("request_queries", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    query_metrics.count += 1
+    query_metrics.seconds += elapsed
+    query_metrics.max_seconds = max(query_metrics.max_seconds, elapsed)
+    stats = request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def instrument(sync_engine):
+    """Time every statement run through `sync_engine` (an AsyncEngine's .sync_engine)."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _pool_options(url) -> dict:
+    # In-memory SQLite needs its StaticPool; everything else gets a sized queue pool
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def pool_status() -> dict:
+    pool = engine.sync_engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    status.update(pool_metrics.snapshot())
+    return status
+
+
+_async_url = to_async_url(DATABASE_URL)
+engine = create_async_engine(_async_url, **_pool_options(_async_url))
+instrument(engine.sync_engine)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
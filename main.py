@@ -3,16 +3,48 @@ from rout.dashboard_routs import stat
 from rout.duty_assignments_routs import dutyassignment
 from rout.guard_routs import guard
 from rout.inventory_routs import inventory_record
+from rout.media_routs import media
+from rout.metrics_routs import metrics
 from rout.reports_routs import report
 from rout.salary_routs import salaryrecord
 from rout.search_routs import search
 from rout.user_routs import auth
+from config.database import SessionLocal
+from utils.autocomplete import autocomplete_index
+from utils.upload_outbox import upload_worker
+from utils.images import image_pipeline
+from utils.auth import get_current_user
+from utils.ratelimit import RateLimitMiddleware
+from utils.metrics import MetricsMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
-app=FastAPI()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        async with SessionLocal() as db:
+            await autocomplete_index.build(db)
+    except Exception as e:
+        print(f"Error building autocomplete index: {e}")
+    refresher = asyncio.create_task(autocomplete_index.refresh_forever(SessionLocal))
+    upload_worker.start(SessionLocal)
+    yield
+    refresher.cancel()
+    await upload_worker.stop()
+    image_pipeline.shutdown()
+
+
+# orjson encodes the response_model output of every route several times faster than json.dumps;
+# the list endpoints go further and return bytes serialized by utils.serialization
+app=FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Added before CORS so CORS wraps it and browsers can read the 429s
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8080"],  # your frontend origin
@@ -20,16 +52,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so rate-limited and CORS-rejected requests are counted too
+app.add_middleware(MetricsMiddleware)
+
 
+# Everything but login/registration and /metrics (METRICS_TOKEN, for scrapers)
+# needs a user token. That includes the media files: their names are content
+# hashes, which anyone holding the same image can compute, so clients fetch
+# them with the token and display the blob rather than linking <img> tags
+authenticated = [Depends(get_current_user)]
 
-app.include_router(client, prefix="/client", tags=["Client"])
-app.include_router(stat, prefix="/stat", tags=["stat"])
-app.include_router(dutyassignment, prefix="/dutyassignment", tags=["Duty Assignments"])
-app.include_router(guard, prefix="/guard", tags=["Guard"])
-app.include_router(inventory_record, prefix="/inventory", tags=["Inventory"])
-app.include_router(report, prefix="/reports", tags=["Reports"])
-app.include_router(salaryrecord, prefix="/salaryrecord", tags=["Salaryrecord"])
-app.include_router(search, prefix="/search", tags=["Search"])
+app.include_router(client, prefix="/client", tags=["Client"], dependencies=authenticated)
+app.include_router(stat, prefix="/stat", tags=["stat"], dependencies=authenticated)
+app.include_router(dutyassignment, prefix="/dutyassignment", tags=["Duty Assignments"], dependencies=authenticated)
+app.include_router(guard, prefix="/guard", tags=["Guard"], dependencies=authenticated)
+app.include_router(inventory_record, prefix="/inventory", tags=["Inventory"], dependencies=authenticated)
+app.include_router(media, prefix="/media", tags=["Media"], dependencies=authenticated)
+app.include_router(metrics, tags=["Metrics"])
+app.include_router(report, prefix="/reports", tags=["Reports"], dependencies=authenticated)
+app.include_router(salaryrecord, prefix="/salaryrecord", tags=["Salaryrecord"], dependencies=authenticated)
+app.include_router(search, prefix="/search", tags=["Search"], dependencies=authenticated)
 app.include_router(auth, prefix="/auth", tags=["Authentication"])
 
 if __name__ == "__main__":
@@ -4,4 +4,6 @@ from models.dutyassignment import DutyAssignment
 from models.salaryrecord import SalaryRecord
 from models.inventoryrecord import InventoryRecord
 from models.auth import User
-
+from models.dashboardcounter import DashboardCounter
+from models.uploadoutbox import UploadOutbox
+from models.imageasset import ImageAsset
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from models.base import Base
@@ -8,6 +8,15 @@ from models.base import Base
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Keyset pagination by name
+        Index("ix_clients_name_id", "name", "id"),
+        # Trigram indexes serving ILIKE '%term%' searches (PostgreSQL with pg_trgm)
+        Index("ix_clients_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_clients_contact_number_trgm", "contact_number", postgresql_using="gin",
+              postgresql_ops={"contact_number": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime
+from models.base import Base
+
+
+class DashboardCounter(Base):
+    __tablename__ = "dashboard_counters"
+
+    # "all" for the global row, "YYYY-MM" for per-month rows
+    period = Column(String, primary_key=True)
+
+    # Global counters
+    guards_active = Column(Integer, nullable=False, default=0, server_default="0")
+    guards_inactive = Column(Integer, nullable=False, default=0, server_default="0")
+    guards_on_leave = Column(Integer, nullable=False, default=0, server_default="0")
+    clients_total = Column(Integer, nullable=False, default=0, server_default="0")
+    assignments_active = Column(Integer, nullable=False, default=0, server_default="0")
+    assignments_on_duty = Column(Integer, nullable=False, default=0, server_default="0")
+    assignments_off_duty = Column(Integer, nullable=False, default=0, server_default="0")
+    inventory_issued = Column(Integer, nullable=False, default=0, server_default="0")
+    inventory_returned = Column(Integer, nullable=False, default=0, server_default="0")
+    inventory_lost = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Per-month counters
+    salary_records = Column(Integer, nullable=False, default=0, server_default="0")
+    salary_paid = Column(Float, nullable=False, default=0.0, server_default="0")
+    salary_pending = Column(Float, nullable=False, default=0.0, server_default="0")
+    inventory_issued_in_period = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Not a count: bumped on the global row by every guard or client write the
+    # SQLite search indexes reflect, so workers can tell theirs is out of date
+    search_generation = Column(Integer, nullable=False, default=0, server_default="0")
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
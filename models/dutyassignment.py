@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship, foreign
 from datetime import datetime
 from models.base import Base
@@ -11,6 +11,24 @@ class DutyStatus(str, enum.Enum):
 
 class DutyAssignment(Base):
     __tablename__ = "duty_assignments"
+    __table_args__ = (
+        Index("ix_duty_assignments_guard_active", "guard_contact_number", "is_active"),
+        # Keyset pagination by start date
+        Index("ix_duty_assignments_start_date_id", "start_date", "id"),
+        # Active assignments of a client, and the clients having any
+        Index(
+            "ix_duty_assignments_active_client", "client_contact_number",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # At most one active assignment per guard
+        Index(
+            "uq_duty_assignments_active_guard", "guard_contact_number",
+            unique=True,
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     guard_contact_number = Column(String, ForeignKey("guards.contact_number"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, Index
 from sqlalchemy.orm import relationship, foreign
 from datetime import datetime
 from models.base import Base
@@ -13,6 +13,15 @@ class GuardStatus(str, enum.Enum):
 
 class Guard(Base):
     __tablename__ = "guards"
+    __table_args__ = (
+        # Keyset pagination by name
+        Index("ix_guards_name_id", "name", "id"),
+        # Trigram indexes serving ILIKE '%term%' searches (PostgreSQL with pg_trgm)
+        Index("ix_guards_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_guards_contact_number_trgm", "contact_number", postgresql_using="gin",
+              postgresql_ops={"contact_number": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -25,6 +34,13 @@ class Guard(Base):
     image_url = Column( String, nullable=True)
     cnic_front_url= Column( String, nullable=True)
     cnic_back_url= Column( String, nullable=True)
+    # Derivatives of the images above, filled in by the image pipeline
+    image_thumbnail_url = Column(String, nullable=True)
+    image_preview_url = Column(String, nullable=True)
+    cnic_front_thumbnail_url = Column(String, nullable=True)
+    cnic_front_preview_url = Column(String, nullable=True)
+    cnic_back_thumbnail_url = Column(String, nullable=True)
+    cnic_back_preview_url = Column(String, nullable=True)
     join_date = Column(DateTime, default=datetime.utcnow)
     status = Column(Enum(GuardStatus), default=GuardStatus.ACTIVE)
     current_salary = Column(Float, default=0.0)
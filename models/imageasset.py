@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from models.base import Base
+
+
+class ImageAsset(Base):
+    """A stored image and its derivatives, keyed by content hash, for upload dedup."""
+
+    __tablename__ = "image_assets"
+    __table_args__ = (
+        # One asset per file content and storage backend
+        Index("uq_image_assets_sha256_backend", "sha256", "backend", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False)
+    backend = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    thumbnail_url = Column(String)
+    preview_url = Column(String)
+    width = Column(Integer)
+    height = Column(Integer)
+    size_bytes = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship, foreign
 from datetime import datetime
 from models.base import Base
@@ -13,6 +13,11 @@ class InventoryStatus(str, enum.Enum):
 
 class InventoryRecord(Base):
     __tablename__ = "inventory_records"
+    __table_args__ = (
+        Index("ix_inventory_records_guard_status", "guard_contact_number", "status"),
+        # Keyset pagination by issue date
+        Index("ix_inventory_records_issue_date_id", "issue_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     guard_contact_number = Column(String, ForeignKey("guards.contact_number"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Boolean, DateTime, ForeignKey, Text, String
+from sqlalchemy import Column, Integer, Float, Boolean, DateTime, ForeignKey, Text, String, Index
 from sqlalchemy.orm import relationship, foreign
 from datetime import datetime
 from models.base import Base
@@ -6,6 +6,12 @@ from models.base import Base
 
 class SalaryRecord(Base):
     __tablename__ = "salary_records"
+    __table_args__ = (
+        # One salary record per guard and month; the payroll run relies on it for ON CONFLICT
+        Index("uq_salary_records_guard_month_year", "guard_contact_number", "month", "year", unique=True),
+        # Keyset pagination by period
+        Index("ix_salary_records_year_month_id", "year", "month", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     guard_contact_number = Column(String, ForeignKey("guards.contact_number"), nullable=False)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, LargeBinary, ForeignKey, Index, Enum
+from datetime import datetime
+from models.base import Base
+import enum
+
+
+class UploadStatus(str, enum.Enum):
+    PENDING = "pending"
+    UPLOADING = "uploading"
+    DONE = "done"
+    FAILED = "failed"
+    # A newer image replaced this one before it was uploaded
+    SUPERSEDED = "superseded"
+
+
+class UploadOutbox(Base):
+    """An image waiting to be uploaded for a guard, drained by utils.upload_outbox."""
+
+    __tablename__ = "upload_outbox"
+    __table_args__ = (
+        # The worker's "due jobs" scan
+        Index("ix_upload_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    guard_id = Column(Integer, ForeignKey("guards.id", ondelete="CASCADE"), nullable=False, index=True)
+    field = Column(String, nullable=False)  # image_url, cnic_front_url or cnic_back_url
+    folder = Column(String, nullable=False)
+    filename = Column(String)
+    # Raw image bytes; cleared once the upload is done
+    data = Column(LargeBinary)
+    status = Column(Enum(UploadStatus), nullable=False, default=UploadStatus.PENDING)
+    # Claims so far, each one an upload attempt
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime)
+    last_error = Column(Text)
+    url = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 from utils.util import get_db
+from utils.counters import apply_counter_delta, client_counts, search_index_counts
+from utils.cache import response_cache
+from utils.pagination import paginate
+from utils.fieldsets import parse_fields, model_columns, list_response
+from utils.search import search_indexes, text_match, relevance
+from utils.autocomplete import autocomplete_index
 from utils.pydantic_model import ClientCreate, ClientUpdate, ClientResponse, GuardAssignmentInfo, ClientGuardResponse
-from sqlalchemy.orm import  Session 
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select
 from models.client import Client
 from datetime import datetime
 from models.dutyassignment import DutyAssignment
@@ -11,50 +18,71 @@ from models.dutyassignment import DutyAssignment
 client= APIRouter()
 
 @client.post("/", response_model=ClientResponse)
-async def create_client(client: ClientCreate, db: Session = Depends(get_db)):
+async def create_client(client: ClientCreate, db: AsyncSession = Depends(get_db)):
     try:
-        existing_client = db.query(Client).filter(Client.contact_number == client.contact_number).first()
+        existing_client = await db.scalar(select(Client).where(Client.contact_number == client.contact_number))
         if existing_client:
             raise HTTPException(status_code=400, detail="Client with this contact number already exists")
         db_client = Client(**client.dict())
         db.add(db_client)
-        db.commit()
-        db.refresh(db_client)
+        await apply_counter_delta(db, {}, {**client_counts(db_client), **search_index_counts()})
+        await db.commit()
+        await db.refresh(db_client)
+        search_indexes.update(db_client)
+        autocomplete_index.update(db_client)
+        await response_cache.invalidate("client")
         return db_client
     except Exception as e:
         print(f"Error creating clients: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @client.get("/", response_model=List[ClientResponse])
+@response_cache.cached("client.list", tags=("client",))
 async def get_clients(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    sort_by: Optional[str] = Query(None, pattern="^(id|name|relevance)$"),
+    order: Optional[str] = Query(None, pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,contact_number"),
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    selected = parse_fields(fields, ClientResponse)
     try:
-        query = db.query(Client)
+        query = select(*model_columns(Client, ClientResponse, selected))
         
         if search:
-            query = query.filter(
-                or_(
-                    Client.name.ilike(f"%{search}%"),
-                    Client.contact_number.ilike(f"%{search}%")
-                )
-            )
+            query = query.where(await text_match(db, search, Client.name, Client.contact_number))
 
+        sort_by = sort_by or ("relevance" if search else "id")
+        if sort_by == "relevance" and search:
+            # Best matches first unless order=asc
+            descending = order != "asc"
+            keys = [(relevance(db, search, Client.name, Client.contact_number), descending), (Client.id, False)]
+        elif sort_by == "name":
+            descending = order == "desc"
+            keys = [(Client.name, descending), (Client.id, descending)]
+        else:
+            sort_by, descending = "id", order == "desc"
+            keys = [(Client.id, descending)]
         
-        clients = query.offset(skip).limit(limit).all()
-        return clients
+        sort_order = f"{sort_by}.{'desc' if descending else 'asc'}"
+        rows = await paginate(db, query, response, keys, sort_order, limit, cursor, skip, entities=False,
+                             filters={"search": search})
+        return list_response(ClientResponse, selected, rows, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching clients: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @client.get("/{contact_number}", response_model=ClientResponse)
-async def get_client(contact_number: str, db: Session = Depends(get_db)):
+async def get_client(contact_number: str, db: AsyncSession = Depends(get_db)):
     try:
-        client = db.query(Client).filter(Client.contact_number == contact_number).first()
+        client = await db.scalar(select(Client).where(Client.contact_number == contact_number))
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         return client
@@ -63,16 +91,20 @@ async def get_client(contact_number: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))  
      
 @client.get("/{contact_number}/guards", response_model=ClientGuardResponse)
-async def get_client_guards(contact_number: str, db: Session = Depends(get_db)):
+async def get_client_guards(contact_number: str, db: AsyncSession = Depends(get_db)):
     try:
-        client = db.query(Client).filter(Client.contact_number == contact_number).first()
+        client = await db.scalar(select(Client).where(Client.contact_number == contact_number))
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
-        assignments = db.query(DutyAssignment).filter(
-            DutyAssignment.client_contact_number == contact_number,
-            DutyAssignment.is_active == True
-        ).all()
+        assignments = (await db.scalars(
+            select(DutyAssignment)
+            .options(joinedload(DutyAssignment.guard))
+            .where(
+                DutyAssignment.client_contact_number == contact_number,
+                DutyAssignment.is_active == True
+            )
+        )).all()
 
         guards_info = []
         for assignment in assignments:
@@ -96,9 +128,9 @@ async def get_client_guards(contact_number: str, db: Session = Depends(get_db)):
 
 
 @client.put("/{client_id}", response_model=ClientResponse)
-async def update_client(client_id: int, client_update: ClientUpdate, db: Session = Depends(get_db)):
+async def update_client(client_id: int, client_update: ClientUpdate, db: AsyncSession = Depends(get_db)):
     try:
-        client = db.query(Client).filter(Client.id == client_id).first()
+        client = await db.get(Client, client_id)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
@@ -106,8 +138,12 @@ async def update_client(client_id: int, client_update: ClientUpdate, db: Session
             setattr(client, field, value)
         
         client.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(client)
+        await apply_counter_delta(db, {}, search_index_counts())
+        await db.commit()
+        await db.refresh(client)
+        search_indexes.update(client)
+        autocomplete_index.update(client)
+        await response_cache.invalidate("client")
         return client
     except Exception as e:
         print(f"Error update client by id: {e}")
@@ -115,14 +151,18 @@ async def update_client(client_id: int, client_update: ClientUpdate, db: Session
 
 
 @client.delete("/{client_id}")
-async def delete_client(client_id: int, db: Session = Depends(get_db)):
+async def delete_client(client_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        client = db.query(Client).filter(Client.id == client_id).first()
+        client = await db.get(Client, client_id)
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
-        db.delete(client)
-        db.commit()
+        await apply_counter_delta(db, client_counts(client), search_index_counts())
+        await db.delete(client)
+        await db.commit()
+        search_indexes.remove(client)
+        autocomplete_index.remove(client)
+        await response_cache.invalidate("client")
         return {"message": "Client deleted successfully"}
     except Exception as e:
         print(f"Error delete client by id: {e}")
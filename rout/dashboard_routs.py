@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from utils.util import get_db
-from sqlalchemy.orm import  Session 
-from models.client import Client
-from datetime import datetime
-from models.dutyassignment import DutyAssignment, DutyStatus
-from models.guard import Guard, GuardStatus
-from models.salaryrecord import SalaryRecord
-from models.inventoryrecord import InventoryRecord,InventoryStatus
+from utils.aggregates import get_system_overview_stats, get_counter_overview_stats
+from utils.cache import response_cache
+from config.database import pool_status
+from utils.search import search_indexes
+from utils.upload_outbox import upload_worker, outbox_counts
+from utils.images import image_pipeline
+from utils.passwords import password_hasher
+from utils.auth import auth_stats
+from utils.ratelimit import rate_limiter
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 stat=APIRouter()
@@ -14,71 +17,51 @@ stat=APIRouter()
 
 
 @stat.get("/overview")
-async def get_system_overview(db: Session = Depends(get_db)):
+@response_cache.cached("stat.overview", tags=("guard", "client", "duty_assignment", "salary", "inventory"), ttl=5)
+async def get_system_overview(
+    live: bool = Query(False, description="Recompute from source tables instead of dashboard_counters"),
+    db: AsyncSession = Depends(get_db)
+):
     try:
-    # Guard statistics
-        guard_stats = {
-            "total": db.query(Guard).count(),
-            "active": db.query(Guard).filter(Guard.status == GuardStatus.ACTIVE).count(),
-            "inactive": db.query(Guard).filter(Guard.status == GuardStatus.INACTIVE).count(),
-            "on_leave": db.query(Guard).filter(Guard.status == GuardStatus.ON_LEAVE).count()
-        }
-        
-        # Assignment statistics
-        assignment_stats = {
-            "total_active": db.query(DutyAssignment).filter(DutyAssignment.is_active == True).count(),
-            "on_duty": db.query(DutyAssignment).filter(
-                DutyAssignment.is_active == True,
-                DutyAssignment.duty_status == DutyStatus.ON_DUTY
-            ).count(),
-            "off_duty": db.query(DutyAssignment).filter(
-                DutyAssignment.is_active == True,
-                DutyAssignment.duty_status == DutyStatus.OFF_DUTY
-            ).count()
-        }
-        
-        # Client statistics
-        client_stats = {
-            "total": db.query(Client).count(),
-            "with_guards": db.query(Client).join(DutyAssignment).filter(
-                DutyAssignment.is_active == True
-            ).distinct().count()
-        }
-        
-        # Financial statistics
-        current_month = datetime.utcnow().month
-        current_year = datetime.utcnow().year
-        
-        monthly_salaries = db.query(SalaryRecord).filter(
-            SalaryRecord.month == current_month,
-            SalaryRecord.year == current_year
-        ).all()
-        
-        financial_stats = {
-            "monthly_salary_paid": sum(r.final_salary for r in monthly_salaries if r.is_paid),
-            "monthly_salary_pending": sum(r.final_salary for r in monthly_salaries if not r.is_paid),
-            "total_salary_records": len(monthly_salaries)
-        }
-        
-        # Inventory statistics
-        inventory_stats = {
-            "total_items": db.query(InventoryRecord).count(),
-            "currently_issued": db.query(InventoryRecord).filter(
-                InventoryRecord.status == InventoryStatus.ISSUED
-            ).count(),
-            "returned": db.query(InventoryRecord).filter(
-                InventoryRecord.status == InventoryStatus.RETURNED
-            ).count()
-        }
-        
-        return {
-            "guards": guard_stats,
-            "assignments": assignment_stats,
-            "clients": client_stats,
-            "financial": financial_stats,
-            "inventory": inventory_stats,
-            "generated_at": datetime.utcnow()
-        }
+        if live:
+            # All guard, assignment, client, salary and inventory numbers in one query
+            return await get_system_overview_stats(db)
+        return await get_counter_overview_stats(db)
     except Exception as e:
         print(f"Error fetching system overview: {e}")
-        raise HTTPException(status_code=500, detail="Failed to fetch system overview")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to fetch system overview")
+
+
+@stat.get("/cache")
+async def get_cache_stats():
+    return response_cache.stats()
+
+
+@stat.get("/db-pool")
+async def get_db_pool_stats():
+    return pool_status()
+
+
+@stat.get("/search-index")
+async def get_search_index_stats():
+    return search_indexes.stats()
+
+
+@stat.get("/upload-outbox")
+async def get_upload_outbox_stats(db: AsyncSession = Depends(get_db)):
+    return {"jobs": await outbox_counts(db), "worker": upload_worker.stats(), "images": image_pipeline.stats()}
+
+
+@stat.get("/passwords")
+async def get_password_pool_stats():
+    return password_hasher.stats()
+
+
+@stat.get("/auth")
+async def get_auth_cache_stats():
+    return auth_stats()
+
+
+@stat.get("/rate-limit")
+async def get_rate_limit_stats():
+    return rate_limiter.stats()
@@ -1,6 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from utils.util import get_db
-from sqlalchemy.orm import  Session 
+from utils.counters import apply_counter_delta, assignment_counts, active_assignment_counts
+from utils.cache import response_cache
+from utils.pagination import paginate
+from utils.fieldsets import parse_fields, model_columns, list_response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, update, insert
+from collections import Counter
 from datetime import datetime
 from utils.pydantic_model import DutyAssignmentCreate,DutyAssignmentResponse,DutyAssignmentUpdate,DutyStatus,DutyAssignmentReassign
 from models.guard import Guard
@@ -11,37 +18,100 @@ from models.dutyassignment import DutyAssignment
 
 dutyassignment= APIRouter()
 
+ASSIGNMENT_RETRIES = 3
+# Partial unique index allowing one active assignment per guard
+ACTIVE_ASSIGNMENT_INDEX = "uq_duty_assignments_active_guard"
+UNIQUE_VIOLATION = "23505"
+
+
+def _is_active_assignment_conflict(error: IntegrityError) -> bool:
+    """Whether `error` is ACTIVE_ASSIGNMENT_INDEX rejecting a second active row.
+
+    PostgreSQL drivers expose the SQLSTATE and name the index in the
+    message; SQLite reports only the table and column of the unique index.
+    """
+    message = str(error.orig)
+    sqlstate = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+    if sqlstate is not None:
+        return sqlstate == UNIQUE_VIOLATION and ACTIVE_ASSIGNMENT_INDEX in message
+    return "UNIQUE constraint failed: duty_assignments.guard_contact_number" in message
+
+
+async def _get_guard_name_for_assignment(db: AsyncSession, guard_contact_number: str, client_contact_number: str):
+    # Guard and client existence in one round trip
+    row = (await db.execute(
+        select(
+            Guard.name,
+            select(Client.id).where(Client.contact_number == client_contact_number).scalar_subquery()
+        ).where(Guard.contact_number == guard_contact_number)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Guard not found")
+    if row[1] is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    return row[0]
+
+
+async def _open_assignment(db: AsyncSession, values: dict) -> DutyAssignment:
+    """Close the guard's active assignment and insert `values` as the new one.
+
+    One UPDATE ... RETURNING and one INSERT ... RETURNING in a single
+    transaction. The partial unique index uq_duty_assignments_active_guard
+    rejects the insert if a concurrent request opened an assignment for the
+    same guard first; the transaction is then retried so the later request
+    closes that one instead.
+    """
+    for attempt in range(ASSIGNMENT_RETRIES):
+        now = datetime.utcnow()
+        try:
+            closed = (await db.execute(
+                update(DutyAssignment)
+                .where(
+                    DutyAssignment.guard_contact_number == values["guard_contact_number"],
+                    DutyAssignment.is_active == True
+                )
+                .values(is_active=False, end_date=now, updated_at=now)
+                .returning(DutyAssignment.duty_status)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+
+            new_assignment = (await db.scalars(
+                insert(DutyAssignment).returning(DutyAssignment), [values]
+            )).one()
+
+            counts_before = Counter()
+            for duty_status in closed:
+                counts_before.update(active_assignment_counts(duty_status))
+            await apply_counter_delta(db, counts_before, assignment_counts(new_assignment))
+            await db.commit()
+            break
+        except IntegrityError as e:
+            await db.rollback()
+            if not _is_active_assignment_conflict(e):
+                raise HTTPException(status_code=400, detail=f"Invalid duty assignment: {e.orig}")
+            if attempt == ASSIGNMENT_RETRIES - 1:
+                raise HTTPException(status_code=409, detail="Guard was reassigned concurrently, please retry")
+
+    await response_cache.invalidate("duty_assignment")
+    return new_assignment
+
+
 @dutyassignment.post("/", response_model=DutyAssignmentResponse)
-async def create_duty_assignment(assignment: DutyAssignmentCreate, db: Session = Depends(get_db)):
+async def create_duty_assignment(assignment: DutyAssignmentCreate, db: AsyncSession = Depends(get_db)):
     try:
-        guard = db.query(Guard).filter(Guard.contact_number == assignment.guard_contact_number).first()
-        if not guard:
-            raise HTTPException(status_code=404, detail="Guard not found")
-        print("Guard in assignment",guard)
-        client = db.query(Client).filter(Client.contact_number == assignment.client_contact_number).first()
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        print("client in assignment",client)
-        # End any existing active assignments for this guard
-        existing_assignments = db.query(DutyAssignment).filter(
-            DutyAssignment.guard_contact_number == assignment.guard_contact_number,
-            DutyAssignment.is_active == True
-        ).all()
-
-        for existing in existing_assignments:
-            existing.is_active = False
-            existing.end_date = datetime.utcnow()
+        guard_name = await _get_guard_name_for_assignment(
+            db, assignment.guard_contact_number, assignment.client_contact_number
+        )
 
         # Inject guard name into the assignment
         assignment_data = assignment.dict()
-        assignment_data["name"] = guard.name  # 👈 Inject name from Guard table
+        assignment_data["name"] = guard_name  # 👈 Inject name from Guard table
 
-        db_assignment = DutyAssignment(**assignment_data)
-        db.add(db_assignment)
-        db.commit()
-        db.refresh(db_assignment)
-        return db_assignment
+        # End any existing active assignment for this guard and open the new one
+        return await _open_assignment(db, assignment_data)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in duty Assignment: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -49,36 +119,48 @@ async def create_duty_assignment(assignment: DutyAssignmentCreate, db: Session =
 
 @dutyassignment.get("/", response_model=List[DutyAssignmentResponse])
 async def get_duty_assignments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    sort_by: str = Query("id", pattern="^(id|start_date)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,guard_contact_number,duty_status"),
     guard_contact_number: Optional[int] = None,
     client_contact_number: Optional[int] = None,
     is_active: Optional[bool] = None,
     duty_status: Optional[DutyStatus] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    selected = parse_fields(fields, DutyAssignmentResponse)
     try:
-        query = db.query(DutyAssignment)
+        query = select(*model_columns(DutyAssignment, DutyAssignmentResponse, selected))
         
         if guard_contact_number:
-            query = query.filter(DutyAssignment.guard_contact_number == guard_contact_number)
+            query = query.where(DutyAssignment.guard_contact_number == guard_contact_number)
         if client_contact_number:
-            query = query.filter(DutyAssignment.client_contact_number == client_contact_number)
+            query = query.where(DutyAssignment.client_contact_number == client_contact_number)
         if is_active is not None:
-            query = query.filter(DutyAssignment.is_active == is_active)
+            query = query.where(DutyAssignment.is_active == is_active)
         if duty_status:
-            query = query.filter(DutyAssignment.duty_status == duty_status)
+            query = query.where(DutyAssignment.duty_status == duty_status)
         
-        assignments = query.offset(skip).limit(limit).all()
-        return assignments
+        descending = order == "desc"
+        keys = [(DutyAssignment.id, descending)]
+        if sort_by == "start_date":
+            keys.insert(0, (DutyAssignment.start_date, descending))
+        rows = await paginate(db, query, response, keys, f"{sort_by}.{order}", limit, cursor, skip, entities=False)
+        return list_response(DutyAssignmentResponse, selected, rows, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error feaching duty Assignment: {e}")
         raise HTTPException(status_code=500, detail=str(e)) 
 
 @dutyassignment.get("/{assignment_id}", response_model=DutyAssignmentResponse)
-async def get_duty_assignment(assignment_id: int, db: Session = Depends(get_db)):
+async def get_duty_assignment(assignment_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        assignment = db.query(DutyAssignment).filter(DutyAssignment.id == assignment_id).first()
+        assignment = await db.get(DutyAssignment, assignment_id)
         if not assignment:
             raise HTTPException(status_code=404, detail="Assignment not found")
         return assignment
@@ -90,26 +172,34 @@ async def get_duty_assignment(assignment_id: int, db: Session = Depends(get_db))
 async def update_duty_assignment(
     assignment_id: int,
     assignment_update: DutyAssignmentUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        assignment = db.query(DutyAssignment).filter(DutyAssignment.id == assignment_id).first()
+        assignment = await db.get(DutyAssignment, assignment_id)
         if not assignment:
             raise HTTPException(status_code=404, detail="Assignment not found")
         
         # If reassigning to a different client, verify client exists
         if assignment_update.client_contact_number and assignment_update.client_contact_number != assignment.client_contact_number:
-            client = db.query(Client).filter(Client.contact_number == assignment_update.client_contact_number).first()
+            client = await db.scalar(select(Client).where(Client.contact_number == assignment_update.client_contact_number))
             if not client:
                 raise HTTPException(status_code=404, detail="New client not found")
         
+        counts_before = assignment_counts(assignment)
         for field, value in assignment_update.dict(exclude_unset=True).items():
             setattr(assignment, field, value)
         
         assignment.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(assignment)
+        await apply_counter_delta(db, counts_before, assignment_counts(assignment))
+        await db.commit()
+        await db.refresh(assignment)
+        await response_cache.invalidate("duty_assignment")
         return assignment
+    except IntegrityError as e:
+        await db.rollback()
+        if not _is_active_assignment_conflict(e):
+            raise HTTPException(status_code=400, detail=f"Invalid duty assignment: {e.orig}")
+        raise HTTPException(status_code=409, detail="Guard already has an active assignment")
     except Exception as e:
         print(f"Error updating duty assignment: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -117,61 +207,47 @@ async def update_duty_assignment(
 @dutyassignment.post("/reassign/{guard_contact_number}")
 async def reassign_guard(
     duty_assignment: DutyAssignmentReassign,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-    # Verify guard exists
-        guard = db.query(Guard).filter(Guard.contact_number == duty_assignment.guard_contact_number).first()
-        if not guard:
-            raise HTTPException(status_code=404, detail="Guard not found")
-        
-        # Verify client exists
-        client = db.query(Client).filter(Client.contact_number == duty_assignment.new_client_contact_number).first()
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        # End current assignment
-        current_assignment = db.query(DutyAssignment).filter(
-            DutyAssignment.guard_contact_number == duty_assignment.guard_contact_number,
-            DutyAssignment.is_active == True
-        ).first()
-        
-        if current_assignment:
-            current_assignment.is_active = False
-            current_assignment.end_date = datetime.utcnow()
-        
-        # Create new assignment
-        new_assignment = DutyAssignment(
-            guard_contact_number=duty_assignment.guard_contact_number,
-            client_contact_number=duty_assignment.new_client_contact_number,
-            company_name=duty_assignment.company_name,
-            start_date=datetime.utcnow(),
-            duty_status=DutyStatus.ON_DUTY,
-            is_active=True
+        # Verify guard and client exist
+        guard_name = await _get_guard_name_for_assignment(
+            db, duty_assignment.guard_contact_number, duty_assignment.new_client_contact_number
         )
         
-        db.add(new_assignment)
-        db.commit()
-        db.refresh(new_assignment)
+        # End current assignment and create the new one
+        new_assignment = await _open_assignment(db, {
+            "guard_contact_number": duty_assignment.guard_contact_number,
+            "client_contact_number": duty_assignment.new_client_contact_number,
+            "name": guard_name,
+            "company_name": duty_assignment.company_name,
+            "start_date": datetime.utcnow(),
+            "duty_status": DutyStatus.ON_DUTY,
+            "is_active": True
+        })
         
         return {"message": "Guard reassigned successfully", "assignment": new_assignment}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error reassigning guard: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
 
 @dutyassignment.delete("/{assignment_id}", status_code=204)
-async def delete_duty_assignment(assignment_id: int, db: Session = Depends(get_db)):
+async def delete_duty_assignment(assignment_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a duty assignment by its ID.
     """
     try:
-        assignment = db.query(DutyAssignment).filter(DutyAssignment.id == assignment_id).first()
+        assignment = await db.get(DutyAssignment, assignment_id)
         if not assignment:
             raise HTTPException(status_code=404, detail="Assignment not found")
         
-        db.delete(assignment)
-        db.commit()
+        await apply_counter_delta(db, assignment_counts(assignment), {})
+        await db.delete(assignment)
+        await db.commit()
+        await response_cache.invalidate("duty_assignment")
         return None  # 204 No Content
     except Exception as e:
         print(f"Error deleting duty assignment: {e}")
@@ -179,12 +255,13 @@ async def delete_duty_assignment(assignment_id: int, db: Session = Depends(get_d
     
 
 @dutyassignment.get("/client-guard-assignment/{client_contact_number}")
-def get_client_guard_assignments(
+@response_cache.cached("dutyassignment.client_guards", tags=("duty_assignment", "guard", "client"))
+async def get_client_guard_assignments(
     client_contact_number: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        query = db.query(DutyAssignment).filter(DutyAssignment.is_active == True)
+        query = select(DutyAssignment).where(DutyAssignment.is_active == True)
 
         query = query.options(
             joinedload(DutyAssignment.client),
@@ -192,9 +269,9 @@ def get_client_guard_assignments(
         )
 
         if client_contact_number is not None:
-            query = query.filter(DutyAssignment.client_contact_number == client_contact_number)
+            query = query.where(DutyAssignment.client_contact_number == client_contact_number)
 
-        assignments = query.all()
+        assignments = (await db.scalars(query)).all()
         client_map = {}
 
         for assignment in assignments:
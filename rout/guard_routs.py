@@ -1,22 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File, Form, Response
 from utils.util import get_db
-from sqlalchemy.orm import  Session 
-import uuid
-import cloudinary
-import cloudinary.uploader
+from utils.counters import apply_counter_delta, guard_counts, search_index_counts
+from utils.cache import response_cache
+from utils.pagination import paginate
+from utils.fieldsets import parse_fields, model_columns, list_response
+from utils.search import search_indexes, text_match, relevance
+from utils.autocomplete import autocomplete_index
+from utils.storage import storage
+from utils.upload_outbox import upload_worker, enqueue_uploads, supersede_uploads
+from utils.images import derivative_fields
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, or_, update, delete
 from datetime import datetime
 from dotenv import load_dotenv
-from utils.pydantic_model import GuardCreate,GuardStatus,GuardResponse,GuardUpdate
+from utils.pydantic_model import GuardCreate,GuardStatus,GuardResponse,GuardUpdate,StorageMigrationRequest,UploadOutboxResponse
 from models.guard import Guard
 from models.dutyassignment import DutyAssignment
+from models.uploadoutbox import UploadOutbox, UploadStatus
 from typing import List, Optional
 import os
 
 load_dotenv()
-cloudinary.config()
 
 guard= APIRouter()
 
+# Guard image columns and the storage folder each is uploaded to
+IMAGE_FIELDS = (
+    ("image_url", "guards"),
+    ("cnic_front_url", "guards/cnic_front"),
+    ("cnic_back_url", "guards/cnic_back")
+)
+# The same, with the thumbnail and preview columns, for storage migration
+STORED_FIELDS = tuple(
+    (column, folder if kind is None else f"{folder}/{kind}")
+    for field, folder in IMAGE_FIELDS
+    for kind, column in ((None, field), *zip(("thumbnails", "previews"), derivative_fields(field).values()))
+)
+
 
 @guard.post("/", response_model=GuardResponse)
 async def create_guard(
@@ -27,36 +47,19 @@ async def create_guard(
     current_salary: Optional[float] = Form(0.0),
     uniform_cost: Optional[float] = Form(None),
     monthly_deduction: Optional[float] = Form(0.0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     image: UploadFile = File(...),
     cnic_front_image: UploadFile = File(...),
     cnic_back_image: UploadFile = File(...)
 ):
     try:
         # Check if contact number already exists
-        existing_guard = db.query(Guard).filter(Guard.contact_number == contact_number).first()
+        existing_guard = await db.scalar(select(Guard).where(Guard.contact_number == contact_number))
         if existing_guard:
             raise HTTPException(status_code=400, detail="Contact number already registered")
 
-        # Helper to upload to Cloudinary
-        def upload_to_cloudinary(file: UploadFile, folder: str):
-            result = cloudinary.uploader.upload(
-                file.file,
-                folder=folder,
-                public_id=str(uuid.uuid4()),
-                resource_type="image"
-            )
-            return result.get("secure_url")
-
-        # Upload all images
-        image_url = upload_to_cloudinary(image, "guards")
-        cnic_front_url = upload_to_cloudinary(cnic_front_image, "guards/cnic_front")
-        cnic_back_url = upload_to_cloudinary(cnic_back_image, "guards/cnic_back")
-
-        if not all([image_url, cnic_front_url, cnic_back_url]):
-            raise HTTPException(status_code=500, detail="One or more image uploads failed")
-
-        # Save guard data with all URLs
+        # Save guard data; the images go to the upload outbox in the same transaction
+        # and their URLs are filled in by the upload worker (see GET /guard/{id}/uploads)
         db_guard = Guard(
             name=name,
             contact_number=contact_number,
@@ -64,54 +67,137 @@ async def create_guard(
             cnic = cnic,
             current_salary=current_salary,
             uniform_cost=uniform_cost,
-            monthly_deduction=monthly_deduction,
-            image_url=image_url,
-            cnic_front_url=cnic_front_url,
-            cnic_back_url=cnic_back_url
+            monthly_deduction=monthly_deduction
         )
         db.add(db_guard)
-        db.commit()
-        db.refresh(db_guard)
+        await db.flush()
+        await enqueue_uploads(db, db_guard.id, [
+            (field, folder, file)
+            for file, (field, folder) in zip((image, cnic_front_image, cnic_back_image), IMAGE_FIELDS)
+        ])
+        await apply_counter_delta(db, {}, {**guard_counts(db_guard), **search_index_counts()})
+        await db.commit()
+        await db.refresh(db_guard)
+        upload_worker.notify()
+        search_indexes.update(db_guard)
+        autocomplete_index.update(db_guard)
+        await response_cache.invalidate("guard")
 
         return db_guard
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating guard: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+
+@guard.post("/storage/migrate")
+async def migrate_guard_images(request: StorageMigrationRequest, db: AsyncSession = Depends(get_db)):
+    """Copy the images of the next `limit` guards after `after_id` into the `target` backend.
+
+    Each image not already on the target is downloaded from whichever backend
+    owns its URL and re-uploaded, concurrently, then the guard rows are
+    repointed in one commit. Call again with `next_after_id` until it is null.
+    """
+    try:
+        target = storage.get_backend(request.target)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Storage backend {request.target} is not available: {e}")
+
+    query = select(Guard).where(or_(*(getattr(Guard, field).is_not(None) for field, _ in STORED_FIELDS)))
+    if request.after_id is not None:
+        query = query.where(Guard.id > request.after_id)
+    guards = (await db.scalars(query.order_by(Guard.id).limit(request.limit))).all()
+
+    pending = [
+        (g, field, folder, getattr(g, field))
+        for g in guards
+        for field, folder in STORED_FIELDS
+        if getattr(g, field) and not target.owns(getattr(g, field))
+    ]
+    result = {
+        "target": request.target,
+        "dry_run": request.dry_run,
+        "guards_scanned": len(guards),
+        "images_pending": len(pending),
+        "images_migrated": 0,
+        "failed": [],
+        "next_after_id": guards[-1].id if len(guards) == request.limit else None
+    }
+    if request.dry_run or not pending:
+        return result
+
+    urls = await storage.copy_many([(url, folder) for _, _, folder, url in pending], target)
+    for (g, field, _, url), new_url in zip(pending, urls):
+        if isinstance(new_url, Exception):
+            result["failed"].append({"guard_id": g.id, "field": field, "url": url, "error": str(new_url)})
+        else:
+            setattr(g, field, new_url)
+            result["images_migrated"] += 1
+
+    try:
+        await db.commit()
+    except Exception as e:
+        print(f"Error saving migrated image URLs: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error")
+    await response_cache.invalidate("guard")
+    return result
+
     
 @guard.get("/", response_model=List[GuardResponse])
+@response_cache.cached("guard.list", tags=("guard",))
 async def get_guards(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    sort_by: Optional[str] = Query(None, pattern="^(id|name|relevance)$"),
+    order: Optional[str] = Query(None, pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,status"),
     status: Optional[GuardStatus] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    selected = parse_fields(fields, GuardResponse)
     try:
-        query = db.query(Guard)
+        query = select(*model_columns(Guard, GuardResponse, selected))
         
         if status:
-            query = query.filter(Guard.status == status)
+            query = query.where(Guard.status == status)
         
         if search:
-            query = query.filter(
-                (Guard.name.ilike(f"%{search}%")) |
-                (Guard.contact_number.ilike(f"%{search}%"))
-            )
+            query = query.where(await text_match(db, search, Guard.name, Guard.contact_number))
+        
+        sort_by = sort_by or ("relevance" if search else "id")
+        if sort_by == "relevance" and search:
+            # Best matches first unless order=asc
+            descending = order != "asc"
+            keys = [(relevance(db, search, Guard.name, Guard.contact_number), descending), (Guard.id, False)]
+        elif sort_by == "name":
+            descending = order == "desc"
+            keys = [(Guard.name, descending), (Guard.id, descending)]
+        else:
+            sort_by, descending = "id", order == "desc"
+            keys = [(Guard.id, descending)]
         
-        guards = query.offset(skip).limit(limit).all()
-        return guards
+        sort_order = f"{sort_by}.{'desc' if descending else 'asc'}"
+        rows = await paginate(db, query, response, keys, sort_order, limit, cursor, skip, entities=False,
+                             filters={"search": search, "status": status})
+        return list_response(GuardResponse, selected, rows, response)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching guards: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @guard.get("/{guard_id}", response_model=GuardResponse)
-async def get_guard(guard_id: int, db: Session = Depends(get_db)):
+async def get_guard(guard_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        guard = db.query(Guard).filter(Guard.id == guard_id).first()
+        guard = await db.get(Guard, guard_id)
         if not guard:
             raise HTTPException(status_code=404, detail="Guard not found")
         return guard
@@ -121,9 +207,9 @@ async def get_guard(guard_id: int, db: Session = Depends(get_db)):
 
 
 @guard.get("/by-contact/{contact_number}", response_model=GuardResponse)
-async def get_guard_by_contact(contact_number: str, db: Session = Depends(get_db)):
+async def get_guard_by_contact(contact_number: str, db: AsyncSession = Depends(get_db)):
     try:
-        guard = db.query(Guard).filter(Guard.contact_number == contact_number).first()
+        guard = await db.scalar(select(Guard).where(Guard.contact_number == contact_number))
         if not guard:
             raise HTTPException(status_code=404, detail="Guard not found")
         return guard
@@ -131,6 +217,33 @@ async def get_guard_by_contact(contact_number: str, db: Session = Depends(get_db
         print(f"Error fetching guards by contact: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@guard.get("/{guard_id}/uploads", response_model=List[UploadOutboxResponse])
+async def get_guard_uploads(guard_id: int, db: AsyncSession = Depends(get_db)):
+    """Status of the guard's queued image uploads, newest first."""
+    uploads = (await db.scalars(
+        select(UploadOutbox)
+        .where(UploadOutbox.guard_id == guard_id)
+        .order_by(UploadOutbox.id.desc())
+    )).all()
+    if not uploads and not await db.get(Guard, guard_id):
+        raise HTTPException(status_code=404, detail="Guard not found")
+    return uploads
+
+
+@guard.post("/{guard_id}/uploads/retry")
+async def retry_guard_uploads(guard_id: int, db: AsyncSession = Depends(get_db)):
+    """Queue the guard's failed uploads again with a fresh attempt budget."""
+    result = await db.execute(
+        update(UploadOutbox)
+        .where(UploadOutbox.guard_id == guard_id, UploadOutbox.status == UploadStatus.FAILED)
+        .values(status=UploadStatus.PENDING, attempts=0, next_attempt_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    upload_worker.notify()
+    return {"requeued": result.rowcount}
+
+
 @guard.put("/{guard_id}", response_model=GuardResponse)
 async def update_guard(
     guard_id: int,
@@ -143,17 +256,18 @@ async def update_guard(
     image: Optional[UploadFile] = File(None),
     cnic_front_image: Optional[UploadFile] = File(None),
     cnic_back_image: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    guard = db.query(Guard).filter(Guard.id == guard_id).first()
+    guard = await db.get(Guard, guard_id)
     if not guard:
         raise HTTPException(status_code=404, detail="Guard not found")
 
     if contact_number and contact_number != guard.contact_number:
-        existing = db.query(Guard).filter(Guard.contact_number == contact_number).first()
+        existing = await db.scalar(select(Guard).where(Guard.contact_number == contact_number))
         if existing:
             raise HTTPException(status_code=400, detail="Contact number already exists")
 
+    counts_before = guard_counts(guard)
     if name: guard.name = name
     if contact_number: guard.contact_number = contact_number
     if address: guard.address = address
@@ -161,43 +275,44 @@ async def update_guard(
     if current_salary: guard.current_salary = current_salary
     if status: guard.status = status
 
-    def upload_to_cloudinary(file: UploadFile, folder: str):
-            result = cloudinary.uploader.upload(
-                file.file,
-                folder=folder,
-                public_id=str(uuid.uuid4()),
-                resource_type="image"
-            )
-            return result.get("secure_url")
-    
-    # Upload files if provided
-    if image:
-        guard.image_url = await upload_to_cloudinary(image)
-    if cnic_front_image:
-        guard.cnic_front_url = await upload_to_cloudinary(cnic_front_image)
-    if cnic_back_image:
-        guard.cnic_back_url = await upload_to_cloudinary(cnic_back_image)
+    # New images go to the upload outbox like on create, so the request does not
+    # hold its connection while they are stored; the worker repoints the columns
+    uploads = [
+        (field, folder, file)
+        for file, (field, folder) in zip((image, cnic_front_image, cnic_back_image), IMAGE_FIELDS)
+        if file
+    ]
+    if uploads:
+        # Queued uploads of older images must not overwrite these
+        await supersede_uploads(db, guard.id, [field for field, _, _ in uploads])
+        await enqueue_uploads(db, guard.id, uploads)
 
     guard.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(guard)
+    await apply_counter_delta(db, counts_before, {**guard_counts(guard), **search_index_counts()})
+    await db.commit()
+    await db.refresh(guard)
+    if uploads:
+        upload_worker.notify()
+    search_indexes.update(guard)
+    autocomplete_index.update(guard)
+    await response_cache.invalidate("guard")
     return guard
 
 
 @guard.delete("/{guard_id}")
-async def delete_guard(guard_id: int, db: Session = Depends(get_db)):
+async def delete_guard(guard_id: int, db: AsyncSession = Depends(get_db)):
     try:
         # Check if guard exists
-        guard_obj = db.query(Guard).filter(Guard.id == guard_id).first()
+        guard_obj = await db.get(Guard, guard_id)
         if not guard_obj:
             raise HTTPException(status_code=404, detail="Guard not found")
         
         guard_contact = guard_obj.contact_number
 
         # Check if guard has active assignments
-        assignments = db.query(DutyAssignment).filter(
+        assignments = await db.scalar(select(DutyAssignment).where(
             DutyAssignment.guard_contact_number == guard_contact
-        ).first()
+        ).limit(1))
         if assignments:
             # Don't catch this in the except, let FastAPI handle it
             raise HTTPException(
@@ -206,8 +321,13 @@ async def delete_guard(guard_id: int, db: Session = Depends(get_db)):
             )
 
         # Delete guard
-        db.delete(guard_obj)
-        db.commit()
+        await apply_counter_delta(db, guard_counts(guard_obj), search_index_counts())
+        await db.execute(delete(UploadOutbox).where(UploadOutbox.guard_id == guard_id))
+        await db.delete(guard_obj)
+        await db.commit()
+        search_indexes.remove(guard_obj)
+        autocomplete_index.remove(guard_obj)
+        await response_cache.invalidate("guard")
         return {"message": "Guard deleted successfully"}
     
     except HTTPException:
@@ -215,15 +335,15 @@ async def delete_guard(guard_id: int, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         print(f"Error deleting guard by id: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     
 @guard.get("/all")
-def total_guard(
+async def total_guard(
     guard_id = Optional[int],
-    db: Session = Depends(get_db)):
+    db: AsyncSession = Depends(get_db)):
     try:
-        total = db.query(Guard).count()  
+        total = await db.scalar(select(func.count(Guard.id)))
         return {"total_guards": total}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
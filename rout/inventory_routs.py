@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from utils.util import get_db
-from sqlalchemy.orm import  Session 
+from utils.counters import apply_counter_delta, inventory_counts
+from utils.cache import response_cache
+from utils.pagination import paginate
+from utils.fieldsets import parse_fields, column_options, list_response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select
 from datetime import datetime
 from utils.pydantic_model import InventoryStatus, InventoryRecordCreate,InventoryRecordResponse, InventoryRecordUpdate
 from models.inventoryrecord import InventoryRecord,InventoryStatus
@@ -9,43 +15,68 @@ from typing import List, Optional
 
 inventory_record=APIRouter()
 
+
+async def _get_inventory_record(db: AsyncSession, record_id: int):
+    # InventoryRecordResponse nests the guard, so load it with the record
+    return await db.scalar(
+        select(InventoryRecord)
+        .options(joinedload(InventoryRecord.guard))
+        .where(InventoryRecord.id == record_id)
+    )
+
 @inventory_record.post("/", response_model=InventoryRecordResponse)
-async def create_inventory_record(inventory: InventoryRecordCreate, db: Session = Depends(get_db)):
+async def create_inventory_record(inventory: InventoryRecordCreate, db: AsyncSession = Depends(get_db)):
     # Check if guard exists
-    guard = db.query(Guard).filter(Guard.contact_number == inventory.guard_contact_number).first()
+    guard = await db.scalar(select(Guard).where(Guard.contact_number == inventory.guard_contact_number))
     if not guard:
         raise HTTPException(status_code=404, detail="Guard not found")
     
     db_inventory = InventoryRecord(**inventory.dict())
     db.add(db_inventory)
-    db.commit()
-    db.refresh(db_inventory)
+    await apply_counter_delta(db, {}, inventory_counts(db_inventory))
+    await db.commit()
+    await db.refresh(db_inventory, ["guard"])
+    await response_cache.invalidate("inventory")
     return db_inventory
 
 @inventory_record.get("/inventory-records/", response_model=List[InventoryRecordResponse])
 async def get_inventory_records(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    sort_by: str = Query("id", pattern="^(id|issue_date)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,item_name,guard.name"),
     guard_contact_number: Optional[int] = None,
     item_type: Optional[str] = None,
     status: Optional[InventoryStatus] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(InventoryRecord)
+    selected = parse_fields(fields, InventoryRecordResponse)
+    if selected:
+        # The guard is only joined if guard or guard.<field> is requested
+        query = select(InventoryRecord).options(*column_options(InventoryRecord, InventoryRecordResponse, selected))
+    else:
+        query = select(InventoryRecord).options(joinedload(InventoryRecord.guard))
     
     if guard_contact_number:
-        query = query.filter(InventoryRecord.guard_contact_number == guard_contact_number)
+        query = query.where(InventoryRecord.guard_contact_number == guard_contact_number)
     if item_type:
-        query = query.filter(InventoryRecord.item_type == item_type)
+        query = query.where(InventoryRecord.item_type == item_type)
     if status:
-        query = query.filter(InventoryRecord.status == status)
+        query = query.where(InventoryRecord.status == status)
     
-    records = query.offset(skip).limit(limit).all()
-    return records
+    descending = order == "desc"
+    keys = [(InventoryRecord.id, descending)]
+    if sort_by == "issue_date":
+        keys.insert(0, (InventoryRecord.issue_date, descending))
+    records = await paginate(db, query, response, keys, f"{sort_by}.{order}", limit, cursor, skip)
+    return list_response(InventoryRecordResponse, selected, records, response)
 
 @inventory_record.get("/inventory-records/{record_id}", response_model=InventoryRecordResponse)
-async def get_inventory_record(record_id: int, db: Session = Depends(get_db)):
-    record = db.query(InventoryRecord).filter(InventoryRecord.id == record_id).first()
+async def get_inventory_record(record_id: int, db: AsyncSession = Depends(get_db)):
+    record = await _get_inventory_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Inventory record not found")
     return record
@@ -54,18 +85,21 @@ async def get_inventory_record(record_id: int, db: Session = Depends(get_db)):
 async def update_inventory_record(
     record_id: int,
     inventory_update: InventoryRecordUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    record = db.query(InventoryRecord).filter(InventoryRecord.id == record_id).first()
+    record = await _get_inventory_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Inventory record not found")
     
+    counts_before = inventory_counts(record)
     for field, value in inventory_update.dict(exclude_unset=True).items():
         setattr(record, field, value)
     
     record.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(record)
+    await apply_counter_delta(db, counts_before, inventory_counts(record))
+    await db.commit()
+    await db.refresh(record)
+    await response_cache.invalidate("inventory")
     return record
 
 @inventory_record.post("/inventory-records/return/{record_id}")
@@ -73,43 +107,46 @@ async def return_inventory_item(
     record_id: int,
     condition: Optional[str] = "good",
     notes: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    record = db.query(InventoryRecord).filter(InventoryRecord.id == record_id).first()
+    record = await _get_inventory_record(db, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Inventory record not found")
     
     if record.status != InventoryStatus.ISSUED:
         raise HTTPException(status_code=400, detail="Item is not currently issued")
     
+    counts_before = inventory_counts(record)
     record.return_date = datetime.utcnow()
     record.status = InventoryStatus.RETURNED
     record.condition_on_return = condition
     if notes:
         record.notes = notes
     record.updated_at = datetime.utcnow()
+    await apply_counter_delta(db, counts_before, inventory_counts(record))
     
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record)
+    await response_cache.invalidate("inventory")
     
     return {"message": "Item returned successfully", "record": record}
 
 @inventory_record.get("/inventory-records/guard/{guard_id}")
-async def get_guard_inventory(guard_id: int, db: Session = Depends(get_db)):
-    guard = db.query(Guard).filter(Guard.id == guard_id).first()
+async def get_guard_inventory(guard_id: int, db: AsyncSession = Depends(get_db)):
+    guard = await db.get(Guard, guard_id)
     if not guard:
         raise HTTPException(status_code=404, detail="Guard not found")
     
     # Get all inventory items for this guard
-    issued_items = db.query(InventoryRecord).filter(
-        InventoryRecord.guard_id == guard_id,
+    issued_items = (await db.scalars(select(InventoryRecord).where(
+        InventoryRecord.guard_contact_number == guard.contact_number,
         InventoryRecord.status == InventoryStatus.ISSUED
-    ).all()
+    ))).all()
     
-    returned_items = db.query(InventoryRecord).filter(
-        InventoryRecord.guard_id == guard_id,
+    returned_items = (await db.scalars(select(InventoryRecord).where(
+        InventoryRecord.guard_contact_number == guard.contact_number,
         InventoryRecord.status == InventoryStatus.RETURNED
-    ).all()
+    ))).all()
     
     return {
         "guard": guard,
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from utils.storage import storage
+import os
+
+media = APIRouter()
+
+
+@media.get("/{key:path}")
+async def serve_media(key: str):
+    """Serve a file stored by the local storage backend.
+
+    FileResponse answers Range requests with 206 partial content and hands the
+    file to the server through the ASGI pathsend extension where the server
+    supports it (zero-copy sendfile); otherwise it streams it in chunks.
+    Object names are content hashes (random for uploads made without a key),
+    so a URL's content never changes; it is cached as private since the
+    route needs a user token.
+    """
+    path = storage.get_backend("local").path_for(key)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path, headers={"Cache-Control": "private, max-age=31536000, immutable"})
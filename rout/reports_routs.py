@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from utils.util import get_db
-from sqlalchemy.orm import  Session 
+from utils.counters import GLOBAL_PERIOD, period_key, read_counters
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select, func
 from datetime import datetime
 from models.guard import Guard, GuardStatus
 from models.salaryrecord import SalaryRecord
@@ -15,60 +18,44 @@ report = APIRouter()
 async def get_monthly_summary(
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # Total guards active in the month
-    total_guards = db.query(Guard).filter(Guard.status == GuardStatus.ACTIVE).count()
-    
-    # Salary summary for the month
-    salary_records = db.query(SalaryRecord).filter(
-        SalaryRecord.month == month,
-        SalaryRecord.year == year
-    ).all()
-    
-    total_salary_paid = sum(record.final_salary for record in salary_records if record.is_paid)
-    total_salary_pending = sum(record.final_salary for record in salary_records if not record.is_paid)
-    
-    # Active assignments in the month
-    active_assignments = db.query(DutyAssignment).filter(
-        DutyAssignment.is_active == True
-    ).count()
-    
-    # Inventory issued in the month
-    inventory_issued = db.query(InventoryRecord).filter(
-        InventoryRecord.issue_date >= datetime(year, month, 1),
-        InventoryRecord.issue_date < datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
-    ).count()
+    counters = await read_counters(db, GLOBAL_PERIOD, period_key(year, month))
+    totals, period = counters[GLOBAL_PERIOD], counters[period_key(year, month)]
     
     return {
         "month": month,
         "year": year,
-        "total_guards": total_guards,
-        "active_assignments": active_assignments,
+        "total_guards": totals["guards_active"],
+        "active_assignments": totals["assignments_active"],
         "salary_summary": {
-            "total_paid": total_salary_paid,
-            "total_pending": total_salary_pending,
-            "records_processed": len(salary_records)
+            "total_paid": period["salary_paid"],
+            "total_pending": period["salary_pending"],
+            "records_processed": period["salary_records"]
         },
-        "inventory_issued": inventory_issued
+        "inventory_issued": period["inventory_issued_in_period"]
     }
 
 @report.get("/client-summary/{client_id}")
-async def get_client_summary(client_id: int, db: Session = Depends(get_db)):
-    client = db.query(Client).filter(Client.id == client_id).first()
+async def get_client_summary(client_id: int, db: AsyncSession = Depends(get_db)):
+    client = await db.get(Client, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
     # Current guards assigned
-    current_assignments = db.query(DutyAssignment).filter(
-        DutyAssignment.client_id == client_id,
-        DutyAssignment.is_active == True
-    ).all()
+    current_assignments = (await db.scalars(
+        select(DutyAssignment)
+        .options(joinedload(DutyAssignment.guard))
+        .where(
+            DutyAssignment.client_contact_number == client.contact_number,
+            DutyAssignment.is_active == True
+        )
+    )).all()
     
     # Historical assignments
-    total_assignments = db.query(DutyAssignment).filter(
-        DutyAssignment.client_id == client_id
-    ).count()
+    total_assignments = await db.scalar(select(func.count(DutyAssignment.id)).where(
+        DutyAssignment.client_contact_number == client.contact_number
+    ))
     
     # Guard details
     guards_info = []
@@ -93,25 +80,28 @@ async def get_client_summary(client_id: int, db: Session = Depends(get_db)):
     }
 
 @report.get("/guard-history/{guard_id}")
-async def get_guard_history(guard_id: int, db: Session = Depends(get_db)):
-    guard = db.query(Guard).filter(Guard.id == guard_id).first()
+async def get_guard_history(guard_id: int, db: AsyncSession = Depends(get_db)):
+    guard = await db.get(Guard, guard_id)
     if not guard:
         raise HTTPException(status_code=404, detail="Guard not found")
     
     # Assignment history
-    assignments = db.query(DutyAssignment).filter(
-        DutyAssignment.guard_id == guard_id
-    ).order_by(DutyAssignment.start_date.desc()).all()
+    assignments = (await db.scalars(
+        select(DutyAssignment)
+        .options(joinedload(DutyAssignment.client))
+        .where(DutyAssignment.guard_contact_number == guard.contact_number)
+        .order_by(DutyAssignment.start_date.desc())
+    )).all()
     
     # Salary history
-    salary_records = db.query(SalaryRecord).filter(
-        SalaryRecord.guard_id == guard_id
-    ).order_by(SalaryRecord.year.desc(), SalaryRecord.month.desc()).all()
+    salary_records = (await db.scalars(select(SalaryRecord).where(
+        SalaryRecord.guard_contact_number == guard.contact_number
+    ).order_by(SalaryRecord.year.desc(), SalaryRecord.month.desc()))).all()
     
     # Inventory history
-    inventory_records = db.query(InventoryRecord).filter(
-        InventoryRecord.guard_id == guard_id
-    ).order_by(InventoryRecord.issue_date.desc()).all()
+    inventory_records = (await db.scalars(select(InventoryRecord).where(
+        InventoryRecord.guard_contact_number == guard.contact_number
+    ).order_by(InventoryRecord.issue_date.desc()))).all()
     
     # Calculate total earnings
     total_earnings = sum(record.final_salary for record in salary_records if record.is_paid)
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from utils.util import get_db
-from sqlalchemy.orm import  Session 
+from utils.counters import apply_counter_delta, salary_counts
+from utils.cache import response_cache
+from utils.pagination import paginate
+from utils.fieldsets import parse_fields, model_columns, list_response
+from utils.payroll import calculate_salary, run_payroll
+from utils.payroll_simulation import load_payroll_arrays, simulate_payroll, simulation_summary
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
 from datetime import datetime
-from utils.pydantic_model import SalaryRecordCreate,SalaryRecordResponse,SalaryRecordUpdate
+from utils.pydantic_model import SalaryRecordCreate,SalaryRecordResponse,SalaryRecordUpdate,PayrollRunRequest,PayrollSimulationRequest
 from models.salaryrecord import SalaryRecord
 from models.guard import Guard
 from typing import List, Optional
@@ -11,89 +19,121 @@ salaryrecord = APIRouter()
 
 
 @salaryrecord.post("/", response_model=SalaryRecordResponse)
-async def create_salary_record(salary: SalaryRecordCreate, db: Session = Depends(get_db)):
+async def create_salary_record(salary: SalaryRecordCreate, db: AsyncSession = Depends(get_db)):
     # 1. Get guard
-    guard = db.query(Guard).filter(Guard.contact_number == salary.guard_contact_number).first()
+    guard = await db.scalar(select(Guard).where(Guard.contact_number == salary.guard_contact_number))
     if not guard:
         raise HTTPException(status_code=404, detail="Guard not found")
 
     # 2. Check duplicate salary record
-    existing = db.query(SalaryRecord).filter(
+    existing = await db.scalar(select(SalaryRecord).where(
         SalaryRecord.guard_contact_number == salary.guard_contact_number,
         SalaryRecord.month == salary.month,
         SalaryRecord.year == salary.year
-    ).first()
+    ).limit(1))
     if existing:
         raise HTTPException(status_code=400, detail="Salary record already exists for this month")
 
-    # 3. Determine uniform deduction amount
-    monthly_deduction = guard.monthly_deduction or 500.0
-    base_salary = guard.current_salary
-    remaining_uniform_amount = guard.uniform_cost - guard.uniform_deducted_amount
-    uniform_deduction = 0.0
-    if remaining_uniform_amount > 0:
-        uniform_deduction = min(monthly_deduction, remaining_uniform_amount)
-        guard.uniform_deducted_amount += uniform_deduction  # Update progress
-
-    # 4. Final salary calculation
-    final_salary = (
-        base_salary -
-        (salary.deductions or 0.0) -
-        uniform_deduction +
-        (salary.bonus or 0.0)
-    )
+    # 3. Uniform deduction and final salary
+    uniform_deduction, final_salary = calculate_salary(guard, salary.deductions, salary.bonus)
+    guard.uniform_deducted_amount = (guard.uniform_deducted_amount or 0.0) + uniform_deduction  # Update progress
 
-    # 5. Create salary record
+    # 4. Create salary record
     db_salary = SalaryRecord(
         **salary.dict(exclude={"uniform_deduction"}),
         uniform_deduction=uniform_deduction,
         final_salary=final_salary
     )
     db.add(db_salary)
-    db.commit()
-    db.refresh(db_salary)
+    await apply_counter_delta(db, {}, salary_counts(db_salary))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Salary record already exists for this month")
+    await db.refresh(db_salary)
+    await response_cache.invalidate("salary", "guard")
 
     return db_salary
 
+@salaryrecord.post("/payroll-run")
+async def payroll_run(payroll: PayrollRunRequest, db: AsyncSession = Depends(get_db)):
+    """Generate the month's salary records for every active guard at once."""
+    summary = await run_payroll(db, payroll.month, payroll.year, dry_run=payroll.dry_run)
+    if summary["records_created"] and not payroll.dry_run:
+        await response_cache.invalidate("salary", "guard")
+    return summary
+
+@salaryrecord.post("/simulate")
+async def simulate_payroll_run(simulation: PayrollSimulationRequest, db: AsyncSession = Depends(get_db)):
+    """Project payroll for active guards under a what-if scenario. Nothing is written."""
+    now = datetime.utcnow()
+    guards = await load_payroll_arrays(db)
+    result = simulate_payroll(
+        guards,
+        months=simulation.months,
+        salary_increase_pct=simulation.salary_increase_pct,
+        monthly_deduction=simulation.monthly_deduction,
+        deductions=simulation.deductions,
+        bonus=simulation.bonus
+    )
+    return simulation_summary(
+        guards,
+        result,
+        start_month=simulation.start_month or now.month,
+        start_year=simulation.start_year or now.year,
+        include_guards=simulation.include_guards
+    )
+
 @salaryrecord.get("/", response_model=List[SalaryRecordResponse])
 async def get_salary_records(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    sort_by: str = Query("id", pattern="^(id|period)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,month,year,final_salary"),
     guard_contact_number: Optional[int] = None,
     month: Optional[int] = None,
     year: Optional[int] = None,
     is_paid: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(SalaryRecord)
+    selected = parse_fields(fields, SalaryRecordResponse)
+    query = select(*model_columns(SalaryRecord, SalaryRecordResponse, selected))
 
     if guard_contact_number:
-        query = query.filter(SalaryRecord.guard_contact_number == guard_contact_number)
+        query = query.where(SalaryRecord.guard_contact_number == guard_contact_number)
     if month:
-        query = query.filter(SalaryRecord.month == month)
+        query = query.where(SalaryRecord.month == month)
     if year:
-        query = query.filter(SalaryRecord.year == year)
+        query = query.where(SalaryRecord.year == year)
     if is_paid is not None:
-        query = query.filter(SalaryRecord.is_paid == is_paid)
+        query = query.where(SalaryRecord.is_paid == is_paid)
     
-    records = query.offset(skip).limit(limit).all()
-    return records
+    descending = order == "desc"
+    keys = [(SalaryRecord.id, descending)]
+    if sort_by == "period":
+        keys[:0] = [(SalaryRecord.year, descending), (SalaryRecord.month, descending)]
+    rows = await paginate(db, query, response, keys, f"{sort_by}.{order}", limit, cursor, skip, entities=False)
+    return list_response(SalaryRecordResponse, selected, rows, response)
 
 @salaryrecord.get("/{contact_number}", response_model=SalaryRecordResponse)
-async def get_salary_record(contact_number: str, db: Session = Depends(get_db)):
-    record = db.query(SalaryRecord).filter(SalaryRecord.guard_contact_number == contact_number).first()
+async def get_salary_record(contact_number: str, db: AsyncSession = Depends(get_db)):
+    record = await db.scalar(select(SalaryRecord).where(SalaryRecord.guard_contact_number == contact_number).limit(1))
     if not record:
         raise HTTPException(status_code=404, detail="Salary record not found")
     return record
 
 @salaryrecord.get("/{record_id}", response_model=SalaryRecordResponse)
-async def get_guard_by_salary_record(record_id: int, db: Session = Depends(get_db)):
+async def get_guard_by_salary_record(record_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        record = db.query(SalaryRecord).filter(SalaryRecord.id == record_id).first()
+        record = await db.get(SalaryRecord, record_id)
         if not record:
             raise HTTPException(status_code=404, detail="Salary record not found")
         
-        guard = db.query(Guard).filter(Guard.contact_number == record.guard_contact_number).first()
+        guard = await db.scalar(select(Guard).where(Guard.contact_number == record.guard_contact_number))
         if not guard:
             raise HTTPException(status_code=404, detail="Guard not found")
         
@@ -106,15 +146,16 @@ async def get_guard_by_salary_record(record_id: int, db: Session = Depends(get_d
 async def update_salary_record(
     contact_number: str,
     salary_update: SalaryRecordUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    guard = db.query(Guard).filter(Guard.contact_number == contact_number).first()
+    guard = await db.scalar(select(Guard).where(Guard.contact_number == contact_number))
     if not guard:
         raise HTTPException(status_code=404, detail="Guard not found")
-    record = db.query(SalaryRecord).filter(SalaryRecord.guard_contact_number == contact_number).first()
+    record = await db.scalar(select(SalaryRecord).where(SalaryRecord.guard_contact_number == contact_number).limit(1))
     if not record:
         raise HTTPException(status_code=404, detail="Salary record not found")
     
+    counts_before = salary_counts(record)
     for field, value in salary_update.dict(exclude_unset=True).items():
         setattr(record, field, value)
     
@@ -127,25 +168,28 @@ async def update_salary_record(
 )
     
     record.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(record)
+    await apply_counter_delta(db, counts_before, salary_counts(record))
+    await db.commit()
+    await db.refresh(record)
+    await response_cache.invalidate("salary")
     return record
 
 @salaryrecord.put("/by-id/{record_id}", response_model=SalaryRecordResponse)
 async def update_salary_record_by_id(
     record_id: int,
     salary_update: SalaryRecordUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    record = db.query(SalaryRecord).filter(SalaryRecord.id == record_id).first()
+    record = await db.get(SalaryRecord, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Salary record not found")
 
+    counts_before = salary_counts(record)
     for field, value in salary_update.dict(exclude_unset=True).items():
         setattr(record, field, value)
 
     # Recalculate final salary
-    guard = db.query(Guard).filter(Guard.contact_number == record.guard_contact_number).first()
+    guard = await db.scalar(select(Guard).where(Guard.contact_number == record.guard_contact_number))
     if guard:
         record.final_salary = (
             (guard.current_salary or 0.0)
@@ -155,17 +199,21 @@ async def update_salary_record_by_id(
         )
 
     record.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(record)
+    await apply_counter_delta(db, counts_before, salary_counts(record))
+    await db.commit()
+    await db.refresh(record)
+    await response_cache.invalidate("salary")
     return record
 
 @salaryrecord.delete("/{record_id}")
-async def delete_salary_record(record_id: int, db: Session = Depends(get_db)):
-    record = db.query(SalaryRecord).filter(SalaryRecord.id == record_id).first()
+async def delete_salary_record(record_id: int, db: AsyncSession = Depends(get_db)):
+    record = await db.get(SalaryRecord, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Salary record not found")
-    db.delete(record)
-    db.commit()
+    await apply_counter_delta(db, salary_counts(record), {})
+    await db.delete(record)
+    await db.commit()
+    await response_cache.invalidate("salary")
     return {"message": "Salary record deleted successfully"}
 
 # @salaryrecord.get("/stat")
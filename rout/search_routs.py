@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from utils.util import get_db
-from sqlalchemy.orm import  Session 
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import select, func, and_
+from utils.search import text_match, relevance
+from utils.autocomplete import autocomplete_index, AUTOCOMPLETE_MAX_LIMIT
+from utils.pagination import paginate
 from datetime import datetime
 from utils.pydantic_model import SalaryRecordCreate,SalaryRecordResponse,SalaryRecordUpdate
 from models.dutyassignment import DutyAssignment, DutyStatus
@@ -10,100 +15,175 @@ from typing import Optional
 
 search = APIRouter()
 
+SEARCH_MAX_LIMIT = 200
+
+
 @search.get("/guards")
 async def search_guards_advanced(
+    response: Response,
     name: Optional[str] = None,
     contact: Optional[str] = None,
     status: Optional[GuardStatus] = None,
     client_name: Optional[str] = None,
     available_only: Optional[bool] = False,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Guard)
+    # Guards with their active assignment (at most one, see uq_duty_assignments_active_guard)
+    # and its client, in one query
+    query = (
+        select(
+            Guard.id,
+            Guard.name,
+            Guard.contact_number,
+            Guard.status,
+            DutyAssignment.id.label("assignment_id"),
+            DutyAssignment.duty_status,
+            DutyAssignment.start_date,
+            Client.name.label("client_name")
+        )
+        .outerjoin(DutyAssignment, and_(
+            DutyAssignment.guard_contact_number == Guard.contact_number,
+            DutyAssignment.is_active == True
+        ))
+        .outerjoin(Client, Client.contact_number == DutyAssignment.client_contact_number)
+    )
     
     if name:
-        query = query.filter(Guard.name.ilike(f"%{name}%"))
+        query = query.where(await text_match(db, name, Guard.name))
     if contact:
-        query = query.filter(Guard.contact_number.ilike(f"%{contact}%"))
+        query = query.where(await text_match(db, contact, Guard.contact_number))
     if status:
-        query = query.filter(Guard.status == status)
+        query = query.where(Guard.status == status)
     
     if client_name:
-        query = query.join(DutyAssignment).join(Client).filter(
-            Client.name.ilike(f"%{client_name}%"),
-            DutyAssignment.is_active == True
-        )
+        query = query.where(await text_match(db, client_name, Client.name))
     
     if available_only:
         # Guards without active assignments
-        query = query.filter(
-            ~Guard.duty_assignments.any(DutyAssignment.is_active == True)
-        )
+        query = query.where(DutyAssignment.id.is_(None))
     
-    guards = query.all()
+    if name:
+        # Best matches first
+        keys, order = [(relevance(db, name, Guard.name), True), (Guard.id, False)], "relevance"
+    else:
+        keys, order = [(Guard.id, False)], "id"
+    
+    filters = {
+        "name": name, "contact": contact, "status": status,
+        "client_name": client_name, "available_only": available_only
+    }
+    rows = await paginate(db, query, response, keys, order, limit, cursor, entities=False, filters=filters)
     
-    # Enhance with current assignment info
     result = []
-    for guard in guards:
-        current_assignment = db.query(DutyAssignment).filter(
-            DutyAssignment.guard_contact_number == guard.contact_number,
-            DutyAssignment.is_active == True
-        ).first()
-        
+    for row in rows:
         guard_info = {
-            "id": guard.id,
-            "name": guard.name,
-            "contact_number": guard.contact_number,
-            "status": guard.status,
+            "id": row.id,
+            "name": row.name,
+            "contact_number": row.contact_number,
+            "status": row.status,
             "current_assignment": None
         }
         
-        if current_assignment:
+        if row.assignment_id is not None:
             guard_info["current_assignment"] = {
-                "client_name": current_assignment.client.name,
-                "duty_status": current_assignment.duty_status,
-                "start_date": current_assignment.start_date
+                "client_name": row.client_name,
+                "duty_status": row.duty_status,
+                "start_date": row.start_date
             }
         
         result.append(guard_info)
     
     return result
 
+@search.get("/autocomplete")
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    type: Optional[str] = Query(None, pattern="^(guard|client)$"),
+    limit: int = Query(10, ge=1, le=AUTOCOMPLETE_MAX_LIMIT)
+):
+    """Typeahead over guard/client names, company names and contact numbers, served from memory."""
+    return autocomplete_index.lookup(q, limit, types=(type,) if type else None)
+
+@search.get("/autocomplete/stats")
+async def autocomplete_stats():
+    return autocomplete_index.stats()
+
 @search.get("/clients")
 async def search_clients_advanced(
+    response: Response,
     name: Optional[str] = None,
     contact: Optional[str] = None,
     with_active_guards: Optional[bool] = False,
-    db: Session = Depends(get_db)
+    sort_by: Optional[str] = Query(None, pattern="^(relevance|name|active_guards)$"),
+    order: Optional[str] = Query(None, pattern="^(asc|desc)$"),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Client)
+    # Active guard count per client, computed once for all matched clients
+    active_counts = (
+        select(
+            DutyAssignment.client_contact_number,
+            func.count(DutyAssignment.id).label("active_guards_count")
+        )
+        .where(DutyAssignment.is_active == True)
+        .group_by(DutyAssignment.client_contact_number)
+        .subquery()
+    )
+    active_guards_count = func.coalesce(active_counts.c.active_guards_count, 0)
+    
+    query = (
+        select(
+            Client.id,
+            Client.name,
+            Client.contact_number,
+            Client.contact_person,
+            active_guards_count.label("active_guards_count")
+        )
+        .outerjoin(active_counts, active_counts.c.client_contact_number == Client.contact_number)
+    )
     
     if name:
-        query = query.filter(Client.name.ilike(f"%{name}%"))
+        query = query.where(await text_match(db, name, Client.name))
     if contact:
-        query = query.filter(Client.contact_number.ilike(f"%{contact}%"))
+        query = query.where(await text_match(db, contact, Client.contact_number))
     
     if with_active_guards:
-        query = query.join(DutyAssignment).filter(DutyAssignment.is_active == True).distinct()
+        query = query.where(active_guards_count > 0)
     
-    clients = query.all()
+    sort_by = sort_by or ("relevance" if name else "id")
+    if sort_by == "relevance" and name:
+        sort_key = relevance(db, name, Client.name)
+        descending = order != "asc"
+    elif sort_by == "active_guards":
+        sort_key = active_guards_count
+        descending = order != "asc"
+    elif sort_by == "name":
+        sort_key = Client.name
+        descending = order == "desc"
+    else:
+        sort_by = "id"
+        sort_key = Client.id
+        descending = order == "desc"
+    keys = [(sort_key, descending), (Client.id, False)] if sort_by != "id" else [(Client.id, descending)]
     
-    result = []
-    for client in clients:
-        active_guards = db.query(DutyAssignment).filter(
-            DutyAssignment.client_contact_number == client.contact_number,
-            DutyAssignment.is_active == True
-        ).count()
-        
-        result.append({
-            "id": client.id,
-            "name": client.name,
-            "contact_number": client.contact_number,
-            "contact_person"
-            "active_guards_count": active_guards
-        })
+    sort_order = f"{sort_by}.{'desc' if descending else 'asc'}"
+    filters = {"name": name, "contact": contact, "with_active_guards": with_active_guards}
+    rows = await paginate(db, query, response, keys, sort_order, limit, cursor, skip, entities=False, filters=filters)
     
-    return result
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "contact_number": row.contact_number,
+            "contact_person": row.contact_person,
+            "active_guards_count": row.active_guards_count
+        }
+        for row in rows
+    ]
 
 @search.get("/assignments")
 async def search_assignments_advanced(
@@ -111,20 +191,27 @@ async def search_assignments_advanced(
     guard_name: Optional[str] = None,
     duty_status: Optional[DutyStatus] = None,
     active_only: Optional[bool] = False,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(DutyAssignment).join(Client).join(Guard)
+    query = (
+        select(DutyAssignment)
+        .join(DutyAssignment.client)
+        .join(DutyAssignment.guard)
+        .options(contains_eager(DutyAssignment.client), contains_eager(DutyAssignment.guard))
+    )
     
-    if client_name:
-        query = query.filter(Client.name.ilike(f"%{client_name}%"))
     if guard_name:
-        query = query.filter(Guard.name.ilike(f"%{guard_name}%"))
+        query = query.where(await text_match(db, guard_name, Guard.name))
+        query = query.order_by(relevance(db, guard_name, Guard.name).desc())
+    if client_name:
+        query = query.where(await text_match(db, client_name, Client.name))
+        query = query.order_by(relevance(db, client_name, Client.name).desc())
     if duty_status:
-        query = query.filter(DutyAssignment.duty_status == duty_status)
+        query = query.where(DutyAssignment.duty_status == duty_status)
     if active_only:
-        query = query.filter(DutyAssignment.is_active == True)
+        query = query.where(DutyAssignment.is_active == True)
     
-    assignments = query.all()
+    assignments = (await db.scalars(query.order_by(DutyAssignment.id))).all()
     
     result = []
     for a in assignments:
@@ -1,15 +1,20 @@
 from fastapi import  APIRouter, HTTPException,Depends 
 from models.auth import User
 from utils.pydantic_model import UserResponse,UserCreate,Token,LoginRequest
-from utils.util import hash_password, verify_password,create_access_token,get_db
+from utils.util import create_access_token,get_db
+from utils.passwords import password_hasher, PasswordPoolBusy
+from utils.auth import get_current_user, revoke_tokens
 from datetime import timedelta
 from dotenv import load_dotenv
-from sqlalchemy.orm import  Session 
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 import os
 
 load_dotenv()
 
 ACCESS_TOKEN_EXPIRE_MINUTES= int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES",120))
+# Seconds a client should wait before retrying when the password pool is saturated
+PASSWORD_RETRY_AFTER = 1
 
 
 
@@ -19,24 +24,24 @@ auth= APIRouter()
 
 
 @auth.post("/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     try:
         # Check if user already exists
-        if db.query(User).filter(User.username == user.username).first():
+        if await db.scalar(select(User).where(User.username == user.username)):
             raise HTTPException(status_code=400, detail="Username already registered")
-        if db.query(User).filter(User.email == user.email).first():
+        if await db.scalar(select(User).where(User.email == user.email)):
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create new user
-        hashed_password = hash_password(user.password)
+        hashed_password = await password_hasher.hash(user.password)
         db_user = User(
             username=user.username,
             email=user.email,
             hashed_password=hashed_password,
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         return UserResponse(
             id=str(db_user.id),
@@ -45,22 +50,40 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
             is_active=db_user.is_active,
             created_at=db_user.created_at
         )
+    except HTTPException:
+        raise
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": str(PASSWORD_RETRY_AFTER)})
     except Exception as e:
         print("error in register user",e)
         raise HTTPException(status_code=500, detail="Failed to register user")
 
 @auth.post("/login", response_model=Token)
-async def login(data: LoginRequest, db: Session = Depends(get_db)):
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_db)):
     try:
-        user = db.query(User).filter(User.email == data.email).first()
-        if not user or not verify_password(data.password, user.hashed_password):
+        user = await db.scalar(select(User).where(User.email == data.email))
+        if not user or not await password_hasher.verify(data.password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Incorrect email or password")
+        if password_hasher.needs_rehash(user.hashed_password):
+            # BCRYPT_ROUNDS changed since this hash was made; upgrade it while the password is at hand
+            user.hashed_password = await password_hasher.rehash(data.password)
+            await db.commit()
 
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": str(user.id)}, expires_delta=access_token_expires
+            data={"sub": str(user.id), "ver": user.token_version}, expires_delta=access_token_expires
         )
         return {"access_token": access_token, "token_type": "bearer", "data": {"user_id": str(user.id)}}
+    except HTTPException:
+        raise
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": str(PASSWORD_RETRY_AFTER)})
     except Exception as e:
         print("error in login user", e)
-        raise HTTPException(status_code=500, detail="user login failed")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="user login failed")
+
+@auth.post("/revoke")
+async def revoke(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """Sign out everywhere: every token issued to the current user so far stops working."""
+    await revoke_tokens(db, current_user.id)
+    return {"message": "All tokens revoked"}
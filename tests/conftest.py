@@ -0,0 +1,148 @@
+"""The app on a throwaway SQLite database, with a logged-in TestClient.
+
+config.database and the utils modules read their settings at import, so
+the environment is set up here before anything from the app is imported.
+Every test starts from empty tables and empty in-process caches.
+"""
+import asyncio
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="security-system-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_workdir}/test.db",
+    "SECRET_KEY": "test-secret-key-long-enough-for-hs256-signatures",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "BCRYPT_ROUNDS": "4",
+    # Every read reaches the database, so query counts are worst cases
+    "CACHE_BACKEND": "none",
+    "RATE_LIMIT_BACKEND": "none",
+    "STORAGE_BACKEND": "fake",
+    "STORAGE_LOCAL_ROOT": os.path.join(_workdir, "media"),
+    "AUTOCOMPLETE_REFRESH_SECONDS": "0",
+    "DB_POOL_SIZE": "2",
+    "DB_MAX_OVERFLOW": "2",
+    "DB_POOL_TIMEOUT": "10",
+})
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from models.base import Base
+import models  # noqa: F401  registers every table on Base.metadata
+from main import app
+from config.database import engine, SessionLocal
+from utils.auth import cached_users, verified_tokens
+from utils.autocomplete import autocomplete_index, PrefixIndex
+from utils.search import search_indexes
+from utils.upload_outbox import upload_worker
+
+# Schema setup and seeding outside the app's event loop
+sync_engine = create_engine(os.environ["DATABASE_URL"])
+
+GUARD_IMAGES = ("image", "cnic_front_image", "cnic_back_image")
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.drop_all(sync_engine)
+    Base.metadata.create_all(sync_engine)
+    cached_users._entries.clear()
+    verified_tokens._entries.clear()
+    search_indexes.indexes = None
+    autocomplete_index.index, autocomplete_index.generation = PrefixIndex(), None
+    yield sync_engine
+
+
+@pytest.fixture
+def anonymous_client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def client(anonymous_client):
+    credentials = {"email": "admin@example.com", "password": "correct horse"}
+    anonymous_client.post("/auth/register", json={"username": "admin", **credentials}).raise_for_status()
+    token = anonymous_client.post("/auth/login", json=credentials).json()["access_token"]
+    anonymous_client.headers["Authorization"] = f"Bearer {token}"
+    return anonymous_client
+
+
+class Seed:
+    """Creates rows through the API, so counters and indexes stay consistent."""
+
+    def __init__(self, http: TestClient):
+        self.http = http
+
+    def _post(self, path: str, **kwargs) -> dict:
+        response = self.http.post(path, **kwargs)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def guard(self, contact_number: str, name: str = None, **fields) -> dict:
+        files = {image: (f"{image}.jpg", f"{contact_number}-{image}".encode(), "image/jpeg") for image in GUARD_IMAGES}
+        data = {"name": name or f"Guard {contact_number}", "contact_number": contact_number, **fields}
+        return self._post("/guard/", data=data, files=files)
+
+    def client(self, contact_number: str, name: str = None, **fields) -> dict:
+        payload = {"name": name or f"Client {contact_number}", "contact_number": contact_number, "contract_rate": 30000}
+        return self._post("/client/", json={**payload, **fields})
+
+    def assignment(self, guard_contact_number: str, client_contact_number: str, **fields) -> dict:
+        payload = {
+            "guard_contact_number": guard_contact_number,
+            "client_contact_number": client_contact_number,
+            "start_date": "2026-01-01T08:00:00",
+        }
+        return self._post("/dutyassignment/", json={**payload, **fields})
+
+    def salary(self, guard_contact_number: str, month: int = 5, year: int = 2026, **fields) -> dict:
+        payload = {"guard_contact_number": guard_contact_number, "month": month, "year": year}
+        return self._post("/salaryrecord/", json={**payload, **fields})
+
+    def inventory(self, guard_contact_number: str, **fields) -> dict:
+        payload = {
+            "guard_contact_number": guard_contact_number,
+            "item_name": "Uniform",
+            "item_type": "uniform",
+            "issue_date": "2026-05-02T09:00:00",
+            "cost": 4000,
+        }
+        return self._post("/inventory/", json={**payload, **fields})
+
+
+@pytest.fixture
+def seed(client):
+    return Seed(client)
+
+
+def concurrently(http: TestClient, requests: list) -> list:
+    """Send every (method, path, kwargs) request at once; the responses in order.
+
+    TestClient handles one request at a time, so this goes through an
+    AsyncClient on the same app with the same headers. The pool's wait
+    queue binds to the loop of its first waiter, so it is disposed before
+    this loop closes.
+    """
+    async def send_all():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=http.headers) as ac:
+                return await asyncio.gather(*(ac.request(method, path, **kwargs) for method, path, kwargs in requests))
+        finally:
+            await engine.dispose()
+    return asyncio.run(send_all())
+
+
+def drain_uploads():
+    """Run the upload worker over every due job, as the app's background tasks would."""
+    async def drain():
+        upload_worker._session_factory = SessionLocal
+        try:
+            for job_id in await upload_worker.claim(100):
+                await upload_worker.process(job_id)
+        finally:
+            await engine.dispose()
+    asyncio.run(drain())
@@ -0,0 +1,58 @@
+import asyncio
+import jwt
+from datetime import timedelta
+from config.database import engine, SessionLocal
+from utils.auth import verified_tokens, cached_users, load_user, revoke_tokens
+from utils.util import create_access_token
+
+CREDENTIALS = {"email": "admin@example.com", "password": "correct horse"}
+
+
+def test_revoked_token_stops_working(client):
+    token = client.headers["Authorization"]
+    assert client.get("/guard/").status_code == 200  # claims and user row now cached
+
+    assert client.post("/auth/revoke").status_code == 200
+    response = client.get("/guard/")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+    fresh = client.post("/auth/login", json=CREDENTIALS).json()["access_token"]
+    assert f"Bearer {fresh}" != token
+    assert client.get("/guard/", headers={"Authorization": f"Bearer {fresh}"}).status_code == 200
+
+
+def test_revoke_evicts_the_cached_user_after_committing(client):
+    """A request reloading the user while the revocation commits cannot cache the old token_version."""
+    user_id = int(jwt.decode(client.headers["Authorization"].split()[1], options={"verify_signature": False})["sub"])
+
+    async def revoke_during_a_reload():
+        try:
+            async with SessionLocal() as db:
+                commit = db.commit
+
+                async def commit_after_concurrent_reload():
+                    cached_users.pop(user_id)
+                    assert (await load_user(user_id)).token_version == 0
+                    await commit()
+
+                db.commit = commit_after_concurrent_reload
+                await revoke_tokens(db, user_id)
+            return (await load_user(user_id)).token_version
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(revoke_during_a_reload()) == 1
+    assert client.get("/guard/").status_code == 401
+
+
+def test_expired_token_is_rejected_even_when_cached(client):
+    user_id = jwt.decode(client.headers["Authorization"].split()[1], options={"verify_signature": False})["sub"]
+    token = create_access_token({"sub": user_id, "ver": 0}, expires_delta=timedelta(seconds=-1))
+    # As if it was cached before the wall clock passed its exp
+    verified_tokens.set(token, jwt.decode(token, options={"verify_signature": False}), 3600)
+
+    response = client.get("/guard/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has expired"
+    assert verified_tokens.get(token) is None
@@ -0,0 +1,139 @@
+import asyncio
+from sqlalchemy import update
+from sqlalchemy.sql import Select
+from config.database import engine, SessionLocal
+from models.client import Client
+from models.dashboardcounter import DashboardCounter
+from models.guard import Guard
+from utils.autocomplete import autocomplete_index, PrefixIndex
+
+
+def guard(id: int, name: str, contact_number: str) -> Guard:
+    return Guard(id=id, name=name, contact_number=contact_number)
+
+
+def client(id: int, name: str, contact_number: str, company_name: str) -> Client:
+    return Client(id=id, name=name, contact_number=contact_number, company_name=company_name)
+
+
+def labels(results: list) -> list:
+    return [(item["type"], item["id"]) for item in results]
+
+
+def test_lookup_orders_by_key_then_entity():
+    index = PrefixIndex.from_objects([guard(2, "Ali Raza", "0300"), guard(1, "Ali Khan", "0301")])
+    index.add(client(1, "Ali Raza", "0302", "Raza Security"))
+    index.add(guard(3, "Ali Khan", "0303"))
+    assert index.keys == sorted(index.keys)
+
+    # Equal keys fall back to the (type, id) order, wherever the entity was added
+    assert labels(index.lookup("ali")) == [("guard", 1), ("guard", 3), ("client", 1), ("guard", 2)]
+    assert labels(index.lookup("ali", types=("guard",), limit=2)) == [("guard", 1), ("guard", 3)]
+
+    index.discard(("guard", 3))
+    index.discard(("guard", 3))
+    assert labels(index.lookup("ali khan")) == [("guard", 1)]
+    assert ("guard", 3) not in index.refs and len(index.keys) == len(index.refs)
+
+
+def test_re_adding_an_entity_replaces_its_keys():
+    index = PrefixIndex()
+    index.add(guard(1, "Ali Khan", "0300"))
+    index.add(guard(1, "Bilal Ahmed", "0300"))
+    assert index.lookup("ali") == [] and index.lookup("khan") == []
+    assert labels(index.lookup("bilal")) == [("guard", 1)]
+    assert index.keys.count("0300") == 1
+
+
+def test_matches_word_suffixes_company_names_and_phone_digits():
+    index = PrefixIndex.from_objects([
+        guard(1, "Muhammad  Ali Khan", "+92 (300) 123-4567"),
+        client(1, "Zain Traders", "042-111-222", "Shield Security Services"),
+    ])
+    assert labels(index.lookup("kh")) == [("guard", 1)]
+    assert labels(index.lookup("ALI  k")) == [("guard", 1)]
+    assert labels(index.lookup("security")) == [("client", 1)]
+    assert labels(index.lookup("tra")) == [("client", 1)]
+    # Phone-like queries also match on the digits alone, whatever the formatting
+    assert labels(index.lookup("92 300-12")) == [("guard", 1)]
+    assert labels(index.lookup("042111")) == [("client", 1)]
+    assert index.lookup("300") == []
+    assert index.lookup("zain")[0] == {
+        "type": "client", "id": 1, "label": "Zain Traders",
+        "contact_number": "042-111-222", "company_name": "Shield Security Services",
+    }
+
+
+def build_during(writes):
+    """Rebuild the index, making `writes()` once the guards have been read from the database."""
+    async def main():
+        try:
+            async with SessionLocal() as db:
+                execute = db.execute
+
+                async def execute_then_write(statement, *args, **kwargs):
+                    result = await execute(statement, *args, **kwargs)
+                    if isinstance(statement, Select) and statement.selected_columns[0].table.name == "guards":
+                        writes()
+                    return result
+
+                db.execute = execute_then_write
+                await autocomplete_index.build(db)
+        finally:
+            await engine.dispose()
+    asyncio.run(main())
+
+
+def test_writes_during_a_rebuild_are_replayed_onto_the_new_index(seed):
+    seed.guard("g1", name="Ali Khan")
+    seed.guard("g2", name="Bilal Ahmed")
+
+    def writes():
+        # Committed after the snapshot was read, as another request would
+        autocomplete_index.update(guard(1, "Ali Raza", "g1"))
+        autocomplete_index.remove(guard(2, "Bilal Ahmed", "g2"))
+        autocomplete_index.update(guard(3, "Danish Iqbal", "g3"))
+
+    build_during(writes)
+    assert autocomplete_index._pending is None
+    assert autocomplete_index.lookup("khan") == []
+    assert labels(autocomplete_index.lookup("raza")) == [("guard", 1)]
+    assert autocomplete_index.lookup("bilal") == []
+    assert labels(autocomplete_index.lookup("danish")) == [("guard", 3)]
+
+
+def refresh():
+    async def main():
+        try:
+            async with SessionLocal() as db:
+                await autocomplete_index.refresh(db)
+        finally:
+            await engine.dispose()
+    asyncio.run(main())
+
+
+def test_refresh_only_rebuilds_after_another_workers_write(client, seed, database):
+    seed.guard("g1", name="Ali Khan")
+    refresh()
+    rebuilds = autocomplete_index.rebuilds
+    stats = client.get("/search/autocomplete/stats").json()
+    assert stats["entities"] == 1 and stats["memory_bytes"] == autocomplete_index.index.memory_bytes()
+
+    # This worker's own writes are applied in place and counted in its generation
+    seed.guard("g2", name="Bilal Ahmed")
+    client.put("/guard/1", data={"name": "Ali Raza"}).raise_for_status()
+    refresh()
+    assert autocomplete_index.rebuilds == rebuilds
+    assert labels(autocomplete_index.lookup("raza")) == [("guard", 1)]
+
+    # Another worker's: only the database knows, through the generation it bumped
+    with database.begin() as conn:
+        conn.execute(update(Guard).where(Guard.id == 2).values(name="Bilal Raza"))
+        conn.execute(
+            update(DashboardCounter)
+            .where(DashboardCounter.period == "all")
+            .values(search_generation=DashboardCounter.search_generation + 1)
+        )
+    refresh()
+    assert autocomplete_index.rebuilds == rebuilds + 1
+    assert labels(autocomplete_index.lookup("raza")) == [("guard", 1), ("guard", 2)]
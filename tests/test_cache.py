@@ -0,0 +1,135 @@
+import pytest
+from utils import cache
+from utils.cache import response_cache, MemoryCacheBackend, ResponseCache
+from utils.querycount import assert_max_queries
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    """The response cache on a fresh memory backend, for this test only."""
+    backend = MemoryCacheBackend(max_entries=100)
+    monkeypatch.setattr(response_cache, "backend", backend)
+    monkeypatch.setattr(response_cache, "route_ttls", {})
+    monkeypatch.setattr(response_cache, "hits", 0)
+    monkeypatch.setattr(response_cache, "misses", 0)
+    return backend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def get(client, path: str, **params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_repeated_get_is_served_from_the_cache(client, seed, memory_cache):
+    seed.guard("g1")
+    first = get(client, "/guard/").json()
+    with assert_max_queries(0):
+        second = get(client, "/guard/").json()
+    assert second == first
+    assert (response_cache.hits, response_cache.misses) == (1, 1)
+
+
+ROUTES = {
+    "guard.list": ("/guard/", {"guard"}),
+    "client.list": ("/client/", {"client"}),
+    "stat.overview": ("/stat/overview", {"guard", "client", "duty_assignment"}),
+    "dutyassignment.client_guards": ("/dutyassignment/client-guard-assignment/c1", {"guard", "client", "duty_assignment"}),
+}
+WRITES = {
+    "guard": lambda seed: seed.guard("g9"),
+    "client": lambda seed: seed.client("c9"),
+    "duty_assignment": lambda seed: seed.assignment("g2", "c1"),
+}
+
+
+@pytest.mark.parametrize("write", WRITES)
+@pytest.mark.parametrize("route", ROUTES)
+def test_writes_invalidate_the_routes_tagged_with_them(client, seed, memory_cache, route, write):
+    path, tags = ROUTES[route]
+    seed.guard("g1")
+    seed.guard("g2")
+    seed.client("c1")
+    seed.assignment("g1", "c1")
+    before = get(client, path).json()
+    assert get(client, path).json() == before and response_cache.hits == 1
+
+    WRITES[write](seed)
+    after = get(client, path).json()
+    if write in tags:
+        # Recomputed from the database
+        assert response_cache.misses == 2
+    else:
+        assert response_cache.misses == 1
+        assert after == before
+
+
+def test_route_ttls_come_from_cache_route_ttls(client, seed, memory_cache, clock, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(cache, "CACHE_ROUTE_TTLS", "stat.overview=2, guard.list=60")
+    configured = ResponseCache.from_env()
+    assert configured.route_ttls == {"stat.overview": 2.0, "guard.list": 60.0}
+    monkeypatch.setattr(response_cache, "route_ttls", configured.route_ttls)
+
+    for path in ("/stat/overview", "/guard/", "/client/"):
+        get(client, path)
+    clock.now += 2
+    for path in ("/stat/overview", "/guard/", "/client/"):
+        get(client, path)
+    # Only the 2 second entry expired; client.list has the default TTL
+    assert memory_cache.expirations == 1
+    assert (response_cache.hits, response_cache.misses) == (2, 4)
+
+    clock.now += response_cache.default_ttl
+    get(client, "/guard/")
+    get(client, "/client/")
+    assert memory_cache.expirations == 2
+    assert response_cache.hits == 3
+
+
+def test_least_recently_used_entry_is_evicted_at_capacity(client, seed, monkeypatch):
+    backend = MemoryCacheBackend(max_entries=2)
+    monkeypatch.setattr(response_cache, "backend", backend)
+    monkeypatch.setattr(response_cache, "hits", 0)
+    monkeypatch.setattr(response_cache, "misses", 0)
+    seed.guard("g1")
+
+    get(client, "/guard/", limit=1)
+    get(client, "/guard/", limit=2)
+    get(client, "/guard/", limit=1)  # hit; limit=2 is now the least recently used
+    get(client, "/guard/", limit=3)
+    assert backend.evictions == 1 and backend.stats()["entries"] == 2
+
+    get(client, "/guard/", limit=1)
+    assert response_cache.hits == 2
+    get(client, "/guard/", limit=2)
+    assert response_cache.misses == 4
+
+
+def test_cached_page_replays_the_next_cursor(client, seed, memory_cache):
+    for contact_number in ("g1", "g2", "g3"):
+        seed.guard(contact_number)
+
+    first = get(client, "/guard/", limit=2)
+    cached = get(client, "/guard/", limit=2)
+    assert response_cache.hits == 1
+    assert cached.json() == first.json()
+    assert cached.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+
+    rest = get(client, "/guard/", limit=2, cursor=cached.headers["x-next-cursor"]).json()
+    assert [guard["contact_number"] for guard in rest] == ["g3"]
@@ -0,0 +1,82 @@
+import sqlite3
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from conftest import concurrently
+from models.dashboardcounter import DashboardCounter
+from models.dutyassignment import DutyAssignment
+from rout.duty_assignments_routs import _is_active_assignment_conflict
+
+
+def active_assignments(engine, guard_contact_number: str) -> list:
+    with Session(engine) as session:
+        return session.scalars(
+            select(DutyAssignment.client_contact_number)
+            .where(DutyAssignment.guard_contact_number == guard_contact_number, DutyAssignment.is_active == True)
+        ).all()
+
+
+def test_concurrent_reassigns_leave_one_active_assignment(client, seed, database):
+    seed.guard("g1")
+    clients = [f"c{i}" for i in range(8)]
+    for contact_number in clients:
+        seed.client(contact_number)
+    seed.assignment("g1", "c0")
+
+    responses = concurrently(client, [
+        ("POST", "/dutyassignment/reassign/g1",
+         {"json": {"guard_contact_number": "g1", "new_client_contact_number": contact_number, "company_name": None}})
+        for contact_number in clients[1:] * 3
+    ])
+
+    assert {response.status_code for response in responses} <= {200, 409}, [r.text for r in responses]
+    assert any(response.status_code == 200 for response in responses)
+    assert len(active_assignments(database, "g1")) == 1
+    with Session(database) as session:
+        assert session.get(DashboardCounter, "all").assignments_active == 1
+        assert session.scalar(select(func.count()).select_from(DutyAssignment)) == 1 + sum(
+            response.status_code == 200 for response in responses
+        )
+
+
+def test_concurrent_creates_for_one_guard(client, seed, database):
+    seed.guard("g1")
+    seed.client("c1")
+    seed.client("c2")
+
+    responses = concurrently(client, [
+        ("POST", "/dutyassignment/",
+         {"json": {"guard_contact_number": "g1", "client_contact_number": f"c{i % 2 + 1}", "start_date": "2026-03-01T08:00:00"}})
+        for i in range(10)
+    ])
+
+    assert {response.status_code for response in responses} <= {200, 409}, [r.text for r in responses]
+    assert len(active_assignments(database, "g1")) == 1
+
+
+def integrity_error(orig) -> IntegrityError:
+    return IntegrityError("INSERT INTO duty_assignments ...", {}, orig)
+
+
+class PostgresError(Exception):
+    def __init__(self, message, sqlstate):
+        super().__init__(message)
+        self.sqlstate = sqlstate
+
+
+def test_only_the_active_assignment_index_counts_as_a_conflict():
+    assert _is_active_assignment_conflict(integrity_error(
+        sqlite3.IntegrityError("UNIQUE constraint failed: duty_assignments.guard_contact_number")
+    ))
+    assert _is_active_assignment_conflict(integrity_error(PostgresError(
+        'duplicate key value violates unique constraint "uq_duty_assignments_active_guard"', "23505"
+    )))
+    assert not _is_active_assignment_conflict(integrity_error(
+        sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+    ))
+    assert not _is_active_assignment_conflict(integrity_error(PostgresError(
+        'insert or update on table "duty_assignments" violates foreign key constraint', "23503"
+    )))
+    assert not _is_active_assignment_conflict(integrity_error(PostgresError(
+        'duplicate key value violates unique constraint "duty_assignments_pkey"', "23505"
+    )))
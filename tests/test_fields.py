@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from config.database import engine, SessionLocal
+from models.inventoryrecord import InventoryRecord
+from utils.fieldsets import column_options
+from utils.pydantic_model import InventoryRecordResponse
+from utils.querycount import assert_max_queries
+
+
+def get(client, path: str, **params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.parametrize("path, fields", [
+    ("/guard/", "id,name,status"),
+    ("/client/", "contact_number,name"),
+    ("/salaryrecord/", "final_salary,month"),
+    ("/dutyassignment/", "guard_contact_number,duty_status"),
+])
+def test_projection_returns_only_the_requested_keys(client, seed, path, fields):
+    seed.guard("g1")
+    seed.client("c1")
+    seed.assignment("g1", "c1")
+    seed.salary("g1")
+    full = get(client, path).json()
+    projected = get(client, path, fields=fields).json()
+
+    keys = fields.split(",")
+    assert projected and all(set(item) == set(keys) for item in projected)
+    assert projected == [{key: item[key] for key in keys} for item in full]
+
+
+def test_unknown_field_is_rejected(client, seed):
+    seed.guard("g1")
+    response = client.get("/guard/", params={"fields": "id,salary"})
+    assert response.status_code == 422
+    assert "Unknown field 'salary'" in response.json()["detail"]
+    assert client.get("/inventory/inventory-records/", params={"fields": "guard.nope"}).status_code == 422
+
+
+def test_projection_pages_with_the_cursor(client, seed):
+    for contact_number in ("g1", "g2", "g3"):
+        seed.guard(contact_number)
+
+    first = get(client, "/guard/", fields="name", sort_by="name", limit=2)
+    assert first.json() == [{"name": "Guard g1"}, {"name": "Guard g2"}]
+    # The sort keys are read for the cursor even though they are not returned
+    rest = get(client, "/guard/", fields="name", sort_by="name", limit=2, cursor=first.headers["x-next-cursor"])
+    assert rest.json() == [{"name": "Guard g3"}]
+    assert "x-next-cursor" not in rest.headers
+
+
+def test_nested_projection_joins_only_what_is_named(client, seed):
+    seed.guard("g1")
+    seed.inventory("g1")
+    seed.inventory("g1", item_name="Boots")
+    path = "/inventory/inventory-records/"
+
+    get(client, path, fields="item_name")
+    with assert_max_queries(1):
+        records = get(client, path, fields="item_name,guard.name").json()
+    assert records == [{"item_name": "Uniform", "guard": {"name": "Guard g1"}}, {"item_name": "Boots", "guard": {"name": "Guard g1"}}]
+    assert get(client, path, fields="id,guard").json()[0]["guard"]["contact_number"] == "g1"
+
+
+def test_raiseload_guards_only_the_columns_left_out(seed):
+    seed.guard("g1")
+    seed.inventory("g1")
+    selected = ("guard.name", "item_name")
+
+    async def load():
+        try:
+            async with SessionLocal() as db:
+                options = column_options(InventoryRecord, InventoryRecordResponse, selected)
+                record = (await db.scalars(select(InventoryRecord).options(*options))).one()
+                assert (record.id, record.item_name, record.guard.name) == (1, "Uniform", "Guard g1")
+                for unloaded in (lambda: record.cost, lambda: record.guard.status):
+                    with pytest.raises(InvalidRequestError, match="raiseload"):
+                        unloaded()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(load())
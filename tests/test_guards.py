@@ -0,0 +1,70 @@
+import io
+from sqlalchemy import update
+from conftest import drain_uploads, GUARD_IMAGES
+from models.guard import Guard
+from utils.images import content_hash
+from utils.storage import storage
+
+
+def test_update_guard_queues_new_images_instead_of_uploading_them(client, seed):
+    guard = seed.guard("g1")
+    drain_uploads()
+    stored = dict(storage.backend.objects)
+    image_url = client.get(f"/guard/{guard['id']}").json()["image_url"]
+    assert image_url is not None
+
+    files = {"image": ("new.jpg", b"g1-new-image", "image/jpeg")}
+    response = client.put(f"/guard/{guard['id']}", data={"name": "Renamed"}, files=files)
+    assert response.status_code == 200, response.text
+    # Nothing was stored during the request; the old image stays until the worker runs
+    assert storage.backend.objects == stored
+    assert response.json()["name"] == "Renamed"
+    assert response.json()["image_url"] == image_url
+
+    uploads = client.get(f"/guard/{guard['id']}/uploads").json()
+    assert uploads[0]["field"] == "image_url" and uploads[0]["status"] == "pending"
+
+    drain_uploads()
+    updated = client.get(f"/guard/{guard['id']}").json()
+    assert updated["image_url"] != image_url
+    assert storage.backend.download(updated["image_url"]) == b"g1-new-image"
+
+
+def test_update_guard_supersedes_queued_uploads_of_replaced_images(client, seed):
+    guard = seed.guard("g1")
+    files = {"image": ("new.jpg", b"g1-new-image", "image/jpeg")}
+    client.put(f"/guard/{guard['id']}", files=files).raise_for_status()
+
+    statuses = [(upload["field"], upload["status"]) for upload in client.get(f"/guard/{guard['id']}/uploads").json()]
+    assert statuses == [
+        ("image_url", "pending"),
+        ("cnic_back_url", "pending"),
+        ("cnic_front_url", "pending"),
+        ("image_url", "superseded"),
+    ]
+
+    drain_uploads()
+    updated = client.get(f"/guard/{guard['id']}").json()
+    assert storage.backend.download(updated["image_url"]) == b"g1-new-image"
+
+
+def test_storage_migration_keeps_content_keys(client, seed, database):
+    for contact_number in ("g1", "g2"):
+        files = {image: (f"{image}.jpg", f"shared-{image}".encode(), "image/jpeg") for image in GUARD_IMAGES}
+        client.post("/guard/", data={"name": contact_number, "contact_number": contact_number}, files=files).raise_for_status()
+    drain_uploads()
+    # Uploaded before objects were keyed by content
+    legacy = storage.backend.upload(io.BytesIO(b"legacy photo"), "guards", "old.jpg")
+    with database.begin() as conn:
+        conn.execute(update(Guard).where(Guard.id == 2).values(cnic_back_url=legacy))
+    before = [client.get(f"/guard/{guard_id}").json() for guard_id in (1, 2)]
+
+    result = client.post("/guard/storage/migrate", json={"target": "local"}).json()
+    assert result["images_migrated"] == 6 and result["failed"] == []
+    g1, g2 = (client.get(f"/guard/{guard_id}").json() for guard_id in (1, 2))
+
+    local = storage.get_backend("local")
+    assert g1["image_url"] == g2["image_url"] == before[0]["image_url"].replace("fake:/", local.base_url)
+    assert g1["cnic_back_url"] != g2["cnic_back_url"]
+    assert g2["cnic_back_url"] == f"{local.base_url}/guards/cnic_back/{content_hash(b'legacy photo')}.jpg"
+    assert local.download(g2["cnic_back_url"]) == b"legacy photo"
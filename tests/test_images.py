@@ -0,0 +1,83 @@
+import io
+import pytest
+from PIL import Image
+from sqlalchemy import select, func
+from conftest import drain_uploads
+from models.imageasset import ImageAsset
+from utils.images import image_pipeline, content_hash, IMAGE_THUMBNAIL_SIZE, IMAGE_PREVIEW_MAX_SIZE
+from utils.storage import storage
+
+
+def encoded(size, format: str, mode: str = "RGB") -> bytes:
+    out = io.BytesIO()
+    Image.new(mode, size, "teal").save(out, format)
+    return out.getvalue()
+
+
+PNG = encoded((400, 300), "PNG", "RGBA")
+WIDE_JPEG = encoded((IMAGE_PREVIEW_MAX_SIZE * 2, IMAGE_PREVIEW_MAX_SIZE), "JPEG")
+
+
+@pytest.fixture(autouse=True)
+def process_pool():
+    yield
+    image_pipeline.shutdown()
+
+
+def create_guard(client, contact_number: str, image: bytes, cnic_front: bytes, cnic_back: bytes) -> dict:
+    files = {
+        "image": ("photo.png", image, "image/png"),
+        "cnic_front_image": ("front.jpg", cnic_front, "image/jpeg"),
+        "cnic_back_image": ("back.jpg", cnic_back, "image/jpeg"),
+    }
+    response = client.post("/guard/", data={"name": f"Guard {contact_number}", "contact_number": contact_number}, files=files)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def decoded_size(url: str) -> tuple:
+    with Image.open(io.BytesIO(storage.backend.download(url))) as image:
+        assert image.format == "JPEG"
+        return image.size
+
+
+def test_derivatives_are_rendered_within_their_bounds(client):
+    guard = create_guard(client, "g1", PNG, WIDE_JPEG, b"not an image")
+    assert guard["image_thumbnail_url"] is None
+    drain_uploads()
+    guard = client.get(f"/guard/{guard['id']}").json()
+
+    assert decoded_size(guard["image_thumbnail_url"]) == (IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE)
+    assert decoded_size(guard["cnic_front_thumbnail_url"]) == (IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE)
+    # Previews fit the box with their aspect ratio, and small images are not upscaled
+    assert decoded_size(guard["image_preview_url"]) == (400, 300)
+    assert decoded_size(guard["cnic_front_preview_url"]) == (IMAGE_PREVIEW_MAX_SIZE, IMAGE_PREVIEW_MAX_SIZE // 2)
+    assert storage.backend.download(guard["image_url"]) == PNG
+
+
+def test_undecodable_upload_keeps_the_original_without_derivatives(client):
+    guard = create_guard(client, "g1", PNG, WIDE_JPEG, b"not an image")
+    undecodable = image_pipeline.undecodable
+    drain_uploads()
+
+    guard = client.get(f"/guard/{guard['id']}").json()
+    assert storage.backend.download(guard["cnic_back_url"]) == b"not an image"
+    assert guard["cnic_back_thumbnail_url"] is None and guard["cnic_back_preview_url"] is None
+    assert image_pipeline.undecodable == undecodable + 1
+    assert {upload["status"] for upload in client.get(f"/guard/{guard['id']}/uploads").json()} == {"done"}
+
+
+def test_identical_uploads_share_one_asset_and_storage_key(client, database):
+    first = create_guard(client, "g1", PNG, WIDE_JPEG, b"not an image")
+    drain_uploads()
+    processed, deduplicated = image_pipeline.processed, image_pipeline.deduplicated
+    second = create_guard(client, "g2", PNG, WIDE_JPEG, b"not an image")
+    drain_uploads()
+
+    first, second = (client.get(f"/guard/{guard['id']}").json() for guard in (first, second))
+    for column in ("image_url", "image_thumbnail_url", "image_preview_url", "cnic_back_url"):
+        assert second[column] == first[column]
+    assert content_hash(PNG) in first["image_url"]
+    assert (image_pipeline.processed, image_pipeline.deduplicated) == (processed, deduplicated + 3)
+    with database.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(ImageAsset)).scalar() == 3
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import select, func, distinct
+from sqlalchemy.dialects import sqlite
+from models.dutyassignment import DutyAssignment
+from models.salaryrecord import SalaryRecord
+from models.inventoryrecord import InventoryRecord, InventoryStatus
+
+
+def query_plan(engine, statement) -> str:
+    sql = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        return "\n".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+active = DutyAssignment.is_active == True
+
+# The filters of the hot read paths and the table each must reach through an
+# index. Which index the planner picks varies across SQLite versions, so
+# only a full table scan is an error.
+HOT_FILTERS = [
+    pytest.param(
+        select(DutyAssignment).where(DutyAssignment.guard_contact_number == "g1", active),
+        "duty_assignments",
+        id="active assignment of a guard",
+    ),
+    pytest.param(
+        select(DutyAssignment).where(DutyAssignment.client_contact_number == "c1", active),
+        "duty_assignments",
+        id="active assignments of a client",
+    ),
+    pytest.param(
+        select(DutyAssignment.client_contact_number, func.count())
+        .where(active, DutyAssignment.client_contact_number.in_(["c1", "c2"]))
+        .group_by(DutyAssignment.client_contact_number),
+        "duty_assignments",
+        id="active guard counts per client",
+    ),
+    pytest.param(
+        select(func.count(distinct(DutyAssignment.client_contact_number))).where(active),
+        "duty_assignments",
+        id="clients with guards",
+    ),
+    pytest.param(
+        select(SalaryRecord).where(
+            SalaryRecord.guard_contact_number == "g1", SalaryRecord.month == 5, SalaryRecord.year == 2026
+        ),
+        "salary_records",
+        id="salary of a guard for a month",
+    ),
+    pytest.param(
+        select(InventoryRecord).where(
+            InventoryRecord.guard_contact_number == "g1", InventoryRecord.status == InventoryStatus.ISSUED
+        ),
+        "inventory_records",
+        id="issued items of a guard",
+    ),
+]
+
+
+@pytest.mark.parametrize("statement, table", HOT_FILTERS)
+def test_hot_filter_uses_an_index(database, statement, table):
+    plan = query_plan(database, statement)
+    steps = [step.strip() for step in plan.splitlines() if f" {table}" in step]
+    assert steps and all("INDEX" in step for step in steps), plan
@@ -0,0 +1,30 @@
+import io
+from utils.storage import storage
+
+
+def stored_file(data: bytes) -> str:
+    """Key of `data` written through the local backend."""
+    local = storage.get_backend("local")
+    url = local.upload(io.BytesIO(data), "guards", "photo.jpg", key="0123abcd")
+    return url[len(local.base_url) + 1:]
+
+
+def test_media_needs_a_user_token(anonymous_client):
+    key = stored_file(b"guard photo")
+    response = anonymous_client.get(f"/media/{key}")
+    assert response.status_code == 403  # HTTPBearer without credentials
+
+
+def test_media_is_served_to_users_with_ranges(client):
+    key = stored_file(b"guard photo")
+    response = client.get(f"/media/{key}")
+    assert response.status_code == 200
+    assert response.content == b"guard photo"
+    assert response.headers["cache-control"].startswith("private")
+
+    response = client.get(f"/media/{key}", headers={"Range": "bytes=0-4"})
+    assert response.status_code == 206 and response.content == b"guard"
+
+
+def test_media_outside_the_storage_root_is_not_found(client):
+    assert client.get("/media/..%2F..%2Fetc%2Fpasswd").status_code == 404
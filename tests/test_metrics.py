@@ -0,0 +1,65 @@
+import re
+import rout.metrics_routs
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{([a-zA-Z_]+="(\\.|[^"\\])*",?)*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+
+
+def scrape(client, **headers) -> dict:
+    """{sample name with labels: value} from GET /metrics, checking the text format on the way."""
+    response = client.get("/metrics", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples, types = {}, {}
+    for line in response.text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert kind in ("counter", "gauge", "histogram") and name not in types
+            types[name] = kind
+        elif not line.startswith("# HELP "):
+            match = SAMPLE.match(line)
+            assert match, line
+            name = match.group(1)
+            family = name if name in types else re.sub(r"_(bucket|sum|count)$", "", name)
+            assert family in types, f"{line} has no TYPE"
+            key, _, value = line.rpartition(" ")
+            samples[key] = float(value)
+    return samples
+
+
+def test_request_latency_and_db_time_are_exposed(client, seed):
+    seed.guard("g1")
+    before = scrape(client)
+    assert client.get("/guard/").status_code == 200
+    after = scrape(client)
+
+    labels = 'route="/guard/",method="GET"'
+    assert after[f'http_requests_total{{{labels},status="200"}}'] == before.get(f'http_requests_total{{{labels},status="200"}}', 0) + 1
+    count = after[f'http_request_duration_seconds_count{{{labels},status="200"}}']
+    assert after[f'http_request_duration_seconds_bucket{{{labels},status="200",le="+Inf"}}'] == count
+    assert after[f'http_request_duration_seconds_sum{{{labels},status="200"}}'] > 0
+    # Buckets are cumulative
+    buckets = [value for key, value in after.items() if key.startswith(f'http_request_duration_seconds_bucket{{{labels},status="200",')]
+    assert buckets == sorted(buckets)
+
+    assert after[f"http_request_db_queries_total{{{labels}}}"] > before.get(f"http_request_db_queries_total{{{labels}}}", 0)
+    db_seconds = f"http_request_db_seconds_count{{{labels}}}"
+    assert after[db_seconds] == before.get(db_seconds, 0) + 1
+    assert after["db_queries_total"] > before["db_queries_total"]
+    assert 'db_pool{stat="size"}' in after
+
+
+def test_unrouted_requests_share_one_series(client):
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+    samples = scrape(client)
+    assert samples['http_requests_total{route="unmatched",method="GET",status="404"}'] >= 2
+    assert not any("/no/such" in key for key in samples)
+
+
+def test_metrics_token_is_required_when_set(anonymous_client, monkeypatch):
+    assert anonymous_client.get("/metrics").status_code == 200
+    monkeypatch.setattr(rout.metrics_routs, "METRICS_TOKEN", "scrape-me")
+
+    assert anonymous_client.get("/metrics").status_code == 401
+    assert anonymous_client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    scrape(anonymous_client, Authorization="Bearer scrape-me")
@@ -0,0 +1,123 @@
+import importlib.util
+import pytest
+from datetime import datetime
+from pathlib import Path
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, delete, select
+from models.dashboardcounter import DashboardCounter
+from models.dutyassignment import DutyAssignment, DutyStatus
+from utils.counters import COUNTER_COLUMNS
+
+VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+
+def load_revision(filename: str):
+    spec = importlib.util.spec_from_file_location(filename, VERSIONS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def counters(conn) -> dict:
+    rows = conn.execute(select(DashboardCounter)).all()
+    return {row.period: {column: getattr(row, column) for column in COUNTER_COLUMNS} for row in rows}
+
+
+def test_dashboard_counters_are_seeded_from_existing_rows(seed, database):
+    for contact_number in ("g1", "g2", "g3", "g4"):
+        seed.guard(contact_number, current_salary=30000)
+    seed.http.put("/guard/4", data={"status": "inactive"}).raise_for_status()
+    seed.client("c1")
+    seed.assignment("g1", "c1")
+    seed.assignment("g2", "c1", duty_status="OFF_DUTY")
+    seed.salary("g1", month=4)
+    seed.salary("g2", month=5)
+    seed.http.put("/salaryrecord/by-id/1", json={"is_paid": True}).raise_for_status()
+    seed.inventory("g1")
+    seed.inventory("g2", issue_date="2026-03-10T09:00:00")
+    seed.http.post("/inventory/inventory-records/return/2").raise_for_status()
+    migration = load_revision("aba70ac35a83_add_dashboard_counters.py")
+
+    with database.begin() as conn:
+        maintained = counters(conn)
+        conn.execute(delete(DashboardCounter))
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.seed_counters()
+        seeded = counters(conn)
+
+    assert seeded == maintained
+    assert seeded["all"]["guards_active"] == 3 and seeded["all"]["assignments_off_duty"] == 1
+    assert seeded["2026-04"]["salary_paid"] > 0 and seeded["2026-05"]["salary_pending"] > 0
+
+
+def salary_table_before_unique_index(conn):
+    conn.exec_driver_sql(
+        "CREATE TABLE salary_records (id INTEGER PRIMARY KEY, guard_contact_number VARCHAR, month INTEGER, year INTEGER)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX ix_salary_records_guard_month_year ON salary_records (guard_contact_number, month, year)"
+    )
+
+
+def salary_indexes(conn) -> set:
+    return set(conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'salary_records'"
+    ).scalars())
+
+
+def test_unique_salary_index_upgrade_stops_on_duplicates():
+    migration = load_revision("c41f0d8e6b27_unique_salary_record_per_month.py")
+    with create_engine("sqlite://").begin() as conn:
+        salary_table_before_unique_index(conn)
+        conn.exec_driver_sql(
+            "INSERT INTO salary_records (guard_contact_number, month, year) "
+            "VALUES ('g1', 5, 2026), ('g1', 5, 2026), ('g2', 5, 2026)"
+        )
+        with Operations.context(MigrationContext.configure(conn)):
+            with pytest.raises(RuntimeError, match=r"g1 5/2026 \(2 rows\)"):
+                migration.upgrade()
+        # Nothing changed: the old index is still there, no unique one was half built
+        assert salary_indexes(conn) == {"ix_salary_records_guard_month_year"}
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM salary_records").scalar() == 3
+
+
+def test_unique_salary_index_replaces_the_plain_one():
+    migration = load_revision("c41f0d8e6b27_unique_salary_record_per_month.py")
+    with create_engine("sqlite://").begin() as conn:
+        salary_table_before_unique_index(conn)
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+        assert salary_indexes(conn) == {"uq_salary_records_guard_month_year"}
+
+
+def test_closing_duplicate_active_assignments_recounts_the_dashboard(seed, database):
+    for contact_number in ("g1", "g2"):
+        seed.guard(contact_number)
+    seed.client("c1")
+    seed.assignment("g1", "c1")
+    seed.assignment("g2", "c1", duty_status="OFF_DUTY")
+    migration = load_revision("5e1b7c2d9a40_unique_active_assignment_per_guard.py")
+    seeding = load_revision("aba70ac35a83_add_dashboard_counters.py")
+
+    with database.begin() as conn:
+        # A database from before the unique index, with a guard on two active assignments
+        conn.exec_driver_sql("DROP INDEX uq_duty_assignments_active_guard")
+        conn.execute(DutyAssignment.__table__.insert().values(
+            guard_contact_number="g1", client_contact_number="c1", is_active=True,
+            duty_status=DutyStatus.ON_DUTY, start_date=datetime(2026, 2, 1)
+        ))
+        conn.execute(delete(DashboardCounter))
+        with Operations.context(MigrationContext.configure(conn)):
+            seeding.seed_counters()
+            assert counters(conn)["all"]["assignments_active"] == 3
+            migration.upgrade()
+        upgraded = counters(conn)["all"]
+
+        conn.execute(delete(DashboardCounter))
+        with Operations.context(MigrationContext.configure(conn)):
+            seeding.seed_counters()
+        assert upgraded == counters(conn)["all"]
+
+    assert upgraded["assignments_active"] == 2
+    assert upgraded["assignments_on_duty"] == 1 and upgraded["assignments_off_duty"] == 1
@@ -0,0 +1,55 @@
+import asyncio
+from sqlalchemy import select
+from models.auth import User
+from rout.user_routs import PASSWORD_RETRY_AFTER
+from utils.passwords import PasswordHasher, PasswordPoolBusy, password_hasher, hash_rounds
+from utils.util import hash_password
+
+CREDENTIALS = {"email": "admin@example.com", "password": "correct horse"}
+
+
+def stored_hash(database) -> str:
+    with database.connect() as conn:
+        return conn.execute(select(User.hashed_password)).scalar_one()
+
+
+def login(client):
+    return client.post("/auth/login", json=CREDENTIALS)
+
+
+def test_login_rehashes_when_bcrypt_rounds_change(client, database, monkeypatch):
+    assert hash_rounds(stored_hash(database)) == password_hasher.rounds
+    rehashed = password_hasher.rehashed
+
+    monkeypatch.setattr(password_hasher, "rounds", password_hasher.rounds + 1)
+    assert login(client).status_code == 200
+    upgraded = stored_hash(database)
+    assert hash_rounds(upgraded) == password_hasher.rounds
+    assert password_hasher.rehashed == rehashed + 1
+
+    # Once upgraded it is left alone, and the password still checks out
+    assert login(client).status_code == 200
+    assert stored_hash(database) == upgraded
+    assert password_hasher.rehashed == rehashed + 1
+
+
+def test_operations_beyond_the_queue_are_rejected():
+    hasher = PasswordHasher(workers=1, rounds=4, max_queue=1)
+    hashed_password = hash_password("secret", 4)
+
+    async def burst():
+        return await asyncio.gather(*(hasher.verify("secret", hashed_password) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(burst())
+    # One running, one waiting for the thread, the third turned away at once
+    assert results[:2] == [True, True]
+    assert isinstance(results[2], PasswordPoolBusy)
+    assert hasher.stats()["rejected"] == 1 and hasher.stats()["peak_queued"] == 1
+    hasher._executor.shutdown()
+
+
+def test_login_returns_503_when_the_pool_is_full(client, monkeypatch):
+    monkeypatch.setattr(password_hasher, "_pending", password_hasher.workers + password_hasher.max_queue)
+    response = login(client)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(PASSWORD_RETRY_AFTER)
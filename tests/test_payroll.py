@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from sqlalchemy.sql.dml import Insert
+from config.database import engine, SessionLocal
+from models.dashboardcounter import DashboardCounter
+from models.guard import Guard
+from models.salaryrecord import SalaryRecord
+from utils.payroll import run_payroll, DEFAULT_MONTHLY_DEDUCTION
+
+MAY = {"month": 5, "year": 2026}
+
+
+@pytest.fixture
+def guards(seed):
+    """Three active guards, two of them paying off a uniform, and an inactive one."""
+    seed.guard("g1", current_salary=30000, uniform_cost=1200, monthly_deduction=400)
+    seed.guard("g2", current_salary=25000, uniform_cost=300)
+    seed.guard("g3", current_salary=28000, uniform_cost=0)
+    seed.guard("g4", current_salary=40000, uniform_cost=1000)
+    seed.http.put("/guard/4", data={"status": "inactive"}).raise_for_status()
+    return seed
+
+
+def salary_rows(database) -> dict:
+    with database.connect() as conn:
+        rows = conn.execute(select(SalaryRecord.guard_contact_number, SalaryRecord.final_salary)).all()
+    return dict(rows)
+
+
+def uniform_paid(database) -> dict:
+    with database.connect() as conn:
+        return dict(conn.execute(select(Guard.contact_number, Guard.uniform_deducted_amount)).all())
+
+
+def may_counters(database):
+    with database.connect() as conn:
+        return conn.execute(select(DashboardCounter).where(DashboardCounter.period == "2026-05")).first()
+
+
+def payroll_run(client, **fields) -> dict:
+    response = client.post("/salaryrecord/payroll-run", json={**MAY, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_dry_run_writes_nothing(client, guards, database):
+    before = uniform_paid(database)
+    summary = payroll_run(client, dry_run=True)
+
+    assert summary["records_created"] == 3
+    assert [record["guard_contact_number"] for record in summary["records"]] == ["g1", "g2", "g3"]
+    assert salary_rows(database) == {}
+    assert uniform_paid(database) == before
+    assert may_counters(database) is None
+
+
+def test_creates_the_month_for_active_guards_with_totals_and_counters(client, guards, database):
+    summary = payroll_run(client)
+
+    expected = {"g1": 30000 - 400, "g2": 25000 - 300, "g3": 28000}
+    assert salary_rows(database) == expected
+    assert summary["active_guards"] == 3 and summary["records_created"] == 3 and summary["records"] == []
+    assert summary["total_final_salary"] == sum(expected.values())
+    assert summary["total_uniform_deduction"] == 400 + 300
+    assert uniform_paid(database) == {"g1": 400, "g2": 300, "g3": 0, "g4": 0}
+
+    counters = may_counters(database)
+    assert counters.salary_records == 3
+    assert counters.salary_pending == sum(expected.values()) and counters.salary_paid == 0
+
+
+def test_skips_guards_with_a_record_and_a_rerun_is_a_no_op(client, guards, database):
+    guards.salary("g1", **MAY)
+    paid, counters = uniform_paid(database), may_counters(database)
+    assert counters.salary_records == 1
+
+    summary = payroll_run(client)
+    assert summary["already_processed"] == 1 and summary["records_created"] == 2
+    # g1's existing record was not replaced and its uniform not charged twice
+    assert uniform_paid(database)["g1"] == paid["g1"]
+    assert may_counters(database).salary_records == 3
+
+    state = salary_rows(database), uniform_paid(database), may_counters(database).salary_pending
+    rerun = payroll_run(client)
+    assert rerun["already_processed"] == 3 and rerun["records_created"] == 0
+    assert rerun["total_final_salary"] == 0
+    assert (salary_rows(database), uniform_paid(database), may_counters(database).salary_pending) == state
+
+
+def test_uniform_is_only_advanced_for_rows_actually_inserted(guards, database):
+    """A record another request creates between the anti-join and the insert is left alone."""
+    async def run_with_concurrent_record():
+        try:
+            async with SessionLocal() as db:
+                execute = db.execute
+
+                async def execute_after_concurrent_insert(statement, *args, **kwargs):
+                    if isinstance(statement, Insert) and statement.table.name == "salary_records":
+                        db.execute = execute
+                        await execute(SalaryRecord.__table__.insert().values(
+                            guard_contact_number="g2", uniform_deduction=0.0, final_salary=25000.0,
+                            deductions=0.0, bonus=0.0, is_paid=False, **MAY
+                        ))
+                    return await execute(statement, *args, **kwargs)
+
+                db.execute = execute_after_concurrent_insert
+                return await run_payroll(db, **MAY)
+        finally:
+            await engine.dispose()
+
+    summary = asyncio.run(run_with_concurrent_record())
+
+    assert summary["records_created"] == 2 and summary["skipped_concurrently"] == 1
+    assert summary["total_uniform_deduction"] == 400
+    assert uniform_paid(database) == {"g1": 400, "g2": 0, "g3": 0, "g4": 0}
+    assert salary_rows(database)["g2"] == 25000.0
+    # Counted for the two records the run created; the concurrent one bypassed the counters
+    assert may_counters(database).salary_records == 2
+
+
+def test_missing_monthly_deduction_uses_the_default(client, seed, database):
+    seed.guard("g1", current_salary=30000, uniform_cost=2000)
+    payroll_run(client)
+    assert uniform_paid(database)["g1"] == DEFAULT_MONTHLY_DEDUCTION
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from models.guard import Guard
+from utils.payroll import calculate_salary, DEFAULT_MONTHLY_DEDUCTION
+from utils.payroll_simulation import PayrollArrays, simulate_payroll, _column
+
+MONTHS = 4
+# (current_salary, uniform_cost, uniform_deducted_amount, monthly_deduction)
+GUARDS = [
+    (30000, 1200, 0, None),
+    (30000, 1200, 100, 0),
+    (25000, 1200, None, 300),
+    (None, 250, 0, 1000),
+    (28000, None, None, None),
+    (28000, 0, 0, 0),
+    (32000, 900, 900, 400),
+]
+
+
+def guard_objects() -> list:
+    return [
+        Guard(contact_number=f"g{i}", current_salary=salary, uniform_cost=cost,
+              uniform_deducted_amount=deducted, monthly_deduction=deduction)
+        for i, (salary, cost, deducted, deduction) in enumerate(GUARDS)
+    ]
+
+
+def guard_arrays() -> PayrollArrays:
+    columns = list(zip(*GUARDS))
+    return PayrollArrays(
+        contact_numbers=[f"g{i}" for i in range(len(GUARDS))],
+        current_salary=_column(columns[0]),
+        uniform_cost=_column(columns[1]),
+        uniform_deducted_amount=_column(columns[2]),
+        monthly_deduction=_column(columns[3]),
+    )
+
+
+@pytest.mark.parametrize("override", [None, 0, 0.0, 700])
+@pytest.mark.parametrize("deductions, bonus", [(0.0, 0.0), (None, None), (1500, 2000)])
+def test_simulation_matches_calculate_salary(override, deductions, bonus):
+    guards = guard_objects()
+    expected_salary, expected_uniform = [], []
+    for _ in range(MONTHS):
+        month_salary, month_uniform = [], []
+        for guard in guards:
+            if override is not None:
+                guard.monthly_deduction = override
+            uniform_deduction, final_salary = calculate_salary(guard, deductions, bonus)
+            guard.uniform_deducted_amount = (guard.uniform_deducted_amount or 0.0) + uniform_deduction
+            month_salary.append(final_salary)
+            month_uniform.append(uniform_deduction)
+        expected_salary.append(month_salary)
+        expected_uniform.append(month_uniform)
+
+    result = simulate_payroll(guard_arrays(), MONTHS, monthly_deduction=override, deductions=deductions, bonus=bonus)
+    np.testing.assert_allclose(result["final_salary"], expected_salary)
+    np.testing.assert_allclose(result["uniform_deduction"], expected_uniform)
+
+
+def test_zero_override_deducts_the_default_installment():
+    result = simulate_payroll(guard_arrays(), 1, monthly_deduction=0)
+    assert result["uniform_deduction"][0][0] == DEFAULT_MONTHLY_DEDUCTION
@@ -0,0 +1,44 @@
+import asyncio
+from sqlalchemy import text
+from conftest import concurrently
+from config.database import engine, SessionLocal, pool_metrics, DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+CAPACITY = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+def test_sessions_beyond_pool_capacity_wait_and_all_finish(database):
+    timeouts = pool_metrics.timeouts
+
+    async def hold_connection():
+        async with SessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+            await asyncio.sleep(0.02)
+
+    async def burst():
+        try:
+            await asyncio.wait_for(asyncio.gather(*(hold_connection() for _ in range(CAPACITY * 10))), timeout=30)
+            pool = engine.sync_engine.pool
+            return pool.checkedout(), pool.overflow()
+        finally:
+            await engine.dispose()
+
+    checked_out, overflow = asyncio.run(burst())
+    assert checked_out == 0
+    assert overflow <= 0
+    assert pool_metrics.timeouts == timeouts
+    # Later sessions queued for a connection instead of failing
+    assert pool_metrics.wait_seconds_max > 0.01
+
+
+def test_request_burst_beyond_pool_capacity(client, seed):
+    seed.guard("g1")
+    seed.client("c1")
+    timeouts = pool_metrics.timeouts
+    reads = [("GET", "/stat/overview", {"params": {"live": True}}), ("GET", "/guard/", {})]
+    writes = [("POST", "/client/", {"json": {"name": f"Client {i}", "contact_number": f"c{i + 2}"}}) for i in range(10)]
+
+    responses = concurrently(client, reads * 15 + writes)
+
+    assert [response.status_code for response in responses] == [200] * len(responses), [r.text for r in responses]
+    assert pool_metrics.timeouts == timeouts
+    assert client.get("/stat/overview", params={"live": True}).json()["clients"]["total"] == 11
@@ -0,0 +1,161 @@
+import pytest
+from fastapi.routing import APIRoute
+from config.database import QueryStats
+from main import app
+from utils.auth import cached_users
+from utils.querycount import (
+    QUERY_BUDGETS, QueryCountExceeded, assert_max_queries, repeated_statements, statement_shape
+)
+import utils.metrics
+
+
+@pytest.fixture
+def world(seed):
+    """Guards g1-g4, clients c1-c2, g1 and g2 on duty at c1, salaries for May, an issued uniform.
+
+    g4 and c2 have nothing attached, so they can be deleted.
+    """
+    for contact_number in ("g1", "g2", "g3", "g4"):
+        seed.guard(contact_number)
+    seed.client("c1")
+    seed.client("c2")
+    seed.assignment("g1", "c1")
+    seed.assignment("g2", "c1")
+    seed.salary("g1")
+    seed.salary("g2")
+    seed.inventory("g1")
+    # Load the n-gram index now; the first search of a process pays for it once
+    seed.http.get("/search/guards", params={"name": "zzz"})
+    return seed
+
+
+def images(prefix: str) -> dict:
+    return {name: (f"{name}.jpg", f"{prefix}-{name}".encode(), "image/jpeg")
+            for name in ("image", "cnic_front_image", "cnic_back_image")}
+
+
+def shadowed(route: str, by: str):
+    return pytest.param(route, None, {}, None, marks=pytest.mark.skip(reason=f"unreachable, {by} matches first"), id=route)
+
+
+# (route template, path, request kwargs, expected status), one per budgeted route
+CASES = [
+    ("POST /auth/register", "/auth/register", {"json": {"username": "u", "email": "u@example.com", "password": "pw"}}, 200),
+    ("POST /auth/login", "/auth/login", {"json": {"email": "admin@example.com", "password": "correct horse"}}, 200),
+    ("POST /auth/revoke", "/auth/revoke", {}, 200),
+    ("POST /client/", "/client/", {"json": {"name": "New", "contact_number": "c9", "contract_rate": 1}}, 200),
+    ("GET /client/", "/client/", {"params": {"search": "client"}}, 200),
+    ("GET /client/{contact_number}", "/client/c1", {}, 200),
+    ("GET /client/{contact_number}/guards", "/client/c1/guards", {}, 200),
+    ("PUT /client/{client_id}", "/client/1", {"json": {"name": "Renamed"}}, 200),
+    ("DELETE /client/{client_id}", "/client/2", {}, 200),
+    ("POST /dutyassignment/", "/dutyassignment/",
+     {"json": {"guard_contact_number": "g3", "client_contact_number": "c2", "start_date": "2026-02-01T08:00:00"}}, 200),
+    ("GET /dutyassignment/", "/dutyassignment/", {}, 200),
+    ("GET /dutyassignment/{assignment_id}", "/dutyassignment/1", {}, 200),
+    ("PUT /dutyassignment/{assignment_id}", "/dutyassignment/1",
+     {"json": {"client_contact_number": "c2", "duty_status": "OFF_DUTY"}}, 200),
+    ("POST /dutyassignment/reassign/{guard_contact_number}", "/dutyassignment/reassign/g1",
+     {"json": {"guard_contact_number": "g1", "new_client_contact_number": "c2", "company_name": None}}, 200),
+    ("DELETE /dutyassignment/{assignment_id}", "/dutyassignment/2", {}, 204),
+    ("GET /dutyassignment/client-guard-assignment/{client_contact_number}",
+     "/dutyassignment/client-guard-assignment/c1", {}, 200),
+    ("POST /guard/", "/guard/", {"data": {"name": "New", "contact_number": "g9"}, "files": images("g9")}, 200),
+    ("POST /guard/storage/migrate", "/guard/storage/migrate", {"json": {"target": "local", "dry_run": True}}, 200),
+    ("GET /guard/", "/guard/", {"params": {"search": "guard", "status": "active"}}, 200),
+    shadowed("GET /guard/all", "GET /guard/{guard_id}"),
+    ("GET /guard/{guard_id}", "/guard/1", {}, 200),
+    ("GET /guard/by-contact/{contact_number}", "/guard/by-contact/g1", {}, 200),
+    ("GET /guard/{guard_id}/uploads", "/guard/1/uploads", {}, 200),
+    ("POST /guard/{guard_id}/uploads/retry", "/guard/1/uploads/retry", {}, 200),
+    ("PUT /guard/{guard_id}", "/guard/1", {"data": {"name": "Renamed", "contact_number": "g1b"}, "files": images("g1b")}, 200),
+    ("DELETE /guard/{guard_id}", "/guard/4", {}, 200),
+    ("POST /inventory/", "/inventory/",
+     {"json": {"guard_contact_number": "g2", "item_name": "Torch", "item_type": "equipment",
+               "issue_date": "2026-06-01T09:00:00", "cost": 900}}, 200),
+    ("GET /inventory/inventory-records/", "/inventory/inventory-records/", {}, 200),
+    ("GET /inventory/inventory-records/{record_id}", "/inventory/inventory-records/1", {}, 200),
+    ("PUT /inventory/inventory-records/{record_id}", "/inventory/inventory-records/1", {"json": {"notes": "Worn"}}, 200),
+    ("POST /inventory/inventory-records/return/{record_id}", "/inventory/inventory-records/return/1", {}, 200),
+    ("GET /inventory/inventory-records/guard/{guard_id}", "/inventory/inventory-records/guard/1", {}, 200),
+    ("GET /media/{key:path}", "/media/guards/missing.jpg", {}, 404),
+    ("GET /metrics", "/metrics", {}, 200),
+    ("GET /reports/monthly-summary", "/reports/monthly-summary", {"params": {"month": 5, "year": 2026}}, 200),
+    ("GET /reports/client-summary/{client_id}", "/reports/client-summary/1", {}, 200),
+    ("GET /reports/guard-history/{guard_id}", "/reports/guard-history/1", {}, 200),
+    ("POST /salaryrecord/", "/salaryrecord/", {"json": {"guard_contact_number": "g3", "month": 5, "year": 2026}}, 200),
+    ("POST /salaryrecord/payroll-run", "/salaryrecord/payroll-run", {"json": {"month": 6, "year": 2026}}, 200),
+    ("POST /salaryrecord/simulate", "/salaryrecord/simulate", {"json": {"months": 3}}, 200),
+    ("GET /salaryrecord/", "/salaryrecord/", {}, 200),
+    ("GET /salaryrecord/{contact_number}", "/salaryrecord/g1", {}, 200),
+    shadowed("GET /salaryrecord/{record_id}", "GET /salaryrecord/{contact_number}"),
+    ("PUT /salaryrecord/{contact_number}", "/salaryrecord/g1", {"json": {"bonus": 500}}, 200),
+    ("PUT /salaryrecord/by-id/{record_id}", "/salaryrecord/by-id/1", {"json": {"is_paid": True}}, 200),
+    ("DELETE /salaryrecord/{record_id}", "/salaryrecord/2", {}, 200),
+    ("GET /search/guards", "/search/guards", {"params": {"name": "guard", "client_name": "client"}}, 200),
+    ("GET /search/autocomplete", "/search/autocomplete", {"params": {"q": "gua"}}, 200),
+    ("GET /search/autocomplete/stats", "/search/autocomplete/stats", {}, 200),
+    ("GET /search/clients", "/search/clients", {"params": {"name": "client", "with_active_guards": True}}, 200),
+    ("GET /search/assignments", "/search/assignments", {"params": {"guard_name": "guard"}}, 200),
+    ("GET /stat/overview", "/stat/overview", {}, 200),
+    ("GET /stat/cache", "/stat/cache", {}, 200),
+    ("GET /stat/db-pool", "/stat/db-pool", {}, 200),
+    ("GET /stat/search-index", "/stat/search-index", {}, 200),
+    ("GET /stat/upload-outbox", "/stat/upload-outbox", {}, 200),
+    ("GET /stat/passwords", "/stat/passwords", {}, 200),
+    ("GET /stat/auth", "/stat/auth", {}, 200),
+    ("GET /stat/rate-limit", "/stat/rate-limit", {}, 200),
+]
+
+
+def _route_of(case) -> str:
+    return case.values[0] if hasattr(case, "values") else case[0]
+
+
+def test_every_route_has_a_budget():
+    routes = {f"{method} {route.path}" for route in app.routes if isinstance(route, APIRoute) for method in route.methods}
+    assert routes == set(QUERY_BUDGETS)
+
+
+def test_every_budget_is_exercised():
+    assert sorted(_route_of(case) for case in CASES) == sorted(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("route, path, kwargs, status", CASES, ids=[_route_of(case) for case in CASES])
+def test_route_stays_within_query_budget(client, world, route, path, kwargs, status):
+    # Cold auth cache, so the user lookup counts as it would after AUTH_USER_CACHE_TTL
+    cached_users._entries.clear()
+    with assert_max_queries(QUERY_BUDGETS[route]):
+        response = client.request(route.split(" ")[0], path, **kwargs)
+    assert response.status_code == status, response.text
+
+
+def test_assert_max_queries_lists_the_statements(client, world):
+    with pytest.raises(QueryCountExceeded, match="SELECT guards"):
+        with assert_max_queries(0):
+            client.get("/guard/1")
+
+
+def test_statement_shape_collapses_placeholder_lists():
+    one = statement_shape("SELECT guards.id FROM guards WHERE guards.id IN (?)")
+    three = statement_shape("SELECT guards.id\nFROM guards WHERE guards.id IN (?, ?, ?)")
+    assert one == three == "SELECT guards.id FROM guards WHERE guards.id IN (?)"
+    assert statement_shape("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+
+
+def test_repeated_statements_flags_a_query_per_row():
+    stats = QueryStats()
+    for statement in ["SELECT clients.name FROM clients WHERE clients.id = ?"] * 6 + ["SELECT 1"]:
+        stats.count += 1
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+    assert repeated_statements(stats, threshold=5) == {"SELECT clients.name FROM clients WHERE clients.id = ?": 6}
+    assert repeated_statements(stats, threshold=7) == {}
+
+
+def test_query_count_header_in_debug_mode(client, world, monkeypatch):
+    monkeypatch.setattr(utils.metrics, "QUERY_DEBUG", True)
+    cached_users._entries.clear()
+    response = client.get("/guard/1")
+    assert response.status_code == 200
+    assert response.headers["x-query-count"] == "2"
+    assert float(response.headers["x-query-time-ms"]) >= 0
@@ -0,0 +1,97 @@
+import pytest
+import utils.ratelimit
+from utils.ratelimit import RateLimiter, MemoryRateLimitBackend, rate_limiter, _parse_limits
+
+
+def scope(forwarded_for: str = None, peer: str = "10.0.0.9") -> dict:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for is not None else []
+    return {"type": "http", "method": "POST", "path": "/guard/", "headers": headers, "client": (peer, 50000)}
+
+
+@pytest.mark.parametrize("trusted_hops, forwarded_for, expected", [
+    # One proxy appends the address it saw; anything left of it came from the client
+    (1, "203.0.113.7", "203.0.113.7"),
+    (1, "1.2.3.4, 203.0.113.7", "203.0.113.7"),
+    (2, "1.2.3.4, 203.0.113.7, 172.16.0.2", "203.0.113.7"),
+    # Fewer entries than trusted proxies, or none: the peer address
+    (2, "203.0.113.7", "10.0.0.9"),
+    (1, None, "10.0.0.9"),
+    (1, "", "10.0.0.9"),
+    (0, "203.0.113.7", "10.0.0.9"),
+])
+def test_client_address_trusts_only_the_proxies_hops(monkeypatch, trusted_hops, forwarded_for, expected):
+    monkeypatch.setattr(utils.ratelimit, "RATE_LIMIT_CLIENT_HEADER", "X-Forwarded-For")
+    monkeypatch.setattr(utils.ratelimit, "RATE_LIMIT_TRUSTED_HOPS", trusted_hops)
+    assert RateLimiter.client_address(scope(forwarded_for)) == expected
+
+
+def test_client_address_ignores_the_header_unless_configured(monkeypatch):
+    monkeypatch.setattr(utils.ratelimit, "RATE_LIMIT_CLIENT_HEADER", "")
+    assert RateLimiter.client_address(scope("203.0.113.7")) == "10.0.0.9"
+
+
+def test_spoofed_forwarded_for_shares_the_proxies_bucket(monkeypatch):
+    monkeypatch.setattr(utils.ratelimit, "RATE_LIMIT_CLIENT_HEADER", "X-Forwarded-For")
+    monkeypatch.setattr(utils.ratelimit, "RATE_LIMIT_TRUSTED_HOPS", 1)
+    addresses = {RateLimiter.client_address(scope(f"198.51.100.{i}, 203.0.113.7")) for i in range(50)}
+    assert addresses == {"203.0.113.7"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.ratelimit, "time", clock)
+    return clock
+
+
+def limit(monkeypatch, **limits):
+    """Throttle the app's requests with `limits`, e.g. auth="2/60", on a fresh memory backend."""
+    monkeypatch.setattr(rate_limiter, "backend", MemoryRateLimitBackend())
+    monkeypatch.setattr(rate_limiter, "limits", _parse_limits(",".join(f"{k}={v}" for k, v in limits.items())))
+    monkeypatch.setattr(rate_limiter, "allowed", 0)
+    monkeypatch.setattr(rate_limiter, "limited", {})
+
+
+def login(client):
+    return client.post("/auth/login", json={"email": "nobody@example.com", "password": "wrong"})
+
+
+def test_empty_bucket_answers_429_until_it_refills(anonymous_client, clock, monkeypatch):
+    limit(monkeypatch, auth="2/60")
+    assert [login(anonymous_client).status_code for _ in range(2)] == [401, 401]
+
+    response = login(anonymous_client)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"  # one token every 30 seconds
+    clock.now += 10.5
+    assert login(anonymous_client).headers["retry-after"] == "20"
+
+    clock.now += 19.5
+    assert login(anonymous_client).status_code == 401
+    assert login(anonymous_client).status_code == 429
+    # Idle for a whole period: the full burst again, never more
+    clock.now += 600
+    assert [login(anonymous_client).status_code for _ in range(3)] == [401, 401, 429]
+    assert rate_limiter.stats()["allowed"] == 5 and rate_limiter.stats()["limited"] == {"auth": 4}
+
+
+def test_writes_are_limited_per_user_and_reads_not_at_all(client, clock, monkeypatch):
+    credentials = {"email": "other@example.com", "password": "pw"}
+    client.post("/auth/register", json={"username": "other", **credentials}).raise_for_status()
+    other = {"Authorization": f"Bearer {client.post('/auth/login', json=credentials).json()['access_token']}"}
+
+    limit(monkeypatch, write="1/60")
+    assert client.post("/client/", json={"name": "C1", "contact_number": "c1"}).status_code == 200
+    assert client.post("/client/", json={"name": "C2", "contact_number": "c2"}).status_code == 429
+    assert [client.get("/client/").status_code for _ in range(3)] == [200, 200, 200]
+    # Keyed by user, not by the address both share
+    assert client.post("/client/", json={"name": "C3", "contact_number": "c3"}, headers=other).status_code == 200
+    assert client.post("/client/", json={"name": "C4", "contact_number": "c4"}, headers=other).status_code == 429
@@ -0,0 +1,128 @@
+import pytest
+from utils.querycount import assert_max_queries
+
+
+def populate(seed, guards: int):
+    """`guards` guards, a client per four of them and every other guard on duty."""
+    for i in range(0, guards, 4):
+        seed.client(f"c{i}", name=f"Client {i} Security")
+    for i in range(guards):
+        seed.guard(f"g{i}", name=f"Guard {i} Khan")
+        if i % 2:
+            seed.assignment(f"g{i}", f"c{i // 4 * 4}")
+
+
+def search(client, path: str, queries: int, **params) -> list:
+    """Run the search twice, the second time within `queries` queries.
+
+    The first run loads the search index and caches the user lookup, which
+    later requests of the process do not repeat. A text filter adds the
+    search generation check to the one query.
+    """
+    client.get(path, params=params)
+    with assert_max_queries(queries):
+        response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.parametrize("guards", [4, 24])
+@pytest.mark.parametrize("params", [
+    {},
+    {"name": "khan"},
+    {"client_name": "security", "status": "active"},
+    {"available_only": True},
+], ids=["all", "name", "client_name", "available_only"])
+def test_search_guards_query_count_does_not_grow(client, seed, guards, params):
+    populate(seed, guards)
+    result = search(client, "/search/guards", 2, limit=200, **params)
+    on_duty = [guard for guard in result if guard["current_assignment"]]
+    if "client_name" in params:
+        assert len(result) == guards // 2
+    elif params.get("available_only"):
+        assert len(result) == guards // 2 and not on_duty
+    else:
+        assert len(result) == guards and len(on_duty) == guards // 2
+        assert {guard["current_assignment"]["client_name"] for guard in on_duty} == {
+            f"Client {i} Security" for i in range(0, guards, 4)
+        }
+
+
+@pytest.mark.parametrize("guards", [4, 24])
+@pytest.mark.parametrize("params", [
+    {},
+    {"name": "security"},
+    {"with_active_guards": True, "sort_by": "active_guards"},
+    {"sort_by": "name", "order": "desc"},
+], ids=["all", "name", "with_active_guards", "by_name"])
+def test_search_clients_query_count_does_not_grow(client, seed, guards, params):
+    populate(seed, guards)
+    result = search(client, "/search/clients", 2, limit=200, **params)
+    assert len(result) == guards // 4
+    # Clients get every other of their four guards
+    assert [row["active_guards_count"] for row in result] == [2] * (guards // 4)
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/search/guards", {"name": "khan"}),
+    ("/search/guards", {"available_only": True}),
+    ("/search/clients", {"name": "security"}),
+    ("/search/clients", {"sort_by": "active_guards"}),
+])
+def test_search_cursor_walks_every_match_once_in_order(client, seed, path, params):
+    populate(seed, 24)
+    seed.guard("g-exact", name="Khan")
+    seed.client("c-exact", name="Security")
+    expected = search(client, path, 2, limit=200, **params)
+
+    pages, cursor = [], None
+    while True:
+        with assert_max_queries(2):
+            response = client.get(path, params={**params, "limit": 3, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        pages += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert pages == expected
+
+
+@pytest.mark.parametrize("path, params, replayed", [
+    ("/search/guards", {"name": "khan"}, {"name": "guard"}),
+    ("/search/guards", {"name": "khan"}, {"name": "khan", "available_only": True}),
+    ("/search/clients", {"name": "security"}, {"name": "client"}),
+])
+def test_search_cursor_is_rejected_for_another_search(client, seed, path, params, replayed):
+    populate(seed, 8)
+    cursor = client.get(path, params={**params, "limit": 1}).headers["x-next-cursor"]
+    response = client.get(path, params={**replayed, "limit": 1, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor does not match the requested search"
+
+
+def test_search_index_rebuilds_after_another_worker_writes(client, seed, database):
+    from sqlalchemy import update
+    from models.dashboardcounter import DashboardCounter
+    from models.guard import Guard
+    from utils.search import search_indexes
+
+    populate(seed, 4)
+    assert [g["name"] for g in search(client, "/search/guards", 2, name="khan")][:1] == ["Guard 0 Khan"]
+    rebuilds = search_indexes.rebuilds
+
+    # This worker's own writes are applied in place
+    client.put("/guard/1", data={"name": "Guard 0 Baig"}).raise_for_status()
+    assert [g["name"] for g in client.get("/search/guards", params={"name": "baig"}).json()] == ["Guard 0 Baig"]
+    assert search_indexes.rebuilds == rebuilds
+
+    # Another worker's: only the database knows, through the generation it bumped
+    with database.begin() as conn:
+        conn.execute(update(Guard).where(Guard.id == 2).values(name="Guard 1 Baig"))
+        conn.execute(
+            update(DashboardCounter)
+            .where(DashboardCounter.period == "all")
+            .values(search_generation=DashboardCounter.search_generation + 1)
+        )
+    names = [g["name"] for g in client.get("/search/guards", params={"name": "baig"}).json()]
+    assert names == ["Guard 0 Baig", "Guard 1 Baig"]
+    assert search_indexes.rebuilds == rebuilds + 1
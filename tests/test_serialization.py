@@ -0,0 +1,71 @@
+import json
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List
+from models.guard import Guard, GuardStatus
+from models.salaryrecord import SalaryRecord
+from utils.fieldsets import model_columns
+from utils.pydantic_model import GuardResponse, SalaryRecordResponse
+from utils.serialization import to_json, json_response
+
+STAMP = datetime(2026, 5, 31, 23, 59, 59, 123456)
+
+
+def previous_encoding(model, items) -> bytes:
+    """What FastAPI's response_model round trip into a JSONResponse produced for `items`."""
+    validated = [model.model_validate(item, from_attributes=True) for item in items]
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def decoded(body: bytes):
+    """`body` parsed with ints and floats kept apart; the encoders only differ in exponent notation (1e16, 1e+16)."""
+    return json.loads(body, parse_int=lambda s: ("int", int(s)), parse_float=lambda s: ("float", float(s)))
+
+
+def edge_guards() -> list:
+    common = {"address": None, "cnic": None, "image_url": None, "cnic_front_url": None, "cnic_back_url": None}
+    return [
+        Guard(id=1, name="Zoë Khan", contact_number="0300", status=GuardStatus.INACTIVE, current_salary=Decimal("30000.50"),
+              join_date=STAMP, created_at=STAMP, updated_at=STAMP.replace(microsecond=0), **common),
+        Guard(id=2, name='Ali "Quote" \\ Raza', contact_number="0301", status=GuardStatus.ACTIVE, current_salary=0.1,
+              join_date=datetime(2026, 1, 1, tzinfo=timezone.utc), created_at=STAMP, updated_at=STAMP,
+              **{**common, "image_url": "https://cdn.example.com/a b.jpg"}),
+    ]
+
+
+def edge_salaries() -> list:
+    common = {"guard_contact_number": "0300", "month": 5, "year": 2026, "notes": None, "created_at": STAMP, "updated_at": STAMP}
+    return [
+        SalaryRecord(id=1, deductions=Decimal("1200.75"), uniform_deduction=400, bonus=None, final_salary=Decimal("28399.25"),
+                     is_paid=True, payment_date=STAMP, **common),
+        SalaryRecord(id=2, deductions=0.0, uniform_deduction=0.0, bonus=1e16, final_salary=12345678.9,
+                     is_paid=False, payment_date=None, **{**common, "notes": "ادا شدہ"}),
+    ]
+
+
+@pytest.mark.parametrize("model, items", [
+    (GuardResponse, edge_guards()),
+    (SalaryRecordResponse, edge_salaries()),
+], ids=["guard", "salary"])
+def test_encoding_matches_the_response_model_round_trip(model, items):
+    previous = decoded(previous_encoding(model, items))
+    assert decoded(to_json(List[model], items)) == previous
+    assert decoded(json_response(List[model], items).body) == previous
+
+
+def test_result_rows_encode_like_the_orm_objects(seed, database):
+    seed.guard("g1", current_salary=31500.5)
+    seed.guard("g2", status="inactive")
+    seed.salary("g1", bonus=250.25)
+
+    with Session(database) as db:
+        for model, entity in ((GuardResponse, Guard), (SalaryRecordResponse, SalaryRecord)):
+            objects = db.scalars(select(entity).order_by(entity.id)).all()
+            rows = db.execute(select(*model_columns(entity, model)).order_by(entity.id)).all()
+            assert to_json(List[model], rows) == to_json(List[model], objects)
+            assert decoded(to_json(List[model], rows)) == decoded(previous_encoding(model, objects))
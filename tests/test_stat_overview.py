@@ -0,0 +1,59 @@
+from datetime import datetime
+import pytest
+from conftest import concurrently
+from utils.querycount import assert_max_queries
+
+
+def populate(seed, guards: int):
+    """`guards` guards with a salary this month, half on duty at one of two clients."""
+    now = datetime.utcnow()
+    seed.client("c1")
+    seed.client("c2")
+    for i in range(guards):
+        seed.guard(f"g{i}")
+        seed.salary(f"g{i}", month=now.month, year=now.year)
+        if i % 2:
+            seed.assignment(f"g{i}", f"c{i % 4 // 2 + 1}")
+    seed.inventory("g0")
+
+
+def overview(client, **params) -> dict:
+    response = client.get("/stat/overview", params=params)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    del body["generated_at"]
+    return body
+
+
+@pytest.mark.parametrize("guards", [2, 12])
+def test_live_overview_is_one_query(client, seed, guards):
+    populate(seed, guards)
+    overview(client, live=True)  # user lookup now cached
+    with assert_max_queries(1):
+        body = overview(client, live=True)
+    assert body["guards"]["total"] == guards
+    assert body["financial"]["total_salary_records"] == guards
+
+
+def test_live_overview_matches_the_counters(client, seed):
+    populate(seed, 6)
+    live = overview(client, live=True)
+    assert live == overview(client)
+    assert live["assignments"] == {"total_active": 3, "on_duty": 3, "off_duty": 0}
+    assert live["clients"] == {"total": 2, "with_guards": 2}
+    assert live["inventory"] == {"total_items": 1, "currently_issued": 1, "returned": 0}
+
+
+def test_clients_with_guards_counts_a_client_once_under_concurrent_assignments(client, seed):
+    seed.client("c1")
+    for contact_number in ("g1", "g2", "g3"):
+        seed.guard(contact_number)
+    payload = {"client_contact_number": "c1", "start_date": "2026-01-01T08:00:00"}
+    responses = concurrently(client, [
+        ("POST", "/dutyassignment/", {"json": {**payload, "guard_contact_number": g}}) for g in ("g1", "g2", "g3")
+    ])
+    assert [response.status_code for response in responses] == [200, 200, 200]
+
+    body = overview(client)
+    assert body["assignments"]["total_active"] == 3
+    assert body["clients"]["with_guards"] == 1
@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select, text, update
+from config.database import engine, SessionLocal
+from models.uploadoutbox import UploadOutbox, UploadStatus
+from utils.images import image_pipeline
+from utils.storage import StorageError
+from utils.upload_outbox import upload_worker, UPLOAD_MAX_ATTEMPTS, UPLOAD_CLAIM_TIMEOUT_SECONDS
+
+
+def run(steps):
+    """Run `steps()` on a fresh loop with the worker bound to the app's sessions."""
+    async def main():
+        upload_worker._session_factory = SessionLocal
+        try:
+            return await steps()
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+def jobs(database) -> dict:
+    with database.connect() as conn:
+        rows = conn.execute(select(UploadOutbox.id, UploadOutbox.status, UploadOutbox.attempts)).all()
+    return {row.id: (row.status, row.attempts) for row in rows}
+
+
+def test_status_is_an_enum_stored_by_name(client, seed, database):
+    seed.guard("g1")
+    with database.connect() as conn:
+        assert set(conn.execute(text("SELECT status FROM upload_outbox")).scalars()) == {"PENDING"}
+    assert set(jobs(database).values()) == {(UploadStatus.PENDING, 0)}
+    assert {upload["status"] for upload in client.get("/guard/1/uploads").json()} == {"pending"}
+    assert client.get("/stat/upload-outbox").json()["jobs"] == {"pending": 3}
+
+
+def test_claim_counts_an_attempt(seed, database):
+    seed.guard("g1")
+    claimed = run(lambda: upload_worker.claim(10))
+    assert sorted(claimed) == [1, 2, 3]
+    assert set(jobs(database).values()) == {(UploadStatus.UPLOADING, 1)}
+
+
+def test_upload_fails_after_max_attempts(seed, database, monkeypatch):
+    async def broken_store(*args, **kwargs):
+        raise StorageError("bucket unavailable")
+    monkeypatch.setattr(image_pipeline, "store", broken_store)
+    seed.guard("g1")
+
+    async def attempt():
+        for job_id in await upload_worker.claim(10):
+            await upload_worker.process(job_id)
+
+    for attempts in range(1, UPLOAD_MAX_ATTEMPTS + 1):
+        with database.begin() as conn:
+            # Skip the backoff
+            conn.execute(update(UploadOutbox).values(next_attempt_at=datetime.utcnow()))
+        run(attempt)
+        expected = UploadStatus.FAILED if attempts == UPLOAD_MAX_ATTEMPTS else UploadStatus.PENDING
+        assert set(jobs(database).values()) == {(expected, attempts)}
+
+    assert run(lambda: upload_worker.claim(10)) == []
+
+
+def test_orphaned_job_is_failed_on_its_last_attempt(seed, database):
+    seed.guard("g1")
+    abandoned_at = datetime.utcnow() - timedelta(seconds=UPLOAD_CLAIM_TIMEOUT_SECONDS + 1)
+    with database.begin() as conn:
+        conn.execute(update(UploadOutbox).values(status=UploadStatus.UPLOADING, claimed_at=abandoned_at))
+        conn.execute(update(UploadOutbox).where(UploadOutbox.id == 1).values(attempts=UPLOAD_MAX_ATTEMPTS - 1))
+        conn.execute(update(UploadOutbox).where(UploadOutbox.id != 1).values(attempts=UPLOAD_MAX_ATTEMPTS))
+
+    assert run(lambda: upload_worker.claim(10)) == [1]
+    assert jobs(database) == {
+        1: (UploadStatus.UPLOADING, UPLOAD_MAX_ATTEMPTS),
+        2: (UploadStatus.FAILED, UPLOAD_MAX_ATTEMPTS),
+        3: (UploadStatus.FAILED, UPLOAD_MAX_ATTEMPTS),
+    }
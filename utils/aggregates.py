@@ -0,0 +1,136 @@
+from sqlalchemy import select, func, case, distinct, and_, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from models.guard import Guard, GuardStatus
+from models.client import Client
+from models.dutyassignment import DutyAssignment, DutyStatus
+from models.salaryrecord import SalaryRecord
+from models.inventoryrecord import InventoryRecord, InventoryStatus
+from utils.counters import GLOBAL_PERIOD, period_key, read_counters
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(column, condition):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def overview_statement(month: int, year: int):
+    """Build a single SELECT returning every /stat/overview number as one row.
+
+    Each table is scanned once by a one-row aggregate subquery; the
+    subqueries are cross joined so the whole overview is one round trip.
+    """
+    guards = select(
+        func.count(Guard.id).label("guards_total"),
+        _count_if(Guard.status == GuardStatus.ACTIVE).label("guards_active"),
+        _count_if(Guard.status == GuardStatus.INACTIVE).label("guards_inactive"),
+        _count_if(Guard.status == GuardStatus.ON_LEAVE).label("guards_on_leave"),
+    ).subquery()
+
+    active = DutyAssignment.is_active == True
+    assignments = select(
+        _count_if(active).label("assignments_active"),
+        _count_if(and_(active, DutyAssignment.duty_status == DutyStatus.ON_DUTY)).label("assignments_on_duty"),
+        _count_if(and_(active, DutyAssignment.duty_status == DutyStatus.OFF_DUTY)).label("assignments_off_duty"),
+        func.count(distinct(case((active, DutyAssignment.client_contact_number)))).label("clients_with_guards"),
+    ).subquery()
+
+    clients = select(func.count(Client.id).label("clients_total")).subquery()
+
+    salaries = select(
+        func.count(SalaryRecord.id).label("salary_records"),
+        _sum_if(SalaryRecord.final_salary, SalaryRecord.is_paid == True).label("salary_paid"),
+        _sum_if(SalaryRecord.final_salary, SalaryRecord.is_paid == False).label("salary_pending"),
+    ).where(
+        SalaryRecord.month == month,
+        SalaryRecord.year == year
+    ).subquery()
+
+    inventory = select(
+        func.count(InventoryRecord.id).label("inventory_total"),
+        _count_if(InventoryRecord.status == InventoryStatus.ISSUED).label("inventory_issued"),
+        _count_if(InventoryRecord.status == InventoryStatus.RETURNED).label("inventory_returned"),
+    ).subquery()
+
+    return select(guards, assignments, clients, salaries, inventory).select_from(
+        guards.join(assignments, true())
+        .join(clients, true())
+        .join(salaries, true())
+        .join(inventory, true())
+    )
+
+
+async def get_system_overview_stats(db: AsyncSession, now: datetime = None) -> dict:
+    """Compute the overview live from the source tables."""
+    now = now or datetime.utcnow()
+    row = (await db.execute(overview_statement(now.month, now.year))).mappings().one()
+    return _overview_payload(row, now)
+
+
+async def get_counter_overview_stats(db: AsyncSession, now: datetime = None) -> dict:
+    """Read the overview from the incrementally maintained dashboard_counters.
+
+    Every figure but clients.with_guards comes from the counters. That one
+    stays a live query on purpose: it is a distinct count, so whether an
+    assignment write moves it depends on the client's other active
+    assignments, which a concurrent transaction may be changing at the same
+    time; `col = col + n` deltas would count a client twice when its first
+    two assignments are made at once. The query walks the
+    ix_duty_assignments_active_client partial index, i.e. only the active
+    assignments.
+    """
+    now = now or datetime.utcnow()
+    month = period_key(now.year, now.month)
+    counters = await read_counters(db, GLOBAL_PERIOD, month)
+    totals, current = counters[GLOBAL_PERIOD], counters[month]
+
+    # Live, see above
+    clients_with_guards = await db.scalar(
+        select(func.count(distinct(DutyAssignment.client_contact_number)))
+        .where(DutyAssignment.is_active == True)
+    )
+
+    row = {
+        **totals,
+        "guards_total": totals["guards_active"] + totals["guards_inactive"] + totals["guards_on_leave"],
+        "clients_with_guards": clients_with_guards,
+        "salary_records": current["salary_records"],
+        "salary_paid": current["salary_paid"],
+        "salary_pending": current["salary_pending"],
+        "inventory_total": totals["inventory_issued"] + totals["inventory_returned"] + totals["inventory_lost"],
+    }
+    return _overview_payload(row, now)
+
+
+def _overview_payload(row, now: datetime) -> dict:
+    return {
+        "guards": {
+            "total": row["guards_total"],
+            "active": row["guards_active"],
+            "inactive": row["guards_inactive"],
+            "on_leave": row["guards_on_leave"]
+        },
+        "assignments": {
+            "total_active": row["assignments_active"],
+            "on_duty": row["assignments_on_duty"],
+            "off_duty": row["assignments_off_duty"]
+        },
+        "clients": {
+            "total": row["clients_total"],
+            "with_guards": row["clients_with_guards"]
+        },
+        "financial": {
+            "monthly_salary_paid": row["salary_paid"],
+            "monthly_salary_pending": row["salary_pending"],
+            "total_salary_records": row["salary_records"]
+        },
+        "inventory": {
+            "total_items": row["inventory_total"],
+            "currently_issued": row["inventory_issued"],
+            "returned": row["inventory_returned"]
+        },
+        "generated_at": now
+    }
@@ -0,0 +1,144 @@
+from collections import OrderedDict
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+from config.database import SessionLocal
+from models.auth import User
+from utils.util import security, SECRET_KEY, ALGORITHM
+import jwt
+import os
+import time
+
+load_dotenv()
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10000))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", 1024))
+# Seconds a user row is trusted without reading it again. This bounds how long a
+# revocation or deactivation made through another worker takes to apply here.
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", 30))
+
+UNAUTHORIZED_HEADERS = {"WWW-Authenticate": "Bearer"}
+
+
+class ExpiringLRU:
+    """Bounded in-process map whose entries each expire after their own TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Claims of tokens whose signature checked out, until the token expires. Keyed by
+# the whole token: header and payload are what the signature vouches for.
+verified_tokens = ExpiringLRU(AUTH_TOKEN_CACHE_SIZE)
+# User rows by id, detached from the session that loaded them
+cached_users = ExpiringLRU(AUTH_USER_CACHE_SIZE)
+
+
+def decode_token(token: str) -> dict:
+    claims = verified_tokens.get(token)
+    if claims is not None:
+        # The entry expires with the token on the monotonic clock; this holds if the wall clock moved
+        if claims["exp"] <= time.time():
+            verified_tokens.pop(token)
+            raise HTTPException(status_code=401, detail="Token has expired", headers=UNAUTHORIZED_HEADERS)
+        return claims
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "sub"]})
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired", headers=UNAUTHORIZED_HEADERS)
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token", headers=UNAUTHORIZED_HEADERS)
+    verified_tokens.set(token, claims, claims["exp"] - time.time())
+    return claims
+
+
+async def load_user(user_id: int) -> User:
+    user = cached_users.get(user_id)
+    if user is None:
+        # A session of its own, so a cached row never ends up in a handler's session
+        async with SessionLocal() as db:
+            user = await db.get(User, user_id)
+        if user is not None:
+            cached_users.set(user_id, user, AUTH_USER_CACHE_TTL)
+    return user
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    """The user a bearer token was issued to.
+
+    A repeated token costs a dictionary lookup: its verified claims are
+    cached until it expires and the user row for AUTH_USER_CACHE_TTL, so
+    neither a signature check nor a query runs per request. The token's
+    `ver` claim must match the user's token_version, which revoke_tokens
+    bumps.
+    """
+    claims = decode_token(credentials.credentials)
+    try:
+        user_id = int(claims["sub"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token", headers=UNAUTHORIZED_HEADERS)
+    user = await load_user(user_id)
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=401, detail="User not found or inactive", headers=UNAUTHORIZED_HEADERS)
+    if claims.get("ver", 0) != user.token_version:
+        raise HTTPException(status_code=401, detail="Token has been revoked", headers=UNAUTHORIZED_HEADERS)
+    return user
+
+
+async def revoke_tokens(db: AsyncSession, user_id: int):
+    """Invalidate every token issued to a user so far, committing the session.
+
+    The cached row is evicted only once the new token_version is committed:
+    a request reloading it any earlier would read, and cache, the old one.
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    cached_users.pop(user_id)
+
+
+def auth_stats() -> dict:
+    return {
+        "tokens": verified_tokens.stats(),
+        "users": {**cached_users.stats(), "ttl": AUTH_USER_CACHE_TTL},
+    }
+
@@ -0,0 +1,250 @@
+from bisect import bisect_left
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+from datetime import datetime
+from models.guard import Guard
+from models.client import Client
+from utils.search import SearchIndexes
+import asyncio
+import os
+import re
+import sys
+import time
+
+load_dotenv()
+
+AUTOCOMPLETE_MAX_LIMIT = int(os.getenv("AUTOCOMPLETE_MAX_LIMIT", 25))
+# How often to check for writes made by other workers (a rebuild only happens if there were any); 0 disables it
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", 300))
+
+_SPACES = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D")
+_PHONE_LIKE = re.compile(r"^[\d\s+\-()]+$")
+
+
+def normalize_text(value: str) -> str:
+    return _SPACES.sub(" ", (value or "").strip().lower())
+
+
+def normalize_contact(value: str) -> str:
+    return _NON_DIGITS.sub("", value or "")
+
+
+def _entity(obj):
+    """(type, id) reference and a compact (label, contact_number, company_name) record."""
+    if isinstance(obj, Guard):
+        return ("guard", obj.id), (obj.name, obj.contact_number, None)
+    return ("client", obj.id), (obj.name, obj.contact_number, obj.company_name)
+
+
+def _keys(record: tuple) -> tuple:
+    """Prefix keys of an entity: the full label, each later word onwards and the contact digits."""
+    label, contact_number, company_name = record
+    keys = set()
+    for text in (label, company_name):
+        words = normalize_text(text).split(" ")
+        for i in range(len(words)):
+            if words[i]:
+                keys.add(" ".join(words[i:]))
+    contact = normalize_contact(contact_number)
+    if contact:
+        keys.add(contact)
+    return tuple(keys)
+
+
+def _item(ref: tuple, record: tuple) -> dict:
+    label, contact_number, company_name = record
+    item = {"type": ref[0], "id": ref[1], "label": label, "contact_number": contact_number}
+    if ref[0] == "client":
+        item["company_name"] = company_name
+    return item
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for typeahead lookups.
+
+    `keys` is kept sorted with a parallel `refs` list of (type, id), so a
+    lookup is one bisect followed by a short forward scan. Entities are
+    indexed under their full label, every word suffix of it ("ali khan",
+    "khan"), the client company name and the contact number's digits.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.refs = []
+        self.items = {}
+        self.entity_keys = {}
+
+    @classmethod
+    def from_objects(cls, objects):
+        return cls.from_records(_entity(obj) for obj in objects)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from ((type, id), (label, contact_number, company_name)) pairs."""
+        index = cls()
+        pairs = []
+        for ref, record in records:
+            keys = _keys(record)
+            index.items[ref] = record
+            index.entity_keys[ref] = keys
+            pairs.extend((key, ref) for key in keys)
+        pairs.sort()
+        index.keys = [key for key, _ in pairs]
+        index.refs = [ref for _, ref in pairs]
+        return index
+
+    def add(self, obj):
+        ref, record = _entity(obj)
+        self.discard(ref)
+        keys = _keys(record)
+        self.items[ref] = record
+        self.entity_keys[ref] = keys
+        for key in keys:
+            position = bisect_left(self.keys, key)
+            # Keep (key, ref) ordering so equal keys stay deterministic
+            while position < len(self.keys) and self.keys[position] == key and self.refs[position] < ref:
+                position += 1
+            self.keys.insert(position, key)
+            self.refs.insert(position, ref)
+
+    def discard(self, ref):
+        if self.items.pop(ref, None) is None:
+            return
+        for key in self.entity_keys.pop(ref):
+            position = bisect_left(self.keys, key)
+            while position < len(self.keys) and self.keys[position] == key:
+                if self.refs[position] == ref:
+                    del self.keys[position]
+                    del self.refs[position]
+                    break
+                position += 1
+
+    def lookup(self, query: str, limit: int = 10, types=None) -> list:
+        results, seen = [], set()
+        prefixes = [normalize_text(query)]
+        if _PHONE_LIKE.match(query or ""):
+            prefixes.append(normalize_contact(query))
+        for prefix in filter(None, prefixes):
+            position = bisect_left(self.keys, prefix)
+            while position < len(self.keys) and len(results) < limit:
+                if not self.keys[position].startswith(prefix):
+                    break
+                ref = self.refs[position]
+                position += 1
+                if ref in seen or (types and ref[0] not in types):
+                    continue
+                seen.add(ref)
+                results.append(_item(ref, self.items[ref]))
+        return results
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the arrays, keys and entity records."""
+        size = sys.getsizeof(self.keys) + sys.getsizeof(self.refs)
+        size += sum(sys.getsizeof(key) for key in self.keys)
+        size += sys.getsizeof(self.items) + sys.getsizeof(self.entity_keys)
+        for ref, record in self.items.items():
+            size += sys.getsizeof(ref) + sys.getsizeof(record) + sys.getsizeof(self.entity_keys[ref])
+            size += sum(sys.getsizeof(value) for value in record if value is not None)
+        return size
+
+
+class AutocompleteIndex:
+    """Process-wide PrefixIndex over guards and clients.
+
+    Built at startup and updated by the guard and client write paths. Every
+    AUTOCOMPLETE_REFRESH_SECONDS it compares the search generation those
+    writes bump (see utils.search) with the one it reflects, and rebuilds only
+    when another worker has written since. A rebuild swaps in a new
+    PrefixIndex; writes that land while it is loading are replayed onto it.
+    """
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        # The search generation the index reflects, counting this worker's own writes
+        self.generation = None
+        self.built_at = None
+        self.build_seconds = None
+        self.memory_bytes = 0
+        self.rebuilds = 0
+        self._pending = None
+        self._lock = asyncio.Lock()
+
+    async def build(self, db: AsyncSession):
+        async with self._lock:
+            start = time.perf_counter()
+            self._pending = []
+            generation = await SearchIndexes.current_generation(db)
+            guards = await db.execute(select(Guard.id, Guard.name, Guard.contact_number))
+            clients = await db.execute(select(Client.id, Client.name, Client.contact_number, Client.company_name))
+            index = PrefixIndex.from_records([
+                *((("guard", id), (name, contact_number, None)) for id, name, contact_number in guards),
+                *((("client", id), (name, contact_number, company_name)) for id, name, contact_number, company_name in clients),
+            ])
+            # As in SearchIndexes, a replayed write may already be in `generation`; if not, the next check rebuilds
+            pending, self._pending = self._pending, None
+            for obj, deleted in pending:
+                self._apply(index, obj, deleted)
+            self.index, self.generation = index, generation
+            self.rebuilds += 1
+            self.built_at = datetime.utcnow()
+            self.build_seconds = time.perf_counter() - start
+            self.memory_bytes = index.memory_bytes()
+
+    async def refresh(self, db: AsyncSession):
+        """Rebuild if the database has moved on by more than this worker's own writes."""
+        if await SearchIndexes.current_generation(db) != self.generation:
+            await self.build(db)
+
+    async def refresh_forever(self, session_factory):
+        while AUTOCOMPLETE_REFRESH_SECONDS > 0:
+            await asyncio.sleep(AUTOCOMPLETE_REFRESH_SECONDS)
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except Exception as e:
+                print(f"Error refreshing autocomplete index: {e}")
+
+    @staticmethod
+    def _apply(index: PrefixIndex, obj, deleted: bool):
+        if deleted:
+            index.discard(_entity(obj)[0])
+        else:
+            index.add(obj)
+
+    def update(self, obj):
+        """Re-index a created or updated Guard/Client.
+
+        Call after committing a write that added search_index_counts() to the counters.
+        """
+        self._record(obj, False)
+
+    def remove(self, obj):
+        self._record(obj, True)
+
+    def _record(self, obj, deleted: bool):
+        self._apply(self.index, obj, deleted)
+        if self._pending is not None:
+            self._pending.append((obj, deleted))
+        elif self.generation is not None:
+            self.generation += 1
+
+    def lookup(self, query: str, limit: int = 10, types=None) -> list:
+        return self.index.lookup(query, min(limit, AUTOCOMPLETE_MAX_LIMIT), types)
+
+    def stats(self) -> dict:
+        index = self.index
+        return {
+            "entities": len(index.items),
+            "keys": len(index.keys),
+            # As of the last build; walking the index per request costs more than a lookup
+            "memory_bytes": self.memory_bytes,
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "refresh_seconds": AUTOCOMPLETE_REFRESH_SECONDS,
+        }
+
+
+autocomplete_index = AutocompleteIndex()
+
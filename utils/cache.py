@@ -0,0 +1,227 @@
+from collections import OrderedDict
+from functools import wraps
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from dotenv import load_dotenv
+from urllib.parse import urlencode
+from utils.serialization import type_adapter
+import enum
+import orjson
+import os
+import time
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory, redis or none
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", 30))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Per-route overrides, e.g. "stat.overview=5,guard.list=60"
+CACHE_ROUTE_TTLS = os.getenv("CACHE_ROUTE_TTLS", "")
+
+
+def _parse_ttls(raw: str) -> dict:
+    ttls = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, value = item.partition("=")
+        ttls[name.strip()] = float(value)
+    return ttls
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry expiry. Invalidation is local to the worker."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    async def set(self, key: str, value, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def generations(self, tags) -> list:
+        return [self._generations.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags):
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisCacheBackend:
+    """Shared backend so every worker sees the same entries and invalidations."""
+
+    def __init__(self, url: str = CACHE_REDIS_URL, prefix: str = "respcache"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        raw = await self._redis.get(f"{self.prefix}:{key}")
+        if raw is None:
+            return False, None
+        return True, orjson.loads(raw)
+
+    async def set(self, key: str, value, ttl: float):
+        await self._redis.set(f"{self.prefix}:{key}", orjson.dumps(value), px=int(ttl * 1000))
+
+    async def generations(self, tags) -> list:
+        values = await self._redis.mget([f"{self.prefix}:gen:{tag}" for tag in tags])
+        return [int(v or 0) for v in values]
+
+    async def bump(self, tags):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"{self.prefix}:gen:{tag}")
+            await pipe.execute()
+
+    def stats(self) -> dict:
+        return {"backend_url": CACHE_REDIS_URL.rsplit("@", 1)[-1]}
+
+
+def _normalize(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+class ResponseCache:
+    """Caches the JSON-ready result of GET handlers.
+
+    Entries are keyed by route name, the current generation of each tag the
+    route depends on, and the sorted non-empty query/path parameters.
+    invalidate() bumps tag generations, so stale entries are never read again
+    and simply age out of the backend.
+    """
+
+    def __init__(self, backend=None, default_ttl: float = CACHE_DEFAULT_TTL, route_ttls: dict = None):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.route_ttls = route_ttls or {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        if CACHE_BACKEND == "redis":
+            backend = RedisCacheBackend()
+        elif CACHE_BACKEND == "none":
+            backend = None
+        else:
+            backend = MemoryCacheBackend()
+        return cls(backend, route_ttls=_parse_ttls(CACHE_ROUTE_TTLS))
+
+    def cached(self, name: str, tags=(), ttl: float = None, model=None, headers=()):
+        """Decorate an async GET handler.
+
+        `model` is the response type used to turn ORM results into plain
+        JSON data before storing them; without it jsonable_encoder is used.
+        `headers` names response headers the handler sets on its `Response`
+        parameter (e.g. X-Next-Cursor); they are stored with the entry and
+        replayed on hits. A handler may also return a finished Response (e.g.
+        a sparse fieldset); its body and headers are then cached as they are.
+        """
+        tags = tuple(tags)
+
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                if self.backend is None:
+                    return await func(*args, **kwargs)
+
+                params = sorted(
+                    (k, _normalize(v)) for k, v in kwargs.items()
+                    if isinstance(v, (str, int, float, bool, enum.Enum))
+                )
+                generations = await self.backend.generations(tags)
+                key = f"{name}:{'.'.join(map(str, generations))}:{urlencode(params)}"
+
+                response = next((v for v in kwargs.values() if isinstance(v, Response)), None)
+                hit, value = await self.backend.get(key)
+                if hit:
+                    self.hits += 1
+                    if isinstance(value, dict) and "__response__" in value:
+                        stored = value["__response__"]
+                        return Response(stored["body"], media_type=stored["media_type"], headers=stored["headers"])
+                    if headers:
+                        value, stored_headers = value
+                        if response is not None:
+                            response.headers.update(stored_headers)
+                    return value
+                self.misses += 1
+
+                result = await func(*args, **kwargs)
+                if isinstance(result, Response):
+                    entry = {"__response__": {
+                        "body": result.body.decode(),
+                        "media_type": result.media_type,
+                        "headers": {
+                            k: v for k, v in result.headers.items() if k not in ("content-length", "content-type")
+                        },
+                    }}
+                    await self.backend.set(key, entry, self.route_ttls.get(name, ttl or self.default_ttl))
+                    return result
+                if model is not None:
+                    adapter = type_adapter(model)
+                    value = adapter.dump_python(
+                        adapter.validate_python(result, from_attributes=True), mode="json"
+                    )
+                else:
+                    value = jsonable_encoder(result)
+                entry = value
+                if headers:
+                    present = response.headers if response is not None else {}
+                    entry = [value, {header: present[header] for header in headers if header in present}]
+                await self.backend.set(key, entry, self.route_ttls.get(name, ttl or self.default_ttl))
+                return value
+
+            return wrapper
+
+        return decorator
+
+    async def invalidate(self, *tags):
+        if self.backend is not None:
+            await self.backend.bump(tags)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "default_ttl": self.default_ttl,
+            "route_ttls": self.route_ttls,
+            **(self.backend.stats() if self.backend else {}),
+        }
+
+
+response_cache = ResponseCache.from_env()
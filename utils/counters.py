@@ -0,0 +1,213 @@
+from sqlalchemy import select, update, delete, func, case, extract
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import defaultdict
+from datetime import datetime
+from models.dashboardcounter import DashboardCounter
+from models.guard import Guard, GuardStatus
+from models.client import Client
+from models.dutyassignment import DutyAssignment, DutyStatus
+from models.salaryrecord import SalaryRecord
+from models.inventoryrecord import InventoryRecord, InventoryStatus
+
+GLOBAL_PERIOD = "all"
+
+COUNTER_COLUMNS = {
+    c.name: c.type.python_type for c in DashboardCounter.__table__.columns
+    if c.name not in ("period", "updated_at", "search_generation")
+}
+
+
+def period_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+# --- Per-row contributions -------------------------------------------------
+#
+# Each helper returns what a single row adds to the counters, as a
+# {(period, column): amount} dict. Write paths snapshot the row before and
+# after the change and hand both to apply_counter_delta. Unflushed objects
+# still carry None for columns with Python-side defaults, so those are
+# resolved to the column default here.
+
+def guard_counts(guard: Guard) -> dict:
+    status = guard.status or GuardStatus.ACTIVE
+    return {(GLOBAL_PERIOD, f"guards_{GuardStatus(status).value}"): 1}
+
+
+def client_counts(client: Client) -> dict:
+    return {(GLOBAL_PERIOD, "clients_total"): 1}
+
+
+def search_index_counts() -> dict:
+    """Bumps the generation the search indexes check (see utils.search); only ever added."""
+    return {(GLOBAL_PERIOD, "search_generation"): 1}
+
+
+def assignment_counts(assignment: DutyAssignment) -> dict:
+    if assignment.is_active is False:
+        return {}
+    return active_assignment_counts(assignment.duty_status)
+
+
+def active_assignment_counts(duty_status: DutyStatus) -> dict:
+    counts = {(GLOBAL_PERIOD, "assignments_active"): 1}
+    duty_status = duty_status or DutyStatus.ON_DUTY
+    if duty_status == DutyStatus.ON_DUTY:
+        counts[(GLOBAL_PERIOD, "assignments_on_duty")] = 1
+    elif duty_status == DutyStatus.OFF_DUTY:
+        counts[(GLOBAL_PERIOD, "assignments_off_duty")] = 1
+    return counts
+
+
+def salary_counts(record: SalaryRecord) -> dict:
+    period = period_key(record.year, record.month)
+    column = "salary_paid" if record.is_paid else "salary_pending"
+    return {
+        (period, "salary_records"): 1,
+        (period, column): record.final_salary or 0.0,
+    }
+
+
+def inventory_counts(record: InventoryRecord) -> dict:
+    status = record.status or InventoryStatus.ISSUED
+    return {
+        (GLOBAL_PERIOD, f"inventory_{InventoryStatus(status).value}"): 1,
+        (period_key(record.issue_date.year, record.issue_date.month), "inventory_issued_in_period"): 1,
+    }
+
+
+# --- Applying changes ------------------------------------------------------
+
+def _dialect_insert(db: AsyncSession):
+    """The dialect's INSERT supporting ON CONFLICT, or None if it has none."""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+async def apply_counter_delta(db: AsyncSession, before: dict, after: dict):
+    """Add `after - before` to the counters inside the caller's transaction.
+
+    Uses relative `col = col + n` updates so concurrent writers don't lose
+    increments. Each period is one INSERT ... ON CONFLICT DO UPDATE, so the
+    first write of a month costs no more than later ones. Nothing is
+    committed here; the caller's commit makes the counter change atomic
+    with the row change.
+    """
+    deltas = defaultdict(dict)
+    for key in set(before) | set(after):
+        amount = after.get(key, 0) - before.get(key, 0)
+        if amount:
+            period, column = key
+            deltas[period][column] = amount
+
+    insert = _dialect_insert(db)
+    now = datetime.utcnow()
+    for period, columns in deltas.items():
+        if insert is not None:
+            stmt = insert(DashboardCounter).values(period=period, updated_at=now, **columns)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[DashboardCounter.period],
+                set_={
+                    **{column: getattr(DashboardCounter, column) + stmt.excluded[column] for column in columns},
+                    "updated_at": stmt.excluded.updated_at,
+                }
+            ))
+            continue
+        values = {
+            column: getattr(DashboardCounter, column) + amount
+            for column, amount in columns.items()
+        }
+        values["updated_at"] = now
+        stmt = update(DashboardCounter).where(DashboardCounter.period == period).values(values)
+        if (await db.execute(stmt)).rowcount == 0:
+            if await db.get(DashboardCounter, period) is None:
+                db.add(DashboardCounter(period=period))
+                await db.flush()
+            await db.execute(stmt)
+
+
+async def read_counters(db: AsyncSession, *periods: str) -> dict:
+    rows = (await db.scalars(
+        select(DashboardCounter).where(DashboardCounter.period.in_(periods))
+    )).all()
+    found = {row.period: {c: getattr(row, c) for c in COUNTER_COLUMNS} for row in rows}
+    return {p: found.get(p, dict.fromkeys(COUNTER_COLUMNS, 0)) for p in periods}
+
+
+# --- Rebuild ---------------------------------------------------------------
+
+async def rebuild_counters(db: AsyncSession):
+    """Recompute every counter row from the source tables and commit."""
+    totals = defaultdict(lambda: defaultdict(float))
+
+    for status, count in await db.execute(select(Guard.status, func.count()).group_by(Guard.status)):
+        totals[GLOBAL_PERIOD][f"guards_{GuardStatus(status or GuardStatus.ACTIVE).value}"] += count
+
+    totals[GLOBAL_PERIOD]["clients_total"] = await db.scalar(select(func.count(Client.id)))
+
+    for duty_status, count in await db.execute(
+        select(DutyAssignment.duty_status, func.count())
+        .where(DutyAssignment.is_active == True)
+        .group_by(DutyAssignment.duty_status)
+    ):
+        totals[GLOBAL_PERIOD]["assignments_active"] += count
+        if duty_status == DutyStatus.ON_DUTY:
+            totals[GLOBAL_PERIOD]["assignments_on_duty"] += count
+        elif duty_status == DutyStatus.OFF_DUTY:
+            totals[GLOBAL_PERIOD]["assignments_off_duty"] += count
+
+    for status, count in await db.execute(select(InventoryRecord.status, func.count()).group_by(InventoryRecord.status)):
+        totals[GLOBAL_PERIOD][f"inventory_{InventoryStatus(status or InventoryStatus.ISSUED).value}"] += count
+
+    year, month = extract("year", InventoryRecord.issue_date), extract("month", InventoryRecord.issue_date)
+    for y, m, count in await db.execute(select(year, month, func.count()).group_by(year, month)):
+        totals[period_key(int(y), int(m))]["inventory_issued_in_period"] += count
+
+    for y, m, records, paid, pending in await db.execute(
+        select(
+            SalaryRecord.year,
+            SalaryRecord.month,
+            func.count(),
+            func.coalesce(func.sum(case((SalaryRecord.is_paid == True, SalaryRecord.final_salary), else_=0)), 0),
+            func.coalesce(func.sum(case((SalaryRecord.is_paid == True, 0), else_=SalaryRecord.final_salary)), 0),
+        ).group_by(SalaryRecord.year, SalaryRecord.month)
+    ):
+        period = totals[period_key(y, m)]
+        period["salary_records"] += records
+        period["salary_paid"] += paid
+        period["salary_pending"] += pending
+
+    # Carried over, and moved on so every worker's search index is rebuilt too
+    generation = await db.scalar(
+        select(DashboardCounter.search_generation).where(DashboardCounter.period == GLOBAL_PERIOD)
+    )
+    await db.execute(delete(DashboardCounter))
+    now = datetime.utcnow()
+    db.add_all(
+        DashboardCounter(
+            period=period,
+            updated_at=now,
+            **{c: cast(values.get(c, 0)) for c, cast in COUNTER_COLUMNS.items()},
+            **({"search_generation": (generation or 0) + 1} if period == GLOBAL_PERIOD else {})
+        )
+        for period, values in totals.items()
+    )
+    await db.commit()
+
+
+if __name__ == "__main__":
+    import asyncio
+    from config.database import SessionLocal
+
+    async def main():
+        async with SessionLocal() as session:
+            await rebuild_counters(session)
+
+    asyncio.run(main())
+    print("dashboard_counters rebuilt")
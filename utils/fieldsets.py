@@ -0,0 +1,117 @@
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, joinedload
+from functools import lru_cache
+from utils.serialization import json_response
+from typing import List, Optional, Union, get_args, get_origin
+import types
+
+
+def _nested_model(annotation):
+    """The pydantic model inside `annotation` (X or Optional[X]), or None."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        models = [arg for arg in get_args(annotation) if arg is not type(None)]
+        annotation = models[0] if len(models) == 1 else None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def parse_fields(fields: str, model) -> tuple:
+    """Validate a `fields=` parameter against response `model`.
+
+    Returns the requested names as a tuple in the model's field order, or None
+    when all fields are wanted. Nested models can be narrowed with dotted
+    names (guard.name).
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    for name in requested:
+        head, _, sub = name.partition(".")
+        field = model.model_fields.get(head)
+        nested = _nested_model(field.annotation) if field is not None else None
+        if field is None or (sub and (nested is None or sub not in nested.model_fields)):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown field {name!r}; available: {', '.join(model.model_fields)}"
+            )
+    # A whole nested object makes its dotted subfields redundant
+    requested = {name for name in requested if "." not in name or name.partition(".")[0] not in requested}
+    position = {name: i for i, name in enumerate(model.model_fields)}
+    return tuple(sorted(requested, key=lambda name: (position[name.partition(".")[0]], name)))
+
+
+def _split(fields: tuple):
+    columns, nested = [], {}
+    for name in fields:
+        head, _, sub = name.partition(".")
+        if sub:
+            nested.setdefault(head, []).append(sub)
+        else:
+            columns.append(head)
+    return columns, nested
+
+
+@lru_cache(maxsize=256)
+def sparse_model(model, fields: tuple):
+    """`model` cut down to `fields`, built once per field set."""
+    columns, nested = _split(fields)
+    definitions = {}
+    for name in columns:
+        field = model.model_fields[name]
+        definitions[name] = (field.annotation, field)
+    for name, subfields in nested.items():
+        field = model.model_fields[name]
+        sub_model = sparse_model(_nested_model(field.annotation), tuple(subfields))
+        optional = _nested_model(field.annotation) is not field.annotation
+        definitions[name] = (Optional[sub_model] if optional else sub_model, None if optional else ...)
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions
+    )
+
+
+def model_columns(entity, model, fields: tuple = None) -> list:
+    """Columns of ORM class `entity` behind `fields` of `model`, or behind all of its fields.
+
+    Selecting these instead of the entity yields plain result rows, skipping
+    ORM hydration and the identity map.
+    """
+    mapper = inspect(entity)
+    return [getattr(entity, name) for name in fields or model.model_fields if name in mapper.column_attrs]
+
+
+def column_options(entity, model, fields: tuple) -> list:
+    """Loader options fetching only the columns behind `fields` of ORM class `entity`.
+
+    Relationships named in `fields` are joined and narrowed the same way;
+    those not named are not loaded at all. raiseload makes any access to an
+    unloaded attribute fail loudly instead of issuing a query per row.
+    """
+    mapper = inspect(entity)
+    columns, nested = _split(fields)
+    options = []
+    for name in columns:
+        if name in mapper.relationships:
+            nested[name] = list(_nested_model(model.model_fields[name].annotation).model_fields)
+    # The primary key is always loaded; the ORM needs it for identity anyway
+    loaded = [mapper.get_property_by_column(column).class_attribute for column in mapper.primary_key]
+    loaded += [getattr(entity, name) for name in columns if name in mapper.column_attrs]
+    options.append(load_only(*loaded, raiseload=True))
+    for name, subfields in nested.items():
+        related = mapper.relationships[name].mapper
+        related_columns = [getattr(related.class_, sub) for sub in subfields if sub in related.column_attrs]
+        options.append(joinedload(getattr(entity, name)).load_only(*related_columns, raiseload=True))
+    return options
+
+
+def list_response(model, fields: tuple, items, response: Response = None) -> Response:
+    """Serialize `items` as a list of `model`, cut down to `fields` if given.
+
+    Headers already set on `response` are kept.
+    """
+    return json_response(List[sparse_model(model, fields) if fields else model], items, response)
+
@@ -0,0 +1,160 @@
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+from models.imageasset import ImageAsset
+from utils.storage import storage
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+
+load_dotenv()
+
+# Thumbnails are cropped to exactly this square size, for list views
+IMAGE_THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", 160))
+# Previews keep their aspect ratio and fit in this box, for detail views
+IMAGE_PREVIEW_MAX_SIZE = int(os.getenv("IMAGE_PREVIEW_MAX_SIZE", 1280))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", 80))
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", 2))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def derivative_fields(field: str) -> dict:
+    """Guard columns holding the derivatives of the image in `field`, e.g. image_url."""
+    prefix = field[:-len("_url")]
+    return {"thumbnail_url": f"{prefix}_thumbnail_url", "preview_url": f"{prefix}_preview_url"}
+
+
+def guard_image_values(field: str, urls: dict) -> dict:
+    """Guard column values for an image stored by ImagePipeline.store."""
+    values = {field: urls["url"]}
+    for kind, column in derivative_fields(field).items():
+        values[column] = urls[kind]
+    return values
+
+
+def _jpeg(image) -> bytes:
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def make_derivatives(data: bytes) -> dict:
+    """Decode an image and render its thumbnail and preview as JPEG. Runs in a worker process."""
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        # Let the JPEG decoder downscale by up to 8x while decoding; the preview
+        # still gets at least IMAGE_PREVIEW_MAX_SIZE pixels on its long side
+        image.draft("RGB", (IMAGE_PREVIEW_MAX_SIZE, IMAGE_PREVIEW_MAX_SIZE))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        preview = image.copy()
+        preview.thumbnail((IMAGE_PREVIEW_MAX_SIZE, IMAGE_PREVIEW_MAX_SIZE), Image.Resampling.LANCZOS)
+        thumbnail = ImageOps.fit(preview, (IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+        return {"thumbnail": _jpeg(thumbnail), "preview": _jpeg(preview), "width": width, "height": height}
+
+
+class ImagePipeline:
+    """Content-hash dedup and thumbnail/preview generation for uploaded images.
+
+    An image is identified by the SHA-256 of its bytes. If an identical file
+    is already stored on the current backend its ImageAsset is reused and
+    nothing is uploaded. Otherwise the derivatives are rendered in a process
+    pool, since decoding and resizing are CPU-bound and would stall the event
+    loop and the other threads, and the original and derivatives are
+    uploaded under the hash as object name. Files Pillow cannot decode are
+    stored without derivatives.
+    """
+
+    def __init__(self, workers: int = IMAGE_PROCESS_WORKERS):
+        self.workers = workers
+        self.processed = 0
+        self.deduplicated = 0
+        self.undecodable = 0
+        self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs threads (storage, aiosqlite) is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def derivatives(self, data: bytes):
+        """Rendered derivatives, or None if the file is not a decodable image."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool(), make_derivatives, data)
+        except (OSError, Image.DecompressionBombError):
+            self.undecodable += 1
+            return None
+
+    async def store(self, session_factory, data: bytes, folder: str, filename: str = None) -> dict:
+        """Store an image and its derivatives; returns url, thumbnail_url and preview_url."""
+        sha256 = content_hash(data)
+        backend = storage.backend.name
+        async with session_factory() as db:
+            asset = await db.scalar(
+                select(ImageAsset).where(ImageAsset.sha256 == sha256, ImageAsset.backend == backend)
+            )
+        if asset is not None:
+            self.deduplicated += 1
+            return {"url": asset.url, "thumbnail_url": asset.thumbnail_url, "preview_url": asset.preview_url}
+
+        derived = await self.derivatives(data)
+        uploads = [storage.upload_bytes(data, folder, filename, key=sha256)]
+        if derived:
+            uploads.append(storage.upload_bytes(derived["thumbnail"], f"{folder}/thumbnails", "thumbnail.jpg", key=sha256))
+            uploads.append(storage.upload_bytes(derived["preview"], f"{folder}/previews", "preview.jpg", key=sha256))
+        urls = await asyncio.gather(*uploads)
+        values = {
+            "sha256": sha256,
+            "backend": backend,
+            "url": urls[0],
+            "thumbnail_url": urls[1] if derived else None,
+            "preview_url": urls[2] if derived else None,
+            "width": derived["width"] if derived else None,
+            "height": derived["height"] if derived else None,
+            "size_bytes": len(data),
+        }
+
+        async with session_factory() as db:
+            try:
+                await db.execute(insert(ImageAsset).values(values))
+                await db.commit()
+            except IntegrityError:
+                # The same file was stored concurrently; the object names match, so either row will do
+                await db.rollback()
+        self.processed += 1
+        return {key: values[key] for key in ("url", "thumbnail_url", "preview_url")}
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "deduplicated": self.deduplicated,
+            "undecodable": self.undecodable,
+        }
+
+
+image_pipeline = ImagePipeline()
+
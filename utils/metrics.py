@@ -0,0 +1,221 @@
+from bisect import bisect_left
+from dotenv import load_dotenv
+from config.database import QueryStats, query_metrics, request_queries, pool_status
+from utils.querycount import QUERY_DEBUG, check_queries, report_queries
+import os
+import time
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Bearer token a scraper must send to GET /metrics; empty leaves it open (firewall it instead)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _labels(names, values) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+class Counter:
+    """Monotonic counter per label tuple.
+
+    Like everything in this module it is only updated from the event loop
+    thread, so plain dict and int updates are safe without locks, and a
+    scrape running between two updates simply sees the earlier value.
+    """
+
+    def __init__(self, name: str, help: str, label_names: tuple):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.values = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram per label tuple.
+
+    Each series is a list of per-bucket counts (made cumulative only when
+    rendered) followed by the running sum, so an observation is one bisect
+    and two additions.
+    """
+
+    def __init__(self, name: str, help: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [*(repr(float(b)) for b in self.buckets), "+Inf"]
+        for labels, series in self.series.items():
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+REQUEST_LABELS = ("route", "method", "status")
+
+requests_total = Counter(
+    "http_requests_total", "Requests by route template, method and status.", REQUEST_LABELS
+)
+request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route template, method and status.",
+    REQUEST_LABELS, REQUEST_BUCKETS
+)
+request_db_duration = Histogram(
+    "http_request_db_seconds", "Time spent in database queries per request.", ("route", "method"), DB_BUCKETS
+)
+request_db_queries = Counter(
+    "http_request_db_queries_total", "Database queries issued by requests.", ("route", "method")
+)
+request_exceptions = Counter(
+    "http_request_exceptions_total", "Unhandled exceptions by route template and type.", ("route", "exception")
+)
+request_repeated_queries = Counter(
+    "http_request_repeated_queries_total", "Requests repeating one statement shape (N+1 loops).", ("route", "method")
+)
+request_query_budget_exceeded = Counter(
+    "http_request_query_budget_exceeded_total", "Requests making more queries than their route's budget.",
+    ("route", "method")
+)
+
+
+def _gauges(name: str, help: str, values: dict) -> list:
+    """One gauge family with a `stat` label from a stats() dict, skipping non-numeric values."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f'{name}{{stat="{key}"}} {value}')
+    return lines
+
+
+def render_metrics() -> str:
+    # Imported here: these modules pull in most of the app, and the metrics
+    # middleware should be importable without them
+    from utils.cache import response_cache
+    from utils.passwords import password_hasher
+    from utils.ratelimit import rate_limiter
+    from utils.upload_outbox import upload_worker
+
+    lines = []
+    for metric in (
+        requests_total, request_duration, request_db_duration, request_db_queries, request_exceptions,
+        request_repeated_queries, request_query_budget_exceeded,
+    ):
+        lines += metric.render()
+    lines += [
+        "# HELP db_queries_total Database queries, including those of background workers.",
+        "# TYPE db_queries_total counter",
+        f"db_queries_total {query_metrics.count}",
+        "# HELP db_query_seconds_total Time spent in database queries.",
+        "# TYPE db_query_seconds_total counter",
+        f"db_query_seconds_total {query_metrics.seconds}",
+        "# HELP db_query_seconds_max Slowest database query so far.",
+        "# TYPE db_query_seconds_max gauge",
+        f"db_query_seconds_max {query_metrics.max_seconds}",
+    ]
+    lines += _gauges("db_pool", "Connection pool state and checkout waits.", pool_status())
+    lines += _gauges("response_cache", "Response cache counters.", response_cache.stats())
+    lines += _gauges("password_pool", "bcrypt thread pool state.", password_hasher.stats())
+    lines += _gauges("upload_worker", "Upload outbox worker state.", upload_worker.stats())
+    rate_limit = rate_limiter.stats()
+    lines += _gauges("rate_limiter", "Rate limiter state.", rate_limit)
+    lines += [
+        "# HELP rate_limited_total Requests rejected by the rate limiter by route class.",
+        "# TYPE rate_limited_total counter",
+        *(f'rate_limited_total{{class="{name}"}} {count}' for name, count in rate_limit["limited"].items()),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def record_request(route: str, method: str, status: int, seconds: float, queries: QueryStats):
+    labels = (route, method, status)
+    requests_total.inc(labels)
+    request_duration.observe(labels, seconds)
+    if queries.count:
+        request_db_queries.inc((route, method), queries.count)
+        request_db_duration.observe((route, method), queries.seconds)
+        repeated, budget = check_queries(method, route, queries)
+        if repeated:
+            request_repeated_queries.inc((route, method))
+        if budget is not None:
+            request_query_budget_exceeded.inc((route, method))
+        if repeated or budget is not None:
+            report_queries(method, route, queries, repeated, budget)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request and the database queries it makes.
+
+    Requests are labelled with the route template (/guard/{guard_id}), never
+    the raw path, so the number of series stays bounded; requests that
+    matched no route, including those rejected before routing, share
+    "unmatched". With QUERY_DEBUG on, responses also carry the number of
+    queries made and the time spent in them up to the response start.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (METRICS_ENABLED or QUERY_DEBUG):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        queries = QueryStats()
+        token = request_queries.set(queries)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if QUERY_DEBUG:
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        (b"x-query-count", str(queries.count).encode()),
+                        (b"x-query-time-ms", f"{queries.seconds * 1000:.2f}".encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            route = scope.get("route")
+            request_exceptions.inc((route.path if route else "unmatched", type(e).__name__))
+            raise
+        finally:
+            request_queries.reset(token)
+            route = scope.get("route")
+            record_request(
+                route.path if route else "unmatched", scope["method"], status, time.perf_counter() - start, queries
+            )
+
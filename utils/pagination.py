@@ -0,0 +1,117 @@
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, tuple_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+import base64
+import binascii
+import enum
+import json
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def _filters(filters: dict) -> dict:
+    """`filters` without the unset ones, in JSON form."""
+    return {name: _dump(value) for name, value in sorted((filters or {}).items()) if value not in (None, False, "")}
+
+
+def encode_cursor(order: str, values, filters: dict = None) -> str:
+    """Opaque cursor for the row with sort key `values` under sort order `order` and `filters`."""
+    raw = json.dumps([order, [_dump(v) for v in values], _filters(filters)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str, size: int, filters: dict = None) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order, values, cursor_filters = json.loads(raw)
+        values = [_load(v) for v in values]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_order != order or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    if cursor_filters != _filters(filters):
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested search")
+    return values
+
+
+def after(keys, values):
+    """Condition selecting rows that sort after `values` under `keys` [(expression, descending)]."""
+    if len({descending for _, descending in keys}) == 1:
+        # One direction: a row-value comparison, which a composite index can serve
+        left = tuple_(*(expression for expression, _ in keys))
+        right = tuple_(*(literal(value, expression.type) for (expression, _), value in zip(keys, values)))
+        return left < right if keys[0][1] else left > right
+    conditions = []
+    for i, (expression, descending) in enumerate(keys):
+        ties = [keys[j][0] == values[j] for j in range(i)]
+        conditions.append(and_(*ties, expression < values[i] if descending else expression > values[i]))
+    return or_(*conditions)
+
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    response: Response,
+    keys,
+    order: str,
+    limit: int,
+    cursor: str = None,
+    skip: int = 0,
+    entities: bool = True,
+    filters: dict = None
+) -> list:
+    """Run `query` for one page ordered by `keys` and set the next page's cursor header.
+
+    `keys` is a list of (expression, descending) ending with a unique column,
+    usually the primary key, so the order is total and stable. `order` names
+    the sort and is embedded in cursors so one is never applied to another
+    ordering. `filters`, the search terms and filters the query was built
+    from, are embedded the same way: a sort key such as a relevance score only
+    means something for the term it was computed against. With a `cursor` the page starts right after the row it was made
+    from (keyset pagination: cost does not grow with depth, and rows inserted
+    meanwhile do not shift pages). Without one, `skip` is applied as an offset
+    for older clients. Either way the response carries X-Next-Cursor when
+    there are more rows.
+
+    Returns the model instances of a select(Model) query, or the rows when
+    `entities` is false.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+
+    labels = [f"_page_key_{i}" for i in range(len(keys))]
+    query = query.add_columns(*(expression.label(label) for (expression, _), label in zip(keys, labels)))
+    query = query.order_by(None).order_by(
+        *(expression.desc() if descending else expression.asc() for expression, descending in keys)
+    )
+    if cursor:
+        query = query.where(after(keys, decode_cursor(cursor, order, len(keys), filters)))
+    elif skip:
+        query = query.offset(skip)
+
+    # One extra row tells whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(order, [last[label] for label in labels], filters)
+    if entities:
+        return [row[0] for row in rows]
+    return rows
+
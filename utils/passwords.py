@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from utils.util import hash_password, verify_password
+import asyncio
+import os
+import time
+
+load_dotenv()
+
+# bcrypt cost factor for new hashes; each +1 doubles the time per hash.
+# Existing hashes with another cost are upgraded on the user's next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Threads hashing at once. bcrypt releases the GIL, so this is real CPU
+# parallelism; keep it below the core count to leave one for the event loop.
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", 2))
+# Password operations allowed to wait for a thread; beyond that they are
+# rejected (503) rather than piling up behind a login storm
+PASSWORD_MAX_QUEUE = int(os.getenv("PASSWORD_MAX_QUEUE", 64))
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+def hash_rounds(hashed_password: str) -> int:
+    """The cost factor encoded in a bcrypt hash ($2b$12$...)."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated thread pool so logins never block the event loop.
+
+    At most `workers` operations run at once; up to `max_queue` more wait
+    for a slot and anything beyond that raises PasswordPoolBusy at once. A
+    separate pool keeps a login burst from starving the storage uploads,
+    and the storage uploads from delaying logins.
+    """
+
+    def __init__(self, workers: int = PASSWORD_WORKERS, rounds: int = BCRYPT_ROUNDS, max_queue: int = PASSWORD_MAX_QUEUE):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_queue = max_queue
+        self.hashed = 0
+        self.verified = 0
+        self.rehashed = 0
+        self.rejected = 0
+        self.peak_queued = 0
+        self.wait_seconds = 0.0
+        self.work_seconds = 0.0
+        self._pending = 0
+        self._running = 0
+        self._slots = asyncio.Semaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, func, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolBusy(f"{self._pending} password operations already in progress")
+        self._pending += 1
+        self.peak_queued = max(self.peak_queued, self._pending - self._running)
+        queued_at = time.perf_counter()
+        try:
+            async with self._slots:
+                started_at = time.perf_counter()
+                self.wait_seconds += started_at - queued_at
+                self._running += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+                finally:
+                    self._running -= 1
+                    self.work_seconds += time.perf_counter() - started_at
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        hashed_password = await self._run(hash_password, password, self.rounds)
+        self.hashed += 1
+        return hashed_password
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        valid = await self._run(verify_password, password, hashed_password)
+        self.verified += 1
+        return valid
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return hash_rounds(hashed_password) != self.rounds
+
+    async def rehash(self, password: str) -> str:
+        """A new hash at the current cost, for a password that was just verified."""
+        hashed_password = await self.hash(password)
+        self.rehashed += 1
+        return hashed_password
+
+    def stats(self) -> dict:
+        operations = self.hashed + self.verified
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queued": self._pending - self._running,
+            "peak_queued": self.peak_queued,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "rehashed": self.rehashed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / operations * 1000, 2) if operations else None,
+            "avg_work_ms": round(self.work_seconds / operations * 1000, 2) if operations else None,
+        }
+
+
+password_hasher = PasswordHasher()
+
@@ -0,0 +1,122 @@
+from sqlalchemy import select, update, bindparam, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import Counter
+from models.guard import Guard, GuardStatus
+from models.salaryrecord import SalaryRecord
+from utils.counters import apply_counter_delta, salary_counts
+
+DEFAULT_MONTHLY_DEDUCTION = 500.0
+
+
+def calculate_salary(guard: Guard, deductions: float = 0.0, bonus: float = 0.0):
+    """Return (uniform_deduction, final_salary) for one month of `guard`.
+
+    The uniform is paid off in monthly installments until the uniform cost is
+    covered; the caller is responsible for adding the installment to
+    guard.uniform_deducted_amount.
+    """
+    monthly_deduction = guard.monthly_deduction or DEFAULT_MONTHLY_DEDUCTION
+    remaining_uniform_amount = (guard.uniform_cost or 0.0) - (guard.uniform_deducted_amount or 0.0)
+    uniform_deduction = 0.0
+    if remaining_uniform_amount > 0:
+        uniform_deduction = min(monthly_deduction, remaining_uniform_amount)
+
+    final_salary = (
+        (guard.current_salary or 0.0) -
+        (deductions or 0.0) -
+        uniform_deduction +
+        (bonus or 0.0)
+    )
+    return uniform_deduction, final_salary
+
+
+def _insert_ignoring_existing(db: AsyncSession):
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"payroll run is not supported on {dialect}")
+    return insert(SalaryRecord).on_conflict_do_nothing(
+        index_elements=["guard_contact_number", "month", "year"]
+    )
+
+
+async def run_payroll(db: AsyncSession, month: int, year: int, dry_run: bool = False) -> dict:
+    """Create the month's salary record of every active guard in one transaction.
+
+    Guards that already have a record for the month are skipped, both by the
+    initial anti-join and by ON CONFLICT DO NOTHING for rows created
+    concurrently. Uniform progress is only advanced for the rows actually
+    inserted. With dry_run nothing is written.
+    """
+    active_guards = (await db.execute(
+        select(Guard, SalaryRecord.id)
+        .outerjoin(SalaryRecord, and_(
+            SalaryRecord.guard_contact_number == Guard.contact_number,
+            SalaryRecord.month == month,
+            SalaryRecord.year == year
+        ))
+        .where(Guard.status == GuardStatus.ACTIVE)
+        .order_by(Guard.id)
+    )).all()
+    guards = [guard for guard, record_id in active_guards if record_id is None]
+
+    rows = []
+    for guard in guards:
+        uniform_deduction, final_salary = calculate_salary(guard)
+        rows.append({
+            "guard_contact_number": guard.contact_number,
+            "month": month,
+            "year": year,
+            "deductions": 0.0,
+            "bonus": 0.0,
+            "uniform_deduction": uniform_deduction,
+            "final_salary": final_salary,
+            "is_paid": False,
+        })
+
+    if not dry_run and rows:
+        inserted = (await db.execute(
+            _insert_ignoring_existing(db).returning(
+                SalaryRecord.guard_contact_number,
+                SalaryRecord.uniform_deduction,
+                SalaryRecord.final_salary
+            ),
+            rows
+        )).all()
+        created = {row.guard_contact_number for row in inserted}
+        rows = [row for row in rows if row["guard_contact_number"] in created]
+
+        uniform_updates = [
+            {"contact": row["guard_contact_number"], "amount": row["uniform_deduction"]}
+            for row in rows if row["uniform_deduction"]
+        ]
+        if uniform_updates:
+            guards_table = Guard.__table__
+            await (await db.connection()).execute(
+                update(guards_table)
+                .where(guards_table.c.contact_number == bindparam("contact"))
+                .values(uniform_deducted_amount=func.coalesce(guards_table.c.uniform_deducted_amount, 0.0) + bindparam("amount")),
+                uniform_updates
+            )
+
+        counts = Counter()
+        for row in rows:
+            counts.update(salary_counts(SalaryRecord(**row)))
+        await apply_counter_delta(db, {}, counts)
+        await db.commit()
+
+    return {
+        "month": month,
+        "year": year,
+        "dry_run": dry_run,
+        "active_guards": len(active_guards),
+        "already_processed": len(active_guards) - len(guards),
+        "records_created": len(rows),
+        "skipped_concurrently": len(guards) - len(rows),
+        "total_uniform_deduction": sum(row["uniform_deduction"] for row in rows),
+        "total_final_salary": sum(row["final_salary"] for row in rows),
+        "records": rows if dry_run else [],
+    }
@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.guard import Guard, GuardStatus
+from utils.payroll import DEFAULT_MONTHLY_DEDUCTION
+import numpy as np
+
+
+@dataclass
+class PayrollArrays:
+    """Column-wise guard data, one array element per guard."""
+    contact_numbers: list
+    current_salary: np.ndarray
+    uniform_cost: np.ndarray
+    uniform_deducted_amount: np.ndarray
+    monthly_deduction: np.ndarray
+
+    def __len__(self):
+        return len(self.contact_numbers)
+
+
+def _column(values) -> np.ndarray:
+    # NULL columns become NaN
+    return np.array(values, dtype=np.float64)
+
+
+async def load_payroll_arrays(db: AsyncSession) -> PayrollArrays:
+    rows = (await db.execute(
+        select(
+            Guard.contact_number,
+            Guard.current_salary,
+            Guard.uniform_cost,
+            Guard.uniform_deducted_amount,
+            Guard.monthly_deduction
+        )
+        .where(Guard.status == GuardStatus.ACTIVE)
+        .order_by(Guard.id)
+    )).all()
+    columns = list(zip(*rows)) or [[]] * 5
+    return PayrollArrays(
+        contact_numbers=list(columns[0]),
+        current_salary=_column(columns[1]),
+        uniform_cost=_column(columns[2]),
+        uniform_deducted_amount=_column(columns[3]),
+        monthly_deduction=_column(columns[4]),
+    )
+
+
+def simulate_payroll(
+    guards: PayrollArrays,
+    months: int = 12,
+    salary_increase_pct: float = 0.0,
+    monthly_deduction: float = None,
+    deductions: float = 0.0,
+    bonus: float = 0.0,
+) -> dict:
+    """Project final salaries and uniform balances `months` ahead.
+
+    Each month applies utils.payroll.calculate_salary to every guard at once:
+    the uniform installment is min(monthly deduction, remaining balance) while
+    a balance remains, and a missing or zero monthly deduction falls back to
+    DEFAULT_MONTHLY_DEDUCTION. `monthly_deduction` overrides every guard's
+    installment, under the same fallback, and `salary_increase_pct` raises the
+    base salary once, up front.
+
+    Returns (months, guards) arrays for final salary, uniform deduction and
+    the uniform balance remaining after each month.
+    """
+    salary = np.nan_to_num(guards.current_salary) * (1 + salary_increase_pct / 100)
+    uniform_cost = np.nan_to_num(guards.uniform_cost)
+    deducted = np.nan_to_num(guards.uniform_deducted_amount).copy()
+
+    if monthly_deduction is not None:
+        installment = np.full(len(guards), float(monthly_deduction))
+    else:
+        installment = np.nan_to_num(guards.monthly_deduction)
+    # calculate_salary's `monthly_deduction or DEFAULT_MONTHLY_DEDUCTION`, override included
+    installment = np.where(installment == 0, DEFAULT_MONTHLY_DEDUCTION, installment)
+
+    final_salary = np.empty((months, len(guards)))
+    uniform_deduction = np.empty((months, len(guards)))
+    remaining_balance = np.empty((months, len(guards)))
+
+    for month in range(months):
+        remaining = uniform_cost - deducted
+        uniform_deduction[month] = np.where(remaining > 0, np.minimum(installment, remaining), 0.0)
+        deducted += uniform_deduction[month]
+        final_salary[month] = salary - (deductions or 0.0) - uniform_deduction[month] + (bonus or 0.0)
+        remaining_balance[month] = np.maximum(uniform_cost - deducted, 0.0)
+
+    return {
+        "final_salary": final_salary,
+        "uniform_deduction": uniform_deduction,
+        "remaining_balance": remaining_balance,
+    }
+
+
+def _month_labels(start_month: int, start_year: int, months: int) -> list:
+    labels = []
+    for offset in range(months):
+        year, month = divmod(start_month - 1 + offset, 12)
+        labels.append({"month": month + 1, "year": start_year + year})
+    return labels
+
+
+def simulation_summary(guards: PayrollArrays, result: dict, start_month: int, start_year: int,
+                       include_guards: bool = True) -> dict:
+    final_salary = result["final_salary"]
+    uniform_deduction = result["uniform_deduction"]
+    remaining_balance = result["remaining_balance"]
+    labels = _month_labels(start_month, start_year, final_salary.shape[0])
+
+    summary = {
+        "guards": len(guards),
+        "months": [
+            {
+                **label,
+                "total_final_salary": float(final_salary[i].sum()),
+                "total_uniform_deduction": float(uniform_deduction[i].sum()),
+                "outstanding_uniform_balance": float(remaining_balance[i].sum()),
+            }
+            for i, label in enumerate(labels)
+        ],
+        "total_final_salary": float(final_salary.sum()),
+        "total_uniform_deduction": float(uniform_deduction.sum()),
+    }
+    if include_guards:
+        summary["per_guard"] = [
+            {
+                "guard_contact_number": contact,
+                "final_salary": final_salary[:, i].tolist(),
+                "uniform_deduction": uniform_deduction[:, i].tolist(),
+                "remaining_uniform_balance": float(remaining_balance[-1, i]) if len(labels) else None,
+            }
+            for i, contact in enumerate(guards.contact_numbers)
+        ]
+    return summary
+
@@ -4,6 +4,7 @@ from typing import Optional, List
 from models.guard import GuardStatus
 from models.dutyassignment import DutyStatus
 from models.inventoryrecord import InventoryStatus
+from models.uploadoutbox import UploadStatus
 
 
 
@@ -33,6 +34,26 @@ class GuardUpdate(BaseModel):
     cnic_front_url: Optional[str] = None
     cnic_back_url: Optional[str] = None
 
+class StorageMigrationRequest(BaseModel):
+    target: str = Field(..., pattern="^(cloudinary|gcs|local)$")
+    after_id: Optional[int] = None
+    limit: int = Field(100, ge=1, le=1000)
+    dry_run: bool = False
+
+class UploadOutboxResponse(BaseModel):
+    id: int
+    field: str
+    status: UploadStatus
+    attempts: int
+    next_attempt_at: Optional[datetime]
+    last_error: Optional[str]
+    url: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class GuardResponse(BaseModel):
     id: int
     name: str
@@ -45,6 +66,13 @@ class GuardResponse(BaseModel):
     image_url: Optional[str]
     cnic_front_url: Optional[str]
     cnic_back_url: Optional[str]
+    # Small fixed-size thumbnails and compressed previews; null until processed
+    image_thumbnail_url: Optional[str] = None
+    image_preview_url: Optional[str] = None
+    cnic_front_thumbnail_url: Optional[str] = None
+    cnic_front_preview_url: Optional[str] = None
+    cnic_back_thumbnail_url: Optional[str] = None
+    cnic_back_preview_url: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -123,6 +151,21 @@ class SalaryRecordCreate(BaseModel):
     bonus: Optional[float] = 0.0
     notes: Optional[str] = None
 
+class PayrollRunRequest(BaseModel):
+    month: int = Field(..., ge=1, le=12)
+    year: int = Field(..., ge=2000)
+    dry_run: bool = False
+
+class PayrollSimulationRequest(BaseModel):
+    months: int = Field(12, ge=1, le=60)
+    salary_increase_pct: float = 0.0
+    monthly_deduction: Optional[float] = Field(None, ge=0)
+    deductions: float = 0.0
+    bonus: float = 0.0
+    start_month: Optional[int] = Field(None, ge=1, le=12)
+    start_year: Optional[int] = Field(None, ge=2000)
+    include_guards: bool = True
+
 class SalaryRecordUpdate(BaseModel):
     deductions: Optional[float] = None
     bonus: Optional[float] = None
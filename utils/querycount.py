@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from sqlalchemy import event
+from dotenv import load_dotenv
+from config.database import QueryStats
+import os
+import re
+
+load_dotenv()
+
+# Development aid: adds X-Query-Count / X-Query-Time-Ms to every response and
+# prints the statements of requests that repeat a query or exceed their budget
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "false").lower() in ("1", "true", "yes")
+# Runs of one statement shape in a request from which it counts as an N+1 loop
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+
+# Most queries each route may make, by "METHOD /route/template". Every
+# authenticated route includes the user lookup of a cold auth cache, and
+# writes include the counter updates and cache invalidation they trigger.
+# tests/test_query_budgets.py runs every route against its budget; raise
+# one only together with the change that needs it.
+QUERY_BUDGETS = {
+    "POST /auth/register": 4,
+    "POST /auth/login": 2,  # + rehash when BCRYPT_ROUNDS changed
+    "POST /auth/revoke": 2,
+    "POST /client/": 5,
+    "GET /client/": 3, # + the search generation check on SQLite
+    "GET /client/{contact_number}": 2,
+    "GET /client/{contact_number}/guards": 3,
+    "PUT /client/{client_id}": 5,
+    "DELETE /client/{client_id}": 5,
+    "POST /dutyassignment/": 5,
+    "GET /dutyassignment/": 2,
+    "GET /dutyassignment/{assignment_id}": 2,
+    "PUT /dutyassignment/{assignment_id}": 6,
+    "POST /dutyassignment/reassign/{guard_contact_number}": 4,
+    "DELETE /dutyassignment/{assignment_id}": 6,
+    "GET /dutyassignment/client-guard-assignment/{client_contact_number}": 2,
+    "POST /guard/": 8,  # 3 of them outbox rows, one per image
+    "POST /guard/storage/migrate": 2,
+    "GET /guard/": 3, # + the search generation check on SQLite
+    "GET /guard/all": 2,
+    "GET /guard/{guard_id}": 2,
+    "GET /guard/by-contact/{contact_number}": 2,
+    "GET /guard/{guard_id}/uploads": 2,
+    "POST /guard/{guard_id}/uploads/retry": 2,
+    "PUT /guard/{guard_id}": 10,  # new contact number and all three images, queued like on create
+    "DELETE /guard/{guard_id}": 9,
+    "POST /inventory/": 7,
+    "GET /inventory/inventory-records/": 2,
+    "GET /inventory/inventory-records/{record_id}": 2,
+    "PUT /inventory/inventory-records/{record_id}": 4,
+    "POST /inventory/inventory-records/return/{record_id}": 5,
+    "GET /inventory/inventory-records/guard/{guard_id}": 4,
+    "GET /media/{key:path}": 1,
+    "GET /metrics": 0,
+    "GET /reports/monthly-summary": 2,
+    "GET /reports/client-summary/{client_id}": 4,
+    "GET /reports/guard-history/{guard_id}": 5,
+    "POST /salaryrecord/": 7,
+    "POST /salaryrecord/payroll-run": 5,
+    "POST /salaryrecord/simulate": 2,
+    "GET /salaryrecord/": 2,
+    "GET /salaryrecord/{contact_number}": 2,
+    "GET /salaryrecord/{record_id}": 2,
+    "PUT /salaryrecord/{contact_number}": 6,
+    "PUT /salaryrecord/by-id/{record_id}": 6,
+    "DELETE /salaryrecord/{record_id}": 5,
+    "GET /search/guards": 3, # + the search generation check on SQLite
+    "GET /search/autocomplete": 1,
+    "GET /search/autocomplete/stats": 1,
+    "GET /search/clients": 3, # + the search generation check on SQLite
+    "GET /search/assignments": 3, # + the search generation check on SQLite
+    "GET /stat/overview": 3,
+    "GET /stat/cache": 1,
+    "GET /stat/db-pool": 1,
+    "GET /stat/search-index": 1,
+    "GET /stat/upload-outbox": 2,
+    "GET /stat/passwords": 1,
+    "GET /stat/auth": 1,
+    "GET /stat/rate-limit": 1,
+}
+
+# Placeholder lists, as in IN (?, ?, ?) or VALUES (?, ?), of any length
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|\$\d+|:\w+))*\s*\)")
+# IN lists SQLAlchemy expands per call ("expanding" bind parameters) and multi-row VALUES
+_REPEATED_GROUPS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    """`statement` with whitespace and placeholder lists collapsed.
+
+    Two statements with the same shape differ only in their parameters, so
+    several of them in one request are a loop issuing one query per item.
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _REPEATED_GROUPS.sub(r"\1", shape)
+
+
+def repeated_statements(stats: QueryStats, threshold: int = QUERY_REPEAT_THRESHOLD) -> dict:
+    """{shape: runs} for every statement shape run at least `threshold` times."""
+    if stats.count < threshold:
+        return {}
+    shapes = {}
+    for statement, runs in stats.statements.items():
+        shape = statement_shape(statement)
+        shapes[shape] = shapes.get(shape, 0) + runs
+    return {shape: runs for shape, runs in shapes.items() if runs >= threshold}
+
+
+def query_budget(method: str, route: str) -> int:
+    """The pinned budget of a route template, or None if it has none."""
+    return QUERY_BUDGETS.get(f"{method} {route}")
+
+
+def check_queries(method: str, route: str, stats: QueryStats) -> tuple:
+    """(repeated shapes, budget or None if kept) for a finished request."""
+    budget = query_budget(method, route)
+    return repeated_statements(stats), budget if budget is not None and stats.count > budget else None
+
+
+def report_queries(method: str, route: str, stats: QueryStats, repeated: dict, budget: int):
+    if budget is not None:
+        print(f"Query budget exceeded: {method} {route} made {stats.count} queries, budget {budget}")
+    for shape, runs in repeated.items():
+        print(f"Repeated query ({runs}x) in {method} {route}: {shape}")
+    if QUERY_DEBUG and budget is not None:
+        for statement, runs in stats.statements.items():
+            print(f"  {runs}x {_WHITESPACE.sub(' ', statement).strip()}")
+
+
+class QueryCountExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None):
+    """Fail if the block runs more than `limit` queries through `engine`.
+
+        with assert_max_queries(query_budget("GET", "/guard/")):
+            client.get("/guard/")
+
+    Listens on the engine rather than the request context, so queries made
+    by a TestClient's app thread are counted too, as are any a background
+    worker makes meanwhile. Yields the list of statements run so far.
+    """
+    if engine is None:
+        from config.database import engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    if len(statements) > limit:
+        listing = "\n".join(f"  {_WHITESPACE.sub(' ', s).strip()}" for s in statements)
+        raise QueryCountExceeded(f"{len(statements)} queries, expected at most {limit}:\n{listing}")
+
@@ -0,0 +1,246 @@
+from collections import OrderedDict
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from dotenv import load_dotenv
+from utils.auth import decode_token
+import math
+import os
+import threading
+import time
+import zlib
+
+load_dotenv()
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory, redis or none
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Buckets kept in memory across all shards; the least recently used are dropped beyond it
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", 16))
+# Burst size / refill period in seconds per route class, e.g. "auth=10/60,write=120/60".
+# A class without a limit (reads, by default) is not throttled.
+RATE_LIMITS = os.getenv("RATE_LIMITS", "auth=10/60,write=120/60")
+# Header holding the client address when running behind a proxy, e.g. X-Forwarded-For
+RATE_LIMIT_CLIENT_HEADER = os.getenv("RATE_LIMIT_CLIENT_HEADER", "")
+# Proxies in front of the app that append to that header. The client writes
+# whatever it likes on the left, so the address is taken this many entries
+# from the right, the one the outermost trusted proxy saw.
+RATE_LIMIT_TRUSTED_HOPS = int(os.getenv("RATE_LIMIT_TRUSTED_HOPS", 1))
+
+AUTH_PATHS = ("/auth/login", "/auth/register")
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def _parse_limits(raw: str) -> dict:
+    """{"auth": (capacity, refill per second)} from "auth=10/60,..."."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, value = item.partition("=")
+        capacity, _, period = value.partition("/")
+        limits[name.strip()] = (float(capacity), float(capacity) / float(period))
+    return limits
+
+
+class MemoryRateLimitBackend:
+    """Token buckets in a fixed number of LRU shards, each behind its own lock.
+
+    A bucket is [tokens, last refill time]. A bucket left idle long enough
+    is full again, the same as a new one, so evicting the least recently used
+    keys keeps memory constant without changing any limit in practice.
+    The locks make it safe to call from worker threads too; with one lock
+    per shard they are practically never contended.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, shards: int = RATE_LIMIT_SHARDS):
+        self.max_keys = max_keys
+        self.shard_size = max(1, max_keys // shards)
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self.evictions = 0
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """Spend one token from `key`'s bucket; returns 0, or the seconds until one is available."""
+        index = zlib.crc32(key.encode()) % len(self._shards)
+        shard = self._shards[index]
+        now = time.monotonic()
+        with self._locks[index]:
+            bucket = shard.get(key)
+            if bucket is None:
+                bucket = shard[key] = [capacity, now]
+                if len(shard) > self.shard_size:
+                    shard.popitem(last=False)
+                    self.evictions += 1
+            else:
+                shard.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def stats(self) -> dict:
+        return {
+            "keys": sum(len(shard) for shard in self._shards),
+            "max_keys": self.max_keys,
+            "shards": len(self._shards),
+            "evictions": self.evictions,
+        }
+
+
+# Refill, spend and save a bucket atomically. Tokens come back as a string:
+# Lua numbers are truncated to integers on the way out.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by every worker. Keys expire once they would be full again."""
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL, prefix: str = "ratelimit"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self.prefix = prefix
+        self.errors = 0
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        try:
+            allowed, tokens = await self._script(keys=[f"{self.prefix}:{key}"], args=[capacity, rate, time.time()])
+        except Exception as e:
+            # Fail open: an unreachable Redis must not take the API down with it
+            self.errors += 1
+            print(f"Rate limiter backend error: {e}")
+            return 0.0
+        return 0.0 if allowed else (1 - float(tokens)) / rate
+
+    def stats(self) -> dict:
+        return {"backend_url": RATE_LIMIT_REDIS_URL.rsplit("@", 1)[-1], "errors": self.errors}
+
+
+class RateLimiter:
+    """Classifies requests and charges them to a token bucket.
+
+    Login and registration ("auth") are keyed by client address, since
+    there is no user yet. Other writes ("write") are keyed by user when
+    the request has a valid bearer token, else by address. Reads ("read")
+    are only limited if RATE_LIMITS names them.
+    """
+
+    def __init__(self, backend=None, limits: dict = None):
+        self.backend = backend
+        self.limits = limits or {}
+        self.allowed = 0
+        self.limited = {}
+
+    @classmethod
+    def from_env(cls):
+        if RATE_LIMIT_BACKEND == "redis":
+            backend = RedisRateLimitBackend()
+        elif RATE_LIMIT_BACKEND == "none":
+            backend = None
+        else:
+            backend = MemoryRateLimitBackend()
+        return cls(backend, _parse_limits(RATE_LIMITS))
+
+    @staticmethod
+    def route_class(method: str, path: str) -> str:
+        if method == "POST" and path in AUTH_PATHS:
+            return "auth"
+        if method in WRITE_METHODS:
+            return "write"
+        return "read"
+
+    @staticmethod
+    def client_address(scope) -> str:
+        if RATE_LIMIT_CLIENT_HEADER and RATE_LIMIT_TRUSTED_HOPS > 0:
+            header = RATE_LIMIT_CLIENT_HEADER.lower().encode()
+            hops = [
+                hop.strip()
+                for name, value in scope["headers"] if name == header
+                for hop in value.decode().split(",")
+            ]
+            # Fewer entries than trusted proxies: the request bypassed them
+            if len(hops) >= RATE_LIMIT_TRUSTED_HOPS and hops[-RATE_LIMIT_TRUSTED_HOPS]:
+                return hops[-RATE_LIMIT_TRUSTED_HOPS]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    def user_id(scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode().partition(" ")
+                if scheme.lower() != "bearer":
+                    return None
+                try:
+                    return decode_token(token)["sub"]
+                except HTTPException:
+                    return None
+        return None
+
+    async def check(self, scope) -> float:
+        """0 if the request may proceed, else the seconds the client should wait."""
+        route_class = self.route_class(scope["method"], scope["path"])
+        limit = self.limits.get(route_class)
+        if limit is None or self.backend is None:
+            return 0.0
+        user_id = self.user_id(scope) if route_class != "auth" else None
+        key = f"{route_class}:user:{user_id}" if user_id else f"{route_class}:ip:{self.client_address(scope)}"
+        retry_after = await self.backend.take(key, *limit)
+        if retry_after:
+            self.limited[route_class] = self.limited.get(route_class, 0) + 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "limits": {name: {"burst": capacity, "per_second": rate} for name, (capacity, rate) in self.limits.items()},
+            "allowed": self.allowed,
+            "limited": self.limited,
+            **(self.backend.stats() if self.backend else {}),
+        }
+
+
+rate_limiter = RateLimiter.from_env()
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with Retry-After once a bucket is empty."""
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            retry_after = await self.limiter.check(scope)
+            if retry_after:
+                response = JSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(retry_after))}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
@@ -0,0 +1,240 @@
+from array import array
+from sqlalchemy import select, func, or_, case, false, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.guard import Guard
+from models.client import Client
+from models.dashboardcounter import DashboardCounter
+from utils.counters import GLOBAL_PERIOD
+import asyncio
+import json
+
+# Columns served by the in-process fallback index
+INDEXED_COLUMNS = (Guard.name, Guard.contact_number, Client.name, Client.contact_number)
+
+
+# --- Ranking ---------------------------------------------------------------
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _column_score(column, term: str):
+    # Exact match > prefix > word prefix > anywhere; shorter values first within a tier
+    term = term.lower()
+    escaped = _escape_like(term)
+    value = func.lower(column)
+    tier = case(
+        (value == term, 3),
+        (value.like(f"{escaped}%", escape="\\"), 2),
+        (value.like(f"% {escaped}%", escape="\\"), 1),
+        else_=0
+    )
+    return tier * 1000 - func.coalesce(func.length(column), 0)
+
+
+def relevance(db: AsyncSession, term: str, *columns):
+    """SQL score of how well `term` matches the best of `columns`; higher is better."""
+    scores = [_column_score(column, term) for column in columns]
+    if len(scores) == 1:
+        return scores[0]
+    if db.bind.dialect.name == "postgresql":
+        return func.greatest(*scores)
+    return func.max(*scores)
+
+
+# --- In-process n-gram index -----------------------------------------------
+
+def substring_trigrams(text: str) -> set:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NGramIndex:
+    """Trigram postings for case-insensitive substring lookups.
+
+    Each posting is an array of row ids in insertion order. Lookups walk the
+    shortest posting of the term's trigrams and confirm the substring on the
+    stored text, so results are exact. Removed or changed rows leave stale
+    ids behind, which are skipped and dropped on the next compaction.
+    """
+
+    MIN_TERM_LENGTH = 3
+
+    def __init__(self):
+        self.postings = {}
+        self.texts = {}
+        self.stale = 0
+
+    def add(self, row_id: int, text: str):
+        if row_id in self.texts:
+            self.discard(row_id)
+        if not text:
+            return
+        text = text.lower()
+        self.texts[row_id] = text
+        for gram in substring_trigrams(text):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array("q")
+            posting.append(row_id)
+
+    def discard(self, row_id: int):
+        if self.texts.pop(row_id, None) is not None:
+            self.stale += 1
+            if self.stale > max(len(self.texts), 1024):
+                self.compact()
+
+    def compact(self):
+        texts, self.texts, self.postings, self.stale = self.texts, {}, {}, 0
+        for row_id, text in texts.items():
+            self.add(row_id, text)
+
+    def candidates(self, term: str):
+        """Ids whose text contains `term`, or None if the term is too short to index."""
+        term = (term or "").lower()
+        if len(term) < self.MIN_TERM_LENGTH:
+            return None
+        postings = [self.postings.get(gram) for gram in substring_trigrams(term)]
+        if not all(postings):
+            return set()
+        texts = self.texts
+        return {row_id for row_id in min(postings, key=len) if term in texts.get(row_id, "")}
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self.texts),
+            "trigrams": len(self.postings),
+            "postings": sum(len(p) for p in self.postings.values()),
+            "stale": self.stale,
+        }
+
+
+class SearchIndexes:
+    """Per-worker n-gram indexes standing in for pg_trgm on SQLite.
+
+    Built from the database on the first search and kept current by the guard
+    and client write paths. Those writes also bump the search generation on
+    the global counters row in their transaction, so a worker checks it (one
+    primary key lookup per request) before using its copy and rebuilds when
+    the database has moved on by more than its own writes, i.e. another
+    worker or process changed guards or clients.
+    """
+
+    def __init__(self, columns=INDEXED_COLUMNS):
+        self.columns = columns
+        self.indexes = None
+        # The generation the indexes reflect, counting this worker's own writes
+        self.generation = None
+        self.rebuilds = 0
+        self._pending = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(column):
+        return column.class_.__tablename__, column.key
+
+    @staticmethod
+    async def current_generation(db: AsyncSession) -> int:
+        generation = await db.scalar(
+            select(DashboardCounter.search_generation).where(DashboardCounter.period == GLOBAL_PERIOD)
+        )
+        return generation or 0
+
+    async def ensure_loaded(self, db: AsyncSession):
+        # Checked once per session, i.e. per request
+        if db.info.get("search_generation_checked"):
+            return
+        generation = await self.current_generation(db)
+        db.info["search_generation_checked"] = True
+        if self.indexes is not None and self.generation == generation:
+            return
+        async with self._lock:
+            if self.indexes is not None and self.generation == generation:
+                return
+            self._pending = []
+            indexes = {}
+            for column in self.columns:
+                index = indexes[self._key(column)] = NGramIndex()
+                model = column.class_
+                for row_id, text in (await db.execute(select(model.id, column))).all():
+                    index.add(row_id, text)
+            # Apply writes that landed while the snapshot was being read. Whether
+            # their bumps are in `generation` is unknown; if so, the next check rebuilds.
+            pending, self._pending = self._pending, None
+            self.indexes, self.generation = indexes, generation
+            self.rebuilds += 1
+            for obj, deleted in pending:
+                self._apply(obj, deleted)
+
+    def _apply(self, obj, deleted: bool):
+        for column in self.columns:
+            if not isinstance(obj, column.class_):
+                continue
+            index = self.indexes[self._key(column)]
+            if deleted:
+                index.discard(obj.id)
+            else:
+                index.add(obj.id, getattr(obj, column.key))
+
+    def update(self, obj):
+        """Re-index a created or updated Guard/Client.
+
+        Call after committing a write that added search_index_counts() to the counters.
+        """
+        self._record(obj, False)
+
+    def remove(self, obj):
+        self._record(obj, True)
+
+    def _record(self, obj, deleted: bool):
+        if self._pending is not None:
+            # Being (re)built: applied to the new indexes once they are in place
+            self._pending.append((obj, deleted))
+        elif self.indexes is not None:
+            self._apply(obj, deleted)
+            self.generation += 1
+
+    async def candidates(self, db: AsyncSession, column, term: str):
+        await self.ensure_loaded(db)
+        return self.indexes[self._key(column)].candidates(term)
+
+    def stats(self) -> dict:
+        if self.indexes is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "generation": self.generation,
+            "rebuilds": self.rebuilds,
+            **{f"{table}.{key}": index.stats() for (table, key), index in self.indexes.items()}
+        }
+
+
+search_indexes = SearchIndexes()
+
+
+async def text_match(db: AsyncSession, term: str, *columns):
+    """Condition matching rows where any of `columns` contains `term` (case-insensitive).
+
+    On PostgreSQL this is ILIKE, which the gin_trgm_ops indexes serve. On
+    SQLite the in-process n-gram index resolves the matching ids, which are
+    passed as one JSON array; terms shorter than three characters fall back
+    to ILIKE.
+    """
+    pattern = f"%{_escape_like(term)}%"
+    ilike = or_(*(column.ilike(pattern, escape="\\") for column in columns))
+    if db.bind.dialect.name != "sqlite":
+        return ilike
+
+    ids = set()
+    for column in columns:
+        matched = await search_indexes.candidates(db, column, term)
+        if matched is None:
+            return ilike
+        ids |= matched
+    if not ids:
+        return false()
+    model = columns[0].class_
+    return model.id.in_(
+        select(literal_column("value")).select_from(func.json_each(json.dumps(sorted(ids))))
+    )
+
@@ -0,0 +1,41 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    """TypeAdapter for `tp`, built once; building one compiles a validator and a serializer."""
+    return TypeAdapter(tp)
+
+
+def to_json(tp, data) -> bytes:
+    """Validate `data` (ORM objects, result rows or dicts) as `tp` and encode it in one pass.
+
+    pydantic-core writes the JSON bytes itself, so no intermediate dicts are
+    built and no second encoder walks them. Result rows are read through their
+    mappings, which validate about twice as fast as Row attribute access.
+    """
+    if isinstance(data, list) and data and isinstance(data[0], Row):
+        data = [row._mapping for row in data]
+    adapter = type_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def passthrough_headers(response: Response) -> dict:
+    """Headers a handler set on its injected `response`, e.g. X-Next-Cursor."""
+    if response is None:
+        return None
+    return {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+
+
+def json_response(tp, data, response: Response = None) -> Response:
+    """A finished JSON response for `data` serialized as `tp`.
+
+    Returning it from a handler skips FastAPI's response_model round trip
+    (validate, convert to dicts, encode); the route's response_model still
+    documents the shape.
+    """
+    return Response(to_json(tp, data), media_type="application/json", headers=passthrough_headers(response))
+
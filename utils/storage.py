@@ -0,0 +1,289 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+from urllib.request import urlopen
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import shutil
+import time
+import uuid
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")  # cloudinary, gcs, local or fake
+STORAGE_MAX_WORKERS = int(os.getenv("STORAGE_MAX_WORKERS", 8))
+STORAGE_UPLOAD_TIMEOUT = float(os.getenv("STORAGE_UPLOAD_TIMEOUT", 30))
+STORAGE_GCS_BUCKET = os.getenv("STORAGE_GCS_BUCKET", "")
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "media")
+# Prefix of the URLs handed out for local files; the app serves them under /media
+STORAGE_LOCAL_BASE_URL = os.getenv("STORAGE_LOCAL_BASE_URL", "/media")
+# Artificial per-upload latency of the fake backend, for benchmarks
+STORAGE_FAKE_DELAY = float(os.getenv("STORAGE_FAKE_DELAY", 0))
+
+
+class StorageError(Exception):
+    pass
+
+
+class StorageTimeout(StorageError):
+    pass
+
+
+# Object names that are sha256 hex digests, as uploads with a content key get
+_CONTENT_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _object_name(folder: str, filename: str = None, key: str = None) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return f"{folder}/{key or uuid.uuid4()}{extension}"
+
+
+def _http_download(url: str, timeout: float) -> bytes:
+    with urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+class CloudinaryStorage:
+    """Blocking Cloudinary SDK calls; StorageService runs them off the event loop."""
+
+    name = "cloudinary"
+
+    def __init__(self, timeout: float = STORAGE_UPLOAD_TIMEOUT):
+        import cloudinary
+        import cloudinary.uploader
+        cloudinary.config()
+        self._uploader = cloudinary.uploader
+        self.timeout = timeout
+
+    def upload(self, fileobj, folder: str, filename: str = None, key: str = None) -> str:
+        # With a content-derived key, an identical file already stored is returned as is
+        result = self._uploader.upload(
+            fileobj,
+            folder=folder,
+            public_id=key or str(uuid.uuid4()),
+            overwrite=False,
+            resource_type="image",
+            timeout=self.timeout
+        )
+        url = result.get("secure_url")
+        if not url:
+            raise StorageError(f"Cloudinary returned no URL for upload to {folder}")
+        return url
+
+    def owns(self, url: str) -> bool:
+        return urlparse(url).netloc.endswith("cloudinary.com")
+
+    def download(self, url: str) -> bytes:
+        return _http_download(url, self.timeout)
+
+
+class GCSStorage:
+    """Google Cloud Storage bucket; credentials come from GOOGLE_APPLICATION_CREDENTIALS."""
+
+    name = "gcs"
+
+    def __init__(self, bucket: str = STORAGE_GCS_BUCKET, timeout: float = STORAGE_UPLOAD_TIMEOUT):
+        if not bucket:
+            raise StorageError("GCS storage requires STORAGE_GCS_BUCKET")
+        from google.cloud import storage as gcs
+        self.bucket = gcs.Client().bucket(bucket)
+        self.timeout = timeout
+
+    def upload(self, fileobj, folder: str, filename: str = None, key: str = None) -> str:
+        blob = self.bucket.blob(_object_name(folder, filename, key))
+        blob.upload_from_file(
+            fileobj,
+            content_type=mimetypes.guess_type(filename or "")[0] or "application/octet-stream",
+            timeout=self.timeout
+        )
+        return blob.public_url
+
+    def _blob_name(self, url: str) -> str:
+        prefix = f"https://storage.googleapis.com/{self.bucket.name}/"
+        return unquote(url[len(prefix):]) if url.startswith(prefix) else None
+
+    def owns(self, url: str) -> bool:
+        return self._blob_name(url) is not None
+
+    def download(self, url: str) -> bytes:
+        return self.bucket.blob(self._blob_name(url)).download_as_bytes(timeout=self.timeout)
+
+
+class LocalStorage:
+    """Files on local disk under STORAGE_LOCAL_ROOT, served by the /media route."""
+
+    name = "local"
+
+    def __init__(self, root: str = STORAGE_LOCAL_ROOT, base_url: str = STORAGE_LOCAL_BASE_URL):
+        self.root = os.path.realpath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def upload(self, fileobj, folder: str, filename: str = None, key: str = None) -> str:
+        name = _object_name(folder, filename, key)
+        path = os.path.join(self.root, name)
+        if not (key and os.path.exists(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary name first so readers never see a partial file
+            partial = f"{path}.{uuid.uuid4().hex}.part"
+            with open(partial, "wb") as out:
+                shutil.copyfileobj(fileobj, out, 1024 * 1024)
+            os.replace(partial, path)
+        return f"{self.base_url}/{name}"
+
+    def path_for(self, key: str) -> str:
+        """Absolute path of `key`, or None if it escapes the storage root."""
+        path = os.path.realpath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            return None
+        return path
+
+    def owns(self, url: str) -> bool:
+        return url.startswith(self.base_url + "/")
+
+    def download(self, url: str) -> bytes:
+        path = self.path_for(url[len(self.base_url) + 1:])
+        if path is None:
+            raise StorageError(f"{url} is outside the local storage root")
+        with open(path, "rb") as f:
+            return f.read()
+
+
+class FakeStorage:
+    """Keeps uploads in memory. For tests, local runs and benchmarks."""
+
+    name = "fake"
+
+    def __init__(self, delay: float = STORAGE_FAKE_DELAY):
+        self.delay = delay
+        self.objects = {}
+
+    def upload(self, fileobj, folder: str, filename: str = None, key: str = None) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        name = _object_name(folder, filename, key)
+        self.objects[name] = fileobj.read()
+        return f"fake://{name}"
+
+    def owns(self, url: str) -> bool:
+        return url.startswith("fake://")
+
+    def download(self, url: str) -> bytes:
+        return self.objects[url[len("fake://"):]]
+
+
+BACKENDS = {
+    "cloudinary": CloudinaryStorage,
+    "gcs": GCSStorage,
+    "local": LocalStorage,
+    "fake": FakeStorage,
+}
+
+
+def create_backend(name: str):
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise StorageError(f"Unknown storage backend {name!r}") from None
+
+
+class StorageService:
+    """Runs backend uploads and downloads in a thread pool so the event loop never blocks.
+
+    Each upload gets its own timeout. A timed-out upload stops being awaited,
+    but the worker thread finishes the SDK call in the background; the SDK's
+    own timeout bounds that.
+    """
+
+    def __init__(self, backend, max_workers: int = STORAGE_MAX_WORKERS, timeout: float = STORAGE_UPLOAD_TIMEOUT):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._other_backends = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+    @classmethod
+    def from_env(cls):
+        return cls(create_backend(STORAGE_BACKEND))
+
+    async def _run(self, description: str, func, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, func, *args), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise StorageTimeout(f"{description} timed out after {self.timeout}s") from e
+        except StorageError:
+            raise
+        except Exception as e:
+            raise StorageError(f"{description} failed: {e}") from e
+
+    async def upload_bytes(self, data: bytes, folder: str, filename: str = None, key: str = None, backend=None) -> str:
+        """Upload raw bytes; a `key` (e.g. a content hash) replaces the random object name."""
+        backend = backend or self.backend
+        return await self._run(f"Upload to {folder}", backend.upload, io.BytesIO(data), folder, filename, key)
+
+    def get_backend(self, name: str):
+        """The configured backend if it is `name`, else a lazily created one."""
+        if name == self.backend.name:
+            return self.backend
+        if name not in self._other_backends:
+            self._other_backends[name] = create_backend(name)
+        return self._other_backends[name]
+
+    def backend_for(self, url: str):
+        """The backend that owns `url`, among those that can be configured here."""
+        if self.backend.owns(url):
+            return self.backend
+        for name in BACKENDS:
+            try:
+                backend = self.get_backend(name)
+            except Exception:
+                continue
+            if backend.owns(url):
+                return backend
+        return None
+
+    async def download(self, url: str) -> bytes:
+        backend = self.backend_for(url)
+        if backend is not None:
+            return await self._run(f"Download of {url}", backend.download, url)
+        if urlparse(url).scheme in ("http", "https"):
+            return await self._run(f"Download of {url}", _http_download, url, self.timeout)
+        raise StorageError(f"No storage backend can read {url}")
+
+    async def copy(self, url: str, target, folder: str) -> str:
+        """Copy the object at `url` into `target` and return the new URL.
+
+        The object keeps its content hash key, so copies of one file share an
+        object on the target too. Derivatives are keyed by their original's
+        hash, so that is taken from the URL; objects stored under a random
+        name are keyed by the hash of their bytes.
+        """
+        data = await self.download(url)
+        filename = os.path.basename(urlparse(url).path)
+        key = os.path.splitext(filename)[0]
+        if not _CONTENT_KEY.match(key):
+            key = hashlib.sha256(data).hexdigest()
+        return await self.upload_bytes(data, folder, filename, key=key, backend=target)
+
+    async def copy_many(self, copies, target) -> list:
+        """Copy (url, folder) pairs into `target`, at most max_workers at a time.
+
+        Results come back in order, with the exception in place of the new URL
+        for copies that failed. Bounding the in-flight copies keeps queueing in
+        the thread pool from counting against each copy's timeout.
+        """
+        slots = asyncio.Semaphore(self.max_workers)
+
+        async def copy(url, folder):
+            async with slots:
+                return await self.copy(url, target, folder)
+
+        return await asyncio.gather(*(copy(url, folder) for url, folder in copies), return_exceptions=True)
+
+
+storage = StorageService.from_env()
+
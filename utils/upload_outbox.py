@@ -0,0 +1,239 @@
+from sqlalchemy import select, update, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from models.guard import Guard
+from models.uploadoutbox import UploadOutbox, UploadStatus
+from utils.images import image_pipeline, guard_image_values
+from utils.cache import response_cache
+import asyncio
+import os
+import random
+
+load_dotenv()
+
+# Uploads in flight per process; keep it at or below STORAGE_MAX_WORKERS
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", 6))
+UPLOAD_RETRY_BASE_SECONDS = float(os.getenv("UPLOAD_RETRY_BASE_SECONDS", 5))
+UPLOAD_RETRY_MAX_SECONDS = float(os.getenv("UPLOAD_RETRY_MAX_SECONDS", 600))
+# Idle workers re-check the table this often, for retries coming due and jobs queued by other processes
+UPLOAD_POLL_SECONDS = float(os.getenv("UPLOAD_POLL_SECONDS", 5))
+# A job left "uploading" this long is assumed orphaned by a dead process and claimed
+# again, or failed if that was its last attempt
+UPLOAD_CLAIM_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_CLAIM_TIMEOUT_SECONDS", 600))
+
+
+async def enqueue_uploads(db: AsyncSession, guard_id: int, uploads) -> list:
+    """Add (field, folder, UploadFile) jobs for a guard to the session; the caller commits."""
+    jobs = [
+        UploadOutbox(
+            guard_id=guard_id,
+            field=field,
+            folder=folder,
+            filename=file.filename,
+            data=await file.read(),
+            status=UploadStatus.PENDING,
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        for field, folder, file in uploads
+    ]
+    db.add_all(jobs)
+    return jobs
+
+
+async def supersede_uploads(db: AsyncSession, guard_id: int, fields):
+    """Drop queued uploads for `fields` of a guard, e.g. because a newer image replaced them."""
+    await db.execute(
+        update(UploadOutbox)
+        .where(
+            UploadOutbox.guard_id == guard_id,
+            UploadOutbox.field.in_(fields),
+            UploadOutbox.status.in_((UploadStatus.PENDING, UploadStatus.UPLOADING, UploadStatus.FAILED))
+        )
+        .values(status=UploadStatus.SUPERSEDED, data=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, capped at UPLOAD_RETRY_MAX_SECONDS."""
+    delay = min(UPLOAD_RETRY_BASE_SECONDS * 2 ** (attempts - 1), UPLOAD_RETRY_MAX_SECONDS)
+    return random.uniform(delay / 2, delay)
+
+
+async def outbox_counts(db: AsyncSession) -> dict:
+    rows = await db.execute(select(UploadOutbox.status, func.count()).group_by(UploadOutbox.status))
+    return {status.value: count for status, count in rows.all()}
+
+
+class UploadWorker:
+    """In-process pool draining the upload outbox.
+
+    A dispatcher claims due jobs by flipping them to "uploading" in one
+    UPDATE ... RETURNING, so several processes can share the table, and feeds
+    them to `concurrency` worker tasks. A worker stores the image through the
+    image pipeline without holding a database connection, then marks the job
+    done and patches the guard's URL columns in one transaction, but only if
+    the job is still claimed, so a superseded image never overwrites a newer
+    one. Failures are retried with backoff until UPLOAD_MAX_ATTEMPTS. Each
+    claim counts as an attempt, so a job whose process keeps dying mid-upload
+    is failed too instead of being claimed again forever.
+    """
+
+    def __init__(self, concurrency: int = UPLOAD_WORKERS):
+        self.concurrency = concurrency
+        self.uploaded = 0
+        self.retried = 0
+        self.failed = 0
+        self._session_factory = None
+        self._tasks = []
+        self._queue = None
+        self._wake = asyncio.Event()
+
+    def start(self, session_factory):
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue(maxsize=self.concurrency)
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake the dispatcher after queueing jobs instead of waiting for the next poll."""
+        self._wake.set()
+
+    async def claim(self, limit: int) -> list:
+        now = datetime.utcnow()
+        orphaned = and_(
+            UploadOutbox.status == UploadStatus.UPLOADING,
+            UploadOutbox.claimed_at < now - timedelta(seconds=UPLOAD_CLAIM_TIMEOUT_SECONDS)
+        )
+        claimable = and_(
+            or_(and_(UploadOutbox.status == UploadStatus.PENDING, UploadOutbox.next_attempt_at <= now), orphaned),
+            UploadOutbox.attempts < UPLOAD_MAX_ATTEMPTS
+        )
+        due = (
+            select(UploadOutbox.id)
+            .where(claimable)
+            .order_by(UploadOutbox.next_attempt_at, UploadOutbox.id)
+            .limit(limit)
+        )
+        async with self._session_factory() as db:
+            # Orphaned on their last attempt
+            abandoned = await db.execute(
+                update(UploadOutbox)
+                .where(orphaned, UploadOutbox.attempts >= UPLOAD_MAX_ATTEMPTS)
+                .values(status=UploadStatus.FAILED, claimed_at=None, last_error="Upload abandoned by its worker")
+                .execution_options(synchronize_session=False)
+            )
+            # Re-checking `claimable` makes a job claimed by another process in the meantime drop out
+            claimed = (await db.execute(
+                update(UploadOutbox)
+                .where(UploadOutbox.id.in_(due), claimable)
+                .values(status=UploadStatus.UPLOADING, claimed_at=now, attempts=UploadOutbox.attempts + 1)
+                .returning(UploadOutbox.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            await db.commit()
+        self.failed += abandoned.rowcount
+        return claimed
+
+    async def _dispatch(self):
+        while True:
+            self._wake.clear()
+            try:
+                claimed = await self.claim(self.concurrency)
+            except Exception as e:
+                print(f"Error claiming uploads: {e}")
+                claimed = []
+            for job_id in claimed:
+                await self._queue.put(job_id)
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), UPLOAD_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.process(job_id)
+            except Exception as e:
+                print(f"Error processing upload {job_id}: {e}")
+
+    async def process(self, job_id: int):
+        async with self._session_factory() as db:
+            job = await db.get(UploadOutbox, job_id)
+            if job is None or job.status != UploadStatus.UPLOADING:
+                return
+            guard_id, field, attempts = job.guard_id, job.field, job.attempts
+            data, folder, filename = job.data, job.folder, job.filename
+
+        try:
+            urls = await image_pipeline.store(self._session_factory, data, folder, filename)
+        except Exception as e:
+            await self._retry_or_fail(job_id, attempts, e)
+            return
+
+        still_claimed = and_(UploadOutbox.id == job_id, UploadOutbox.status == UploadStatus.UPLOADING)
+        async with self._session_factory() as db:
+            done = await db.execute(
+                update(UploadOutbox)
+                .where(still_claimed)
+                .values(status=UploadStatus.DONE, url=urls["url"], data=None, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+            if done.rowcount:
+                await db.execute(
+                    update(Guard)
+                    .where(Guard.id == guard_id)
+                    .values(guard_image_values(field, urls))
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+        if done.rowcount:
+            self.uploaded += 1
+            await response_cache.invalidate("guard")
+
+    async def _retry_or_fail(self, job_id: int, attempts: int, error: Exception):
+        give_up = attempts >= UPLOAD_MAX_ATTEMPTS
+        async with self._session_factory() as db:
+            await db.execute(
+                update(UploadOutbox)
+                .where(UploadOutbox.id == job_id, UploadOutbox.status == UploadStatus.UPLOADING)
+                .values(
+                    status=UploadStatus.FAILED if give_up else UploadStatus.PENDING,
+                    last_error=str(error)[:1000],
+                    next_attempt_at=datetime.utcnow() + timedelta(seconds=retry_delay(attempts)),
+                    claimed_at=None
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if give_up:
+            self.failed += 1
+            print(f"Upload {job_id} failed after {attempts} attempts: {error}")
+        else:
+            self.retried += 1
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._tasks),
+            "concurrency": self.concurrency,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "uploaded": self.uploaded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "max_attempts": UPLOAD_MAX_ATTEMPTS,
+        }
+
+
+upload_worker = UploadWorker()